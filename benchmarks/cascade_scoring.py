@@ -0,0 +1,101 @@
+"""Benchmark of cascade scoring.
+
+Fits a cheap logistic regression and an expensive StackingClassifier (logistic regression, random forest, gradient
+boosting and k-nearest neighbours) on synthetic features where most records are clearly negative, tunes the band of
+cheap probabilities sent to the stack on a validation set for several tolerances of F1 loss, and scores a test set
+with each cascade and with the stack alone. Records the fraction of records that exited early, the F1 of each and
+the end-to-end throughput gain. Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/cascade_scoring.py [--rows 20000] [--tolerances 0.0 0.005 0.01 0.02]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from cascade import CascadeClassifier, cascade_report, tune_band  # noqa: E402
+from import_time import git_revision  # noqa: E402
+
+DEFAULT_TOLERANCES = [0.0, 0.005, 0.01, 0.02]
+N_FEATURES = 20
+
+
+def make_data(n_rows: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    logit = 1.5 * X[:, 0] + 0.8 * X[:, 1] * X[:, 2] - np.abs(X[:, 3]) - 2.5
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+def make_models() -> tuple:
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier, StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neighbors import KNeighborsClassifier
+
+    cheap = LogisticRegression(max_iter=1000)
+    expensive = StackingClassifier([
+        ("lr", LogisticRegression(max_iter=1000)),
+        ("rf", RandomForestClassifier(n_estimators=100, min_samples_leaf=5, random_state=0)),
+        ("hgb", HistGradientBoostingClassifier(random_state=0)),
+        ("knn", KNeighborsClassifier(n_neighbors=50)),
+    ], final_estimator=LogisticRegression(), cv=3)
+    return cheap, expensive
+
+
+def main() -> None:
+    from sklearn.metrics import f1_score
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000, help="Number of training, validation and test records")
+    parser.add_argument("--tolerances", type=float, nargs="+", default=DEFAULT_TOLERANCES)
+    parser.add_argument("--output", type=Path, default=RESULTS / "cascade_scoring.json")
+    args = parser.parse_args()
+
+    X_train, y_train = make_data(args.rows, seed=0)
+    X_val, y_val = make_data(args.rows, seed=1)
+    X_test, y_test = make_data(args.rows, seed=2)
+    cheap, expensive = make_models()
+    cheap.fit(X_train, y_train)
+    expensive.fit(X_train, y_train)
+    cheap_val = cheap.predict_proba(X_val)[:, 1]
+    expensive_val = expensive.predict_proba(X_val)[:, 1]
+
+    results = []
+    for tolerance in args.tolerances:
+        band = tune_band(y_val, [0, 1], cheap_val, expensive_val, f1_score, tolerance=tolerance, pos_label="1")
+        report = cascade_report(CascadeClassifier.from_search(cheap, expensive, band), X_test, y_test, f1_score)
+        results.append({"tolerance": tolerance, "band": asdict(band), **asdict(report),
+                        "throughput_gain": report.throughput_gain})
+        print(f"tolerance {tolerance:<6} band [{band.lower:.3f}, {band.upper:.3f}]  exit {report.exit_fraction:6.1%}  "
+              f"F1 {report.score:.4f} vs {report.expensive_score:.4f}  throughput gain {report.throughput_gain:5.2f}x")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "cascade_scoring",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
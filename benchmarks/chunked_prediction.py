@@ -0,0 +1,100 @@
+"""Benchmark of chunked prediction.
+
+Scores synthetic features with models whose temporaries grow with the number of records, calling predict_proba on the
+whole matrix and through BatchedPredictor, over a range of data sizes. For each, records the wall time and the peak
+memory allocated beyond the features and output (measured with tracemalloc in a separate run), which should stay flat
+with the data size when chunked. Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/chunked_prediction.py [--sizes 10000 100000 300000] [--chunk-size 10000] [--n-jobs 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from batched_predict import BatchedPredictor  # noqa: E402
+from import_time import git_revision  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 300_000]
+N_FEATURES = 20
+N_TRAIN = 20_000
+
+
+def make_models() -> dict:
+    from sklearn.ensemble import RandomForestClassifier, StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neighbors import KNeighborsClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_TRAIN, N_FEATURES))
+    y = (X[:, 0] + rng.normal(size=N_TRAIN) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=50, max_depth=10, random_state=0)
+    return {
+        "knn": KNeighborsClassifier().fit(X, y),
+        "random_forest": forest.fit(X, y),
+        "stacking": StackingClassifier([("forest", forest), ("logreg", LogisticRegression())], cv=3).fit(X, y),
+    }
+
+
+def measure(predict, X: np.ndarray) -> dict:
+    start = time.perf_counter()
+    predict(X)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    output = predict(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_extra_bytes": peak - output.nbytes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=RESULTS / "chunked_prediction.json")
+    args = parser.parse_args()
+
+    models = make_models()
+    results = []
+    for n_rows in args.sizes:
+        X = np.random.default_rng(1).normal(size=(n_rows, N_FEATURES))
+        for name, model in models.items():
+            batched = BatchedPredictor(model, chunk_size=args.chunk_size, n_jobs=args.n_jobs)
+            for mode, predict in (("whole", model.predict_proba), ("chunked", batched.predict_proba)):
+                result = {"model": name, "rows": n_rows, "mode": mode, **measure(predict, X)}
+                results.append(result)
+                print(f"{name:<14} rows={n_rows:<8} {mode:<8} {result['seconds']:8.3f} s  "
+                      f"peak extra {result['peak_extra_bytes'] / 2 ** 20:9.1f} MiB")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "chunked_prediction",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "chunk_size": args.chunk_size,
+        "n_jobs": args.n_jobs,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark of distilling a stacked ensemble into a single model.
+
+Fits a StackingClassifier of the base models used in the stacking notebooks (logistic regression, random forest,
+gradient boosting, k-nearest neighbours and naive Bayes, under a logistic regression meta-learner) on synthetic
+features, takes its soft out-of-fold predictions from an OOFStore for the training records and for a set of
+unlabeled records, and distills them into a single HistGradientBoostingRegressor student. Records the AUC of teacher
+and student on a labelled holdout, their latency for single records and for the whole holdout, and their pickled
+sizes. Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/distillation.py [--train-rows 20000] [--unlabeled-rows 10000] [--test-rows 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from distill import distill, distillation_report, soft_targets  # noqa: E402
+from import_time import git_revision  # noqa: E402
+from oof_store import OOFStore  # noqa: E402
+
+N_FEATURES = 20
+
+
+def make_data(n_rows: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    logit = X[:, 0] + 0.8 * X[:, 1] * X[:, 2] - np.abs(X[:, 3]) + 0.5 * np.sin(2 * X[:, 4]) - 1.5
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+def base_models() -> dict:
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.neighbors import KNeighborsClassifier
+
+    return {
+        "lr": LogisticRegression(max_iter=1000),
+        "rf": RandomForestClassifier(n_estimators=100, min_samples_leaf=5, random_state=0),
+        "hgb": HistGradientBoostingClassifier(random_state=0),
+        "knn": KNeighborsClassifier(n_neighbors=50),
+        "gnb": GaussianNB(),
+    }
+
+
+def main() -> None:
+    from sklearn.ensemble import HistGradientBoostingRegressor, StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import StratifiedKFold
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--unlabeled-rows", type=int, default=10_000)
+    parser.add_argument("--test-rows", type=int, default=10_000)
+    parser.add_argument("--output", type=Path, default=RESULTS / "distillation.json")
+    args = parser.parse_args()
+
+    X_train, y_train = make_data(args.train_rows, seed=0)
+    X_unlabeled, _ = make_data(args.unlabeled_rows, seed=1)
+    X_test, y_test = make_data(args.test_rows, seed=2)
+
+    folds = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    teacher = StackingClassifier(list(base_models().items()), final_estimator=LogisticRegression(), cv=folds)
+    teacher.fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = OOFStore(directory, X_train, y_train, X_unlabeled, cv=5, random_state=42)
+        for name, model in base_models().items():
+            store.add(name, model)
+        soft_train, soft_unlabeled = soft_targets(store, LogisticRegression())
+
+    results = {}
+    for with_unlabeled in (False, True):
+        extra = (X_unlabeled, soft_unlabeled) if with_unlabeled else (None, None)
+        student = distill(HistGradientBoostingRegressor(max_iter=300, random_state=0), X_train, soft_train, *extra)
+        report = distillation_report(teacher, student, X_test, y_test)
+        name = "train_and_unlabeled" if with_unlabeled else "train_only"
+        results[name] = {**asdict(report), "auc_gap": report.auc_gap, "speedup": report.speedup,
+                         "batch_speedup": report.batch_speedup, "memory_reduction": report.memory_reduction}
+        print(f"{name:<20} teacher AUC {report.teacher_auc:.4f}  student AUC {report.student_auc:.4f}  "
+              f"gap {report.auc_gap:+.4f}")
+        print(f"{'':<20} single record {report.teacher_seconds_per_record * 1e3:8.3f} ms -> "
+              f"{report.student_seconds_per_record * 1e3:8.3f} ms ({report.speedup:.1f}x)  "
+              f"batch {report.teacher_batch_seconds_per_record * 1e6:8.2f} us -> "
+              f"{report.student_batch_seconds_per_record * 1e6:8.2f} us per record ({report.batch_speedup:.1f}x)")
+        print(f"{'':<20} size {report.teacher_bytes / 2 ** 20:8.2f} MiB -> {report.student_bytes / 2 ** 20:8.2f} MiB "
+              f"({report.memory_reduction:.1f}x)")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "distillation",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "train_rows": args.train_rows,
+        "unlabeled_rows": args.unlabeled_rows,
+        "test_rows": args.test_rows,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark of the metrics in eval_classification.
+
+Compares the sklearn metric calls that eval_classification used to make for each split (the classification report,
+the confusion matrix for the figure, accuracy, precision, recall, F1 and ROC AUC) with the confusion-count core that
+replaced them (one np.bincount pass for the label metrics and report, and one argsort for the AUC), on synthetic binary
+predictions. For each size, records the wall time of each approach and checks that they give the same scores and
+report. Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/eval_metrics.py [--sizes 10000 100000 1000000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from auc import roc_auc  # noqa: E402
+from eval_classification import _classification_report, _confusion_counts, _precision_recall_f1  # noqa: E402
+from import_time import git_revision  # noqa: E402
+from synthetic import make_binary  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def sklearn_metrics(y_true: np.ndarray, proba: np.ndarray) -> tuple:
+    from sklearn.metrics import (accuracy_score, classification_report, confusion_matrix, f1_score, precision_score,
+                                 recall_score, roc_auc_score)
+    y_pred = (proba > 0.5).astype(int)
+    report = classification_report(y_true, y_pred)
+    # ConfusionMatrixDisplay.from_predictions builds its own confusion matrix
+    confusion_matrix(y_true, y_pred, normalize="true")
+    return (report, accuracy_score(y_true, y_pred), precision_score(y_true, y_pred), recall_score(y_true, y_pred),
+            f1_score(y_true, y_pred), roc_auc_score(y_true, proba))
+
+
+def count_metrics(y_true: np.ndarray, proba: np.ndarray) -> tuple:
+    y_pred = (proba > 0.5).astype(int)
+    labels, cm = _confusion_counts(y_true, y_pred)
+    return (_classification_report(labels, cm), np.trace(cm) / cm.sum(), *_precision_recall_f1(labels, cm),
+            roc_auc(y_true, proba))
+
+
+def time_repeats(func, repeat: int, *args) -> tuple[list[float], tuple]:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        values = func(*args)
+        seconds.append(time.perf_counter() - start)
+    return seconds, values
+
+
+def run_case(n_rows: int, repeat: int) -> dict:
+    labels, _, proba = make_binary(n_rows)
+    y_true = labels.astype(int)
+    case = {"rows": n_rows}
+    values = {}
+    for name, func in (("sklearn", sklearn_metrics), ("confusion_counts", count_metrics)):
+        seconds, values[name] = time_repeats(func, repeat, y_true, proba)
+        case[name] = {"seconds": seconds, "median_seconds": statistics.median(seconds)}
+
+    reference, candidate = values["sklearn"], values["confusion_counts"]
+    case["report_equal"] = reference[0] == candidate[0]
+    case["max_abs_difference"] = max(abs(float(a) - float(b)) for a, b in zip(reference[1:], candidate[1:]))
+    case["speedup"] = case["sklearn"]["median_seconds"] / case["confusion_counts"]["median_seconds"]
+    print(f"rows={n_rows:<10} sklearn {case['sklearn']['median_seconds']:8.3f} s   "
+          f"confusion counts {case['confusion_counts']['median_seconds']:8.3f} s   speedup {case['speedup']:6.1f}x   "
+          f"report equal {case['report_equal']}   max difference {case['max_abs_difference']:.1e}")
+    return case
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=RESULTS / "eval_metrics.json")
+    args = parser.parse_args()
+
+    # Import sklearn's metrics before timing anything
+    sklearn_metrics(*(np.array([0, 1]),) * 2)
+    results = [run_case(n_rows, args.repeat) for n_rows in args.sizes]
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "eval_metrics",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
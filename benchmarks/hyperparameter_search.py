@@ -0,0 +1,107 @@
+"""Benchmark of successive halving and Hyperband against exhaustive grid search.
+
+Runs GridSearchCV and halving_search (with successive halving and with Hyperband) over grids shaped like those in
+02_Modelling (the max_bins x max_iter grid for HistGradientBoostingClassifier and the n_estimators x max_depth grid for
+RandomForestClassifier) on synthetic data, scoring by ROC AUC. For each search, records the wall time, the number of
+fits and the configuration chosen. To compare like with like, the chosen configuration's score is looked up in the
+exhaustive search's results, so a search that picks a worse configuration shows as a lower grid score. Results are
+written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/hyperparameter_search.py [--rows 50000] [--n-jobs 4] [--grids hgb rf]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from halving_search import halving_search  # noqa: E402
+from import_time import git_revision  # noqa: E402
+
+
+def make_grids() -> dict:
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+    return {
+        # early_stopping is fixed, as "auto" only stops early above 10,000 records, which the subsamples are not
+        "hgb": (HistGradientBoostingClassifier(early_stopping=True, random_state=42),
+                {"max_bins": [2, 3, 7, 15, 31, 63, 127, 255], "max_iter": [10, 100, 300]}),
+        "rf": (RandomForestClassifier(random_state=42),
+               {"n_estimators": [20, 40, 60, 80], "max_depth": [2, 3, 8, 16, 32]}),
+    }
+
+
+def params_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def run_grid(name: str, estimator, param_grid: dict, X: np.ndarray, y: np.ndarray, n_jobs: int | None) -> dict:
+    from sklearn.model_selection import GridSearchCV
+
+    start = time.perf_counter()
+    grid = GridSearchCV(estimator, param_grid, scoring="roc_auc", n_jobs=n_jobs, refit=False).fit(X, y)
+    grid_seconds = time.perf_counter() - start
+    grid_scores = {params_key(params): score
+                   for params, score in zip(grid.cv_results_["params"], grid.cv_results_["mean_test_score"])}
+    n_configs = len(grid_scores)
+    # The standard error of the best configuration's mean score over the 5 folds, to judge differences against
+    standard_error = grid.cv_results_["std_test_score"][grid.best_index_] / np.sqrt(5)
+    case = {"grid": name, "rows": len(y), "configurations": n_configs,
+            "exhaustive": {"seconds": grid_seconds, "fits": 5 * n_configs, "best_params": grid.best_params_,
+                           "grid_score": grid.best_score_, "standard_error": standard_error}}
+    print(f"{name:<4} exhaustive  {grid_seconds:8.1f} s  fits {5 * n_configs:<4} grid score {grid.best_score_:.5f} "
+          f"(standard error {standard_error:.5f})  {grid.best_params_}")
+
+    for method in ("halving", "hyperband"):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result = halving_search(estimator, param_grid, X, y, method=method, scoring="roc_auc", cv=5,
+                                    cache_dir=cache_dir, n_jobs=n_jobs, refit=False, random_state=0)
+        grid_score = grid_scores[params_key(result.best_params)]
+        case[method] = {"seconds": result.elapsed_seconds, "fits": result.n_fits, "best_params": result.best_params,
+                        "grid_score": grid_score, "speedup": grid_seconds / result.elapsed_seconds,
+                        "within_standard_error": bool(grid.best_score_ - grid_score <= standard_error)}
+        print(f"{name:<4} {method:<11} {result.elapsed_seconds:8.1f} s  fits {result.n_fits:<4} "
+              f"grid score {grid_score:.5f}  {result.best_params}")
+    return case
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--grids", nargs="+", default=["hgb", "rf"], choices=["hgb", "rf"])
+    parser.add_argument("--output", type=Path, default=RESULTS / "hyperparameter_search.json")
+    args = parser.parse_args()
+
+    from sklearn.datasets import make_classification
+    X, y = make_classification(args.rows, 40, n_informative=10, weights=[0.9], flip_y=0.05, random_state=0)
+    grids = make_grids()
+    results = [run_grid(name, *grids[name], X, y, args.n_jobs) for name in args.grids]
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "hyperparameter_search",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2, default=str))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
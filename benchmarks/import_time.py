@@ -0,0 +1,103 @@
+"""Startup benchmark for the modules in kaggle/src.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter for each module, several times, and records
+the cumulative import time of the module itself and of its heaviest dependencies. Results are written as JSON so
+that they can be compared between versions.
+
+Usage:
+    python benchmarks/import_time.py [--modules threshold_tuner headless_tuner] [--repeat 5] [--output PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+
+DEFAULT_MODULES = ["threshold_tuner", "headless_tuner", "threshold_sweep"]
+
+# Modules that should only be imported when output is rendered.
+HEAVY_MODULES = ["matplotlib", "seaborn", "IPython", "tqdm", "sklearn"]
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Parse the output of -X importtime into {module: cumulative microseconds}."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def time_import(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and return the cumulative import time of every module loaded."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of heaviest dependencies to record")
+    parser.add_argument("--output", type=Path, default=RESULTS / "import_time.json")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        runs = [time_import(module) for _ in range(args.repeat)]
+        totals = [run[module] for run in runs]
+        last = runs[-1]
+        heaviest = sorted(((name, us) for name, us in last.items() if name != module and "." not in name),
+                          key=lambda x: x[1], reverse=True)[: args.top]
+        results.append({
+            "module": module,
+            "median_us": statistics.median(totals),
+            "min_us": min(totals),
+            "runs_us": totals,
+            "heavy_modules_imported": sorted(name for name in HEAVY_MODULES if name in last),
+            "heaviest_dependencies_us": dict(heaviest),
+        })
+        print(f"{module:<20} median {statistics.median(totals) / 1000:8.1f} ms   "
+              f"heavy: {', '.join(results[-1]['heavy_modules_imported']) or '-'}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "import_time",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
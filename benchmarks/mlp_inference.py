@@ -0,0 +1,169 @@
+"""Benchmark of NumPy inference for the Keras MLP.
+
+Scores a network of the shape of ``create_model_bce`` (64-32-16-16-1, ReLU and a sigmoid output) with NumpyMLP and,
+where TensorFlow is installed, with Keras' ``model.predict``. The weights come from an .npz written by
+``export_weights`` or, by default, are random. Records:
+
+* cold start: the wall time and peak resident memory of a fresh interpreter that imports the scorer, loads the
+  weights and scores one batch, as a scoring worker does when it starts;
+* per-batch latency: the median time to score batches of several sizes in a warm process;
+* the largest difference between the NumPy and Keras outputs.
+
+Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/mlp_inference.py [--weights model_bce.npz] [--features 120] [--batch-sizes 1 2048 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from import_time import git_revision  # noqa: E402
+from mlp_numpy import NumpyMLP  # noqa: E402
+
+DEFAULT_BATCH_SIZES = [1, 256, 2048, 100_000]
+UNITS = [64, 32, 16, 16, 1]
+
+COLD_START = {
+    "numpy": """
+from mlp_numpy import NumpyMLP
+network = NumpyMLP.load({weights!r})
+network.predict(np.zeros((2048, network.n_features), dtype=np.float32))
+""",
+    "keras": """
+import keras
+from mlp_numpy import NumpyMLP
+network = NumpyMLP.load({weights!r})
+model = keras.Sequential([keras.Input(shape=(network.n_features,))])
+for kernel, bias, activation in zip(network.kernels, network.biases, network.activations):
+    model.add(keras.layers.Dense(kernel.shape[1], activation=activation))
+    model.layers[-1].set_weights([kernel, bias])
+model.predict(np.zeros((2048, model.input_shape[1]), dtype=np.float32), verbose=0)
+""",
+}
+
+COLD_START_TEMPLATE = """
+import resource, time
+start = time.perf_counter()
+import numpy as np
+{body}
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def random_network(n_features: int) -> NumpyMLP:
+    rng = np.random.default_rng(0)
+    sizes = [n_features, *UNITS]
+    kernels = [rng.normal(scale=np.sqrt(2 / fan_in), size=(fan_in, units)) for fan_in, units in zip(sizes, sizes[1:])]
+    biases = [rng.normal(scale=0.1, size=units) for units in UNITS]
+    return NumpyMLP(kernels, biases, ["relu"] * (len(UNITS) - 1) + ["sigmoid"])
+
+
+def load_keras(weights: str):
+    """Build the Keras model of a network saved by NumpyMLP."""
+    import keras
+
+    network = NumpyMLP.load(weights)
+    model = keras.Sequential([keras.Input(shape=(network.n_features,))])
+    for kernel, bias, activation in zip(network.kernels, network.biases, network.activations):
+        model.add(keras.layers.Dense(kernel.shape[1], activation=activation))
+        model.layers[-1].set_weights([kernel, bias])
+    return model
+
+
+def cold_start(scorer: str, weights: Path) -> dict:
+    code = COLD_START_TEMPLATE.format(body=COLD_START[scorer].format(weights=str(weights)))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True,
+                          env=dict(os.environ, PYTHONPATH=str(SRC)))
+    seconds, max_rss_kib = proc.stdout.split()[-2:]
+    return {"seconds": float(seconds), "max_rss_bytes": int(max_rss_kib) * 1024}
+
+
+def latency(predict, X: np.ndarray, batch_size: int, repeat: int) -> float:
+    batch = X[:batch_size]
+    predict(batch)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(batch)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", type=Path, default=None, help="An .npz from export_weights")
+    parser.add_argument("--features", type=int, default=120, help="Number of features of the random network")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=RESULTS / "mlp_inference.json")
+    args = parser.parse_args()
+
+    scorers = ["numpy", "keras"] if importlib.util.find_spec("keras") else ["numpy"]
+    if "keras" not in scorers:
+        print("TensorFlow is not installed; timing NumPy inference only")
+
+    results = {"cold_start": {}, "latency": [], "max_abs_difference": None}
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        weights = args.weights
+        if weights is None:
+            weights = directory / "network.npz"
+            random_network(args.features).save(weights)
+        network = NumpyMLP.load(weights)
+
+        for scorer in scorers:
+            cold = results["cold_start"][scorer] = cold_start(scorer, weights)
+            print(f"cold start {scorer:<6} {cold['seconds']:8.3f} s  "
+                  f"max RSS {cold['max_rss_bytes'] / 2 ** 20:8.1f} MiB")
+
+        X = np.random.default_rng(1).normal(size=(max(args.batch_sizes), network.n_features)).astype(np.float32)
+        predictors = {"numpy": network.predict}
+        if "keras" in scorers:
+            model = load_keras(weights)
+            predictors["keras"] = lambda batch: model.predict(batch, batch_size=len(batch), verbose=0)
+            sample = X[:10_000]
+            results["max_abs_difference"] = float(np.abs(network.predict(sample) - predictors["keras"](sample)).max())
+            print(f"largest difference from Keras {results['max_abs_difference']:.2e}")
+
+        for batch_size in args.batch_sizes:
+            for scorer, predict in predictors.items():
+                seconds = latency(predict, X, batch_size, args.repeat)
+                results["latency"].append({"scorer": scorer, "batch_size": batch_size, "seconds": seconds})
+                print(f"batch {batch_size:<8} {scorer:<6} {seconds * 1e3:10.3f} ms  "
+                      f"{seconds / batch_size * 1e6:8.3f} us/row")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "mlp_inference",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "weights": str(args.weights) if args.weights else f"random, {args.features} features",
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark of the MLP input pipeline.
+
+Prepares synthetic features the way the MLP notebooks do (a fitted preprocessor, dropping collinear columns and a
+MinMaxScaler), once in memory and once chunk by chunk into a memory-mapped float32 file with write_features, and
+records the peak memory allocated by each (measured with tracemalloc). Then times an epoch of BatchGenerator batches
+from the file, assembled in this thread and by worker threads. Results are written as JSON so that they can be
+compared between versions.
+
+Usage:
+    python benchmarks/mlp_input_pipeline.py [--rows 300000] [--features 100] [--batch-size 2048] [--n-workers 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from import_time import git_revision  # noqa: E402
+from mlp_data import BatchGenerator, write_features  # noqa: E402
+
+
+def make_transformers(X: pd.DataFrame) -> tuple:
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    preprocessor = StandardScaler().set_output(transform="pandas").fit(X)
+    collinear = list(X.columns[::10])
+    drop = lambda frame: frame.drop(columns=collinear)  # noqa: E731
+    scaler = MinMaxScaler().fit(drop(preprocessor.transform(X)))
+    return preprocessor, drop, scaler
+
+
+def peak_bytes(function) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--features", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=2048)
+    parser.add_argument("--n-workers", type=int, default=2)
+    parser.add_argument("--output", type=Path, default=RESULTS / "mlp_input_pipeline.json")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(args.rows, args.features)), columns=[f"f{i}" for i in range(args.features)])
+    y = (rng.random(args.rows) < 0.08).astype(int)
+    transformers = make_transformers(X)
+
+    def in_memory():
+        frame = X
+        for transformer in transformers:
+            frame = transformer.transform(frame) if hasattr(transformer, "transform") else transformer(frame)
+        return frame
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "features.npy"
+        modes = {"in_memory": in_memory, "write_features": lambda: write_features(path, X, transformers)}
+        for mode, prepare in modes.items():
+            seconds, peak = peak_bytes(prepare)
+            results[mode] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{mode:<16} {seconds:8.3f} s  peak {peak / 2 ** 20:9.1f} MiB")
+
+        for n_workers in (0, args.n_workers):
+            generator = BatchGenerator(path, y, batch_size=args.batch_size, class_weight="balanced",
+                                       n_workers=n_workers, seed=0)
+            start = time.perf_counter()
+            n_batches = sum(1 for _ in generator)
+            seconds = time.perf_counter() - start
+            results[f"epoch_workers_{n_workers}"] = {"seconds": seconds, "batches_per_second": n_batches / seconds}
+            print(f"epoch, {n_workers} workers {seconds:8.3f} s  {n_batches / seconds:9.1f} batches/s")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "mlp_input_pipeline",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "features": args.features,
+        "batch_size": args.batch_size,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
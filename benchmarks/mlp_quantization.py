@@ -0,0 +1,90 @@
+"""Benchmark of int8 quantization of the MLP.
+
+Quantizes a network of the shape of ``create_model_bce`` with QuantizedMLP, calibrated on a validation sample, and
+scores a test set with the float network and with both quantized modes. For each, records the weight size, the time
+to score the test set in batches, and the AUC and largest score change against the float network. The weights come
+from an .npz written by ``export_weights`` or, by default, are random, with labels drawn from the float network's
+scores. Results are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/mlp_quantization.py [--weights model_bce.npz] [--rows 300000] [--calibration-rows 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from import_time import git_revision  # noqa: E402
+from mlp_inference import random_network  # noqa: E402
+from mlp_numpy import NumpyMLP, QuantizedMLP, quantization_report  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", type=Path, default=None, help="An .npz from export_weights")
+    parser.add_argument("--features", type=int, default=120, help="Number of features of the random network")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--calibration-rows", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=65_536)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS / "mlp_quantization.json")
+    args = parser.parse_args()
+
+    network = NumpyMLP.load(args.weights) if args.weights else random_network(args.features)
+    rng = np.random.default_rng(1)
+    # features scaled to [0, 1], as by the notebooks' MinMaxScaler
+    X_val = rng.random((args.calibration_rows, network.n_features), dtype=np.float32)
+    X_test = rng.random((args.rows, network.n_features), dtype=np.float32)
+    y_test = (rng.random(args.rows) < network.predict(X_test)[:, -1]).astype(int)
+
+    networks = {"float32": network}
+    for accumulate in ("float32", "int32"):
+        networks[f"int8_{accumulate}_accumulate"] = QuantizedMLP.quantize(network, X_val, accumulate=accumulate)
+
+    results = []
+    for name, scorer in networks.items():
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            scorer.predict(X_test, batch_size=args.batch_size)
+            times.append(time.perf_counter() - start)
+        report = quantization_report(network, scorer, X_test, y_test, batch_size=args.batch_size)
+        result = {"network": name, "nbytes": report.quantized_nbytes, "seconds": statistics.median(times),
+                  "auc": report.quantized_auc, "auc_delta": report.auc_delta,
+                  "max_abs_difference": report.max_abs_difference}
+        results.append(result)
+        print(f"{name:<24} {result['nbytes'] / 1024:8.1f} KiB  {result['seconds']:8.3f} s  "
+              f"AUC {result['auc']:.5f} ({result['auc_delta']:+.2e})  max diff {result['max_abs_difference']:.2e}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "mlp_quantization",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "weights": str(args.weights) if args.weights else f"random, {args.features} features",
+        "rows": args.rows,
+        "calibration_rows": args.calibration_rows,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
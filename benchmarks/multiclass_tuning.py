@@ -0,0 +1,89 @@
+"""Benchmark of multi-class threshold tuning.
+
+Compares HeadlessThresholdTuner.search_threshold(), which creates label predictions and calls an sklearn metric for
+each candidate, with the vectorized coordinate descent in multiclass_tuner, on synthetic predictions. For each engine,
+records the wall time, the number of metric evaluations and the macro F1 score of the thresholds found. Results are
+written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/multiclass_tuning.py [--rows 20000] [--classes 3 5] [--restarts 1] [--skip-loop]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from headless_tuner import HeadlessThresholdTuner  # noqa: E402
+from import_time import git_revision  # noqa: E402
+from synthetic import make_multiclass  # noqa: E402
+
+
+def f1_macro(y_true, y_pred) -> float:
+    from sklearn.metrics import f1_score
+    return f1_score(y_true, y_pred, average="macro")
+
+
+def run_case(n_rows: int, n_classes: int, restarts: int, n_jobs: int | None, skip_loop: bool) -> dict:
+    y_true, target_classes, proba = make_multiclass(n_rows, n_classes)
+    default_class = target_classes[0]
+    tuner = HeadlessThresholdTuner()
+    case = {"rows": n_rows, "classes": n_classes}
+
+    engines = {}
+    if not skip_loop:
+        engines["loop"] = lambda: tuner.search_threshold(y_true, target_classes, proba, f1_macro,
+                                                         default_class=default_class)
+    engines["vectorized"] = lambda: tuner.search_multiclass_thresholds(
+        y_true, target_classes, proba, default_class, n_restarts=restarts, n_jobs=n_jobs, random_state=0)
+
+    for name, engine in engines.items():
+        result = engine()
+        pred = tuner.get_predictions(target_classes, proba, default_class, result.threshold)
+        case[name] = {
+            "seconds": result.elapsed_seconds,
+            "n_evaluations": result.n_evaluations,
+            "f1_macro": f1_macro(y_true, pred),
+            "thresholds": [float(x) for x in result.threshold],
+        }
+        print(f"rows={n_rows:<9} classes={n_classes:<3} {name:<11} {result.elapsed_seconds:9.3f} s   "
+              f"evaluations {result.n_evaluations:<8} f1_macro {case[name]['f1_macro']:.4f}")
+    return case
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20_000])
+    parser.add_argument("--classes", type=int, nargs="+", default=[3, 5])
+    parser.add_argument("--restarts", type=int, default=1)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--skip-loop", action="store_true", help="Run only the vectorized engine (for large --rows)")
+    parser.add_argument("--output", type=Path, default=RESULTS / "multiclass_tuning.json")
+    args = parser.parse_args()
+
+    results = [run_case(n_rows, n_classes, args.restarts, args.n_jobs, args.skip_loop)
+               for n_rows in args.rows for n_classes in args.classes]
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "multiclass_tuning",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark of probability calibration.
+
+Fits each calibrator in calibration.py (Platt, isotonic and histogram binning) once from the out-of-fold style scores
+of a logistic regression on a calibration set, and times calibrating a large set of scores with it. For Platt and
+isotonic, also fits CalibratedClassifierCV(FrozenEstimator(model)) with the same method on the same records and
+times its predict_proba, which scores the model again, recording the largest difference between the two. Results
+are written as JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/probability_calibration.py [--calibration-rows 100000] [--rows 1000000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from calibration import CalibratedModel, HistogramCalibrator, IsotonicCalibrator, PlattCalibrator  # noqa: E402
+from import_time import git_revision  # noqa: E402
+
+N_FEATURES = 20
+
+
+def make_data(n_rows: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    logit = X[:, 0] + 0.5 * X[:, 1] ** 2 - 2.5
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+def median_seconds(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.frozen import FrozenEstimator
+    from sklearn.linear_model import LogisticRegression
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calibration-rows", type=int, default=100_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS / "probability_calibration.json")
+    args = parser.parse_args()
+
+    X_train, y_train = make_data(args.calibration_rows, seed=0)
+    X_cal, y_cal = make_data(args.calibration_rows, seed=1)
+    X_test, _ = make_data(args.rows, seed=2)
+    model = LogisticRegression().fit(X_train, y_train)
+    cal_scores = model.decision_function(X_cal)
+    test_scores = model.decision_function(X_test)
+
+    results = []
+    calibrators = {"platt": PlattCalibrator(), "isotonic": IsotonicCalibrator(), "histogram": HistogramCalibrator()}
+    sklearn_methods = {"platt": "sigmoid", "isotonic": "isotonic"}
+    for name, calibrator in calibrators.items():
+        start = time.perf_counter()
+        calibrator.fit(cal_scores, y_cal)
+        result = {"calibrator": name, "fit_seconds": time.perf_counter() - start,
+                  "transform_seconds": median_seconds(lambda: calibrator.transform(test_scores), args.repeat)}
+        result["microseconds_per_1000"] = result["transform_seconds"] / args.rows * 1e9
+        line = (f"{name:<10} fit {result['fit_seconds']:7.3f} s  calibrate {result['microseconds_per_1000']:8.2f} us "
+                f"per 1000 scores")
+
+        if name in sklearn_methods:
+            start = time.perf_counter()
+            reference = CalibratedClassifierCV(FrozenEstimator(model), method=sklearn_methods[name]).fit(X_cal, y_cal)
+            result["sklearn_fit_seconds"] = time.perf_counter() - start
+            seconds = median_seconds(lambda: reference.predict_proba(X_test), args.repeat)
+            result["sklearn_microseconds_per_1000"] = seconds / args.rows * 1e9
+            calibrated = CalibratedModel(model, calibrator)
+            result["max_abs_difference"] = float(np.abs(calibrated.predict_proba(X_test[:100_000])
+                                                        - reference.predict_proba(X_test[:100_000])).max())
+            line += (f"  (CalibratedClassifierCV {result['sklearn_microseconds_per_1000']:8.2f} us, "
+                     f"largest difference {result['max_abs_difference']:.1e})")
+        results.append(result)
+        print(line)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "probability_calibration",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration_rows": args.calibration_rows,
+        "rows": args.rows,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Synthetic predictions for the benchmarks.
+
+Scores are drawn so that the true class has some signal, giving thresholds and metrics in a realistic range. Labels are
+returned as strings, as the tuner converts them to strings in any case.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def make_binary(n_rows: int, positive_rate: float = 0.3, seed: int = 0) -> tuple[np.ndarray, list[str], np.ndarray]:
+    """Generate binary labels and predicted probabilities of the positive class."""
+    rng = np.random.default_rng(seed)
+    is_positive = rng.random(n_rows) < positive_rate
+    proba = np.clip(rng.normal(0.35 + 0.3 * is_positive, 0.2), 0.0, 1.0)
+    target_classes = ["0", "1"]
+    return np.where(is_positive, "1", "0"), target_classes, proba
+
+
+def make_multiclass(n_rows: int, n_classes: int, seed: int = 0) -> tuple[np.ndarray, list[str], np.ndarray]:
+    """Generate labels and softmax probabilities for each class."""
+    rng = np.random.default_rng(seed)
+    y_idx = rng.integers(0, n_classes, n_rows)
+    logits = rng.normal(size=(n_rows, n_classes))
+    logits[np.arange(n_rows), y_idx] += 1.2
+    proba = np.exp(logits)
+    proba /= proba.sum(axis=1, keepdims=True)
+    target_classes = [f"class_{i}" for i in range(n_classes)]
+    return np.array(target_classes)[y_idx], target_classes, proba
@@ -0,0 +1,116 @@
+"""Benchmark of flattened tree-ensemble prediction.
+
+Fits gradient-boosted tree classifiers on synthetic features with missing values (HistGradientBoostingClassifier,
+and XGBClassifier and LGBMClassifier where installed), flattens each with tree_predictor.flatten, and times
+predict_proba of the library and of the flattened ensemble for several batch sizes. Records the median time per call
+and the largest difference between the two, which is zero for HistGradientBoostingClassifier. Results are written as
+JSON so that they can be compared between versions.
+
+Usage:
+    python benchmarks/tree_prediction.py [--batch-sizes 1 100 100000] [--max-iter 200] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from import_time import git_revision  # noqa: E402
+from tree_predictor import flatten  # noqa: E402
+
+DEFAULT_BATCH_SIZES = [1, 100, 100_000]
+N_FEATURES = 30
+N_TRAIN = 50_000
+
+
+def make_data(n_rows: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    logit = X[:, 0] + 0.5 * X[:, 1] * X[:, 2] - np.abs(X[:, 3]) - 2
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+def make_models(max_iter: int) -> dict:
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    models = {"hgb": HistGradientBoostingClassifier(max_iter=max_iter, learning_rate=0.05, early_stopping=False,
+                                                    random_state=0)}
+    if importlib.util.find_spec("xgboost"):
+        from xgboost import XGBClassifier
+
+        models["xgboost"] = XGBClassifier(n_estimators=max_iter, learning_rate=0.05, max_depth=6, random_state=0)
+    if importlib.util.find_spec("lightgbm"):
+        from lightgbm import LGBMClassifier
+
+        models["lightgbm"] = LGBMClassifier(n_estimators=max_iter, learning_rate=0.05, random_state=0, verbose=-1)
+    return models
+
+
+def median_seconds(predict, X: np.ndarray, repeat: int) -> float:
+    predict(X)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--max-iter", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=RESULTS / "tree_prediction.json")
+    args = parser.parse_args()
+
+    X_train, y_train = make_data(N_TRAIN, seed=0)
+    X_test, _ = make_data(max(args.batch_sizes), seed=1)
+    results = []
+    for name, model in make_models(args.max_iter).items():
+        model.fit(X_train, y_train)
+        ensemble = flatten(model)
+        difference = float(np.abs(ensemble.predict_proba(X_test) - model.predict_proba(X_test)).max())
+        print(f"{name:<9} {ensemble.n_trees} trees, {ensemble.n_nodes} nodes, max depth {ensemble.max_depth}, "
+              f"largest difference {difference:.2e}")
+        for batch_size in args.batch_sizes:
+            batch = X_test[:batch_size]
+            repeat = args.repeat if batch_size < 10_000 else max(1, args.repeat // 10)
+            library = median_seconds(model.predict_proba, batch, repeat)
+            flattened = median_seconds(ensemble.predict_proba, batch, repeat)
+            results.append({"model": name, "batch_size": batch_size, "library_seconds": library,
+                            "flattened_seconds": flattened, "max_abs_difference": difference})
+            print(f"  batch {batch_size:<8} library {library * 1e3:10.3f} ms  flattened {flattened * 1e3:10.3f} ms  "
+                  f"speed-up {library / flattened:6.2f}x")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "tree_prediction",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_iter": args.max_iter,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
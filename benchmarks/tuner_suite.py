@@ -0,0 +1,163 @@
+"""Benchmark suite for threshold_tuner.
+
+Times the main entry points of ClassificationThresholdTuner on synthetic predictions over a range of data sizes and
+numbers of classes, with figures rendered to the non-interactive Agg backend and closed rather than shown, and printed
+output discarded. For each case, records the wall time of each repeat and the peak memory allocated (measured with
+tracemalloc in a separate run, as tracing slows the code down). Results are written as JSON so that regressions are
+visible between versions.
+
+Some cases are slow enough on large data that each has a default limit on the number of rows; larger sizes are
+recorded as skipped unless --no-limits is given.
+
+Usage:
+    python benchmarks/tuner_suite.py [--sizes 10000 100000 1000000 10000000] [--cases tune_threshold_binary ...]
+                                     [--repeat 3] [--distribution-plot binned] [--no-limits] [--no-memory]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "kaggle" / "src"
+RESULTS = Path(__file__).resolve().parent / "results"
+sys.path.append(str(SRC))
+
+from import_time import git_revision  # noqa: E402
+from synthetic import make_binary, make_multiclass  # noqa: E402
+from threshold_tuner import ClassificationThresholdTuner  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def f1_macro(y_true, y_pred) -> float:
+    from sklearn.metrics import f1_score
+    return f1_score(y_true, y_pred, average="macro")
+
+
+@dataclass
+class Case:
+    name: str
+    n_classes: int
+    max_rows: int
+    run: Callable[[ClassificationThresholdTuner, tuple], object]
+
+
+CASES = [
+    Case("tune_threshold_binary", 2, 1_000_000,
+         lambda tuner, data: tuner.tune_threshold(*data, f1_macro, plot_thresholds=False)),
+    Case("tune_threshold_3_class", 3, 10_000,
+         lambda tuner, data: tuner.tune_threshold(*data, f1_macro, default_class=data[1][0], plot_thresholds=False)),
+    Case("tune_threshold_5_class", 5, 10_000,
+         lambda tuner, data: tuner.tune_threshold(*data, f1_macro, default_class=data[1][0], plot_thresholds=False)),
+    Case("tune_threshold_10_class", 10, 10_000,
+         lambda tuner, data: tuner.tune_threshold(*data, f1_macro, default_class=data[1][0], plot_thresholds=False)),
+    Case("get_predictions_binary", 2, 10_000_000,
+         lambda tuner, data: tuner.get_predictions(data[1], data[2], None, 0.5)),
+    Case("get_predictions_3_class", 3, 1_000_000,
+         lambda tuner, data: tuner.get_predictions(data[1], data[2], data[1][0], [0.5] * 3)),
+    Case("print_stats_table", 2, 10_000_000,
+         lambda tuner, data: tuner.print_stats_table(*data)),
+    Case("describe_slices", 2, 10_000_000,
+         lambda tuner, data: tuner.describe_slices(*data)),
+    Case("plot_by_threshold_binary", 2, 10_000_000,
+         lambda tuner, data: tuner.plot_by_threshold(*data)),
+    Case("plot_by_threshold_3_class", 3, 1_000_000,
+         lambda tuner, data: tuner.plot_by_threshold(*data, default_class=data[1][0])),
+]
+
+
+def make_data(n_rows: int, n_classes: int) -> tuple:
+    if n_classes == 2:
+        return make_binary(n_rows)
+    return make_multiclass(n_rows, n_classes)
+
+
+def run_quietly(case: Case, tuner: ClassificationThresholdTuner, data: tuple) -> None:
+    """Run a case with figures closed instead of shown and any printed output (including tqdm) discarded."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        case.run(tuner, data)
+    plt.close("all")
+
+
+def measure(case: Case, n_rows: int, repeat: int, distribution_plot: str, memory: bool) -> dict:
+    data = make_data(n_rows, case.n_classes)
+    seconds = []
+    for _ in range(repeat):
+        # A new tuner for each repeat, so the curve cache does not carry results between repeats
+        tuner = ClassificationThresholdTuner(distribution_plot=distribution_plot)
+        start = time.perf_counter()
+        run_quietly(case, tuner, data)
+        seconds.append(time.perf_counter() - start)
+
+    result = {"case": case.name, "rows": n_rows, "classes": case.n_classes, "seconds": seconds,
+              "median_seconds": statistics.median(seconds)}
+    if memory:
+        tuner = ClassificationThresholdTuner(distribution_plot=distribution_plot)
+        tracemalloc.start()
+        run_quietly(case, tuner, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_bytes"] = peak
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", default=[case.name for case in CASES],
+                        choices=[case.name for case in CASES])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--distribution-plot", choices=["swarm", "binned"], default="swarm")
+    parser.add_argument("--no-limits", action="store_true", help="Run every case at every size")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--output", type=Path, default=RESULTS / "tuner_suite.json")
+    args = parser.parse_args()
+
+    results = []
+    for case in CASES:
+        if case.name not in args.cases:
+            continue
+        for n_rows in args.sizes:
+            if n_rows > case.max_rows and not args.no_limits:
+                results.append({"case": case.name, "rows": n_rows, "classes": case.n_classes,
+                                "skipped": f"more than {case.max_rows:,} rows"})
+                print(f"{case.name:<28} rows={n_rows:<10} skipped")
+                continue
+            result = measure(case, n_rows, args.repeat, args.distribution_plot, not args.no_memory)
+            results.append(result)
+            peak = f"{result['peak_bytes'] / 2 ** 20:9.1f} MiB" if "peak_bytes" in result else ""
+            print(f"{case.name:<28} rows={n_rows:<10} median {result['median_seconds']:9.3f} s  {peak}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "benchmark": "tuner_suite",
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "distribution_plot": args.distribution_plot,
+        "results": results,
+    }, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
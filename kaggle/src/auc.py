@@ -0,0 +1,224 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def _positive_mask(y_true, pos_label):
+    """Get a boolean mask of the positive records, where pos_label defaults to the greater of the two labels present,
+    as ``sklearn.metrics.roc_auc_score`` does."""
+    y_true = np.asarray(y_true)
+    if pos_label is None:
+        classes = np.unique(y_true)
+        if len(classes) > 2:
+            raise ValueError("roc_auc is for binary classification; y_true has more than two classes")
+        pos_label = classes[-1]
+    return (y_true == pos_label).reshape(-1)
+
+
+def _tie_groups(sorted_values):
+    """Get the start and end (exclusive) of each run of equal values in a sorted array."""
+    boundaries = np.flatnonzero(sorted_values[1:] != sorted_values[:-1]) + 1
+    return np.r_[0, boundaries], np.r_[boundaries, len(sorted_values)]
+
+
+def _midranks(values, order):
+    """Get the 1-based rank of each value, with tied values given the average of their ranks.
+
+    Args:
+        values (array): The values to rank.
+        order (array): Indices that sort values, so that the same sort can be reused for several rankings.
+
+    Returns:
+        array: The rank of each value, in the original order.
+    """
+    starts, ends = _tie_groups(values[order])
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat((starts + ends + 1) / 2, ends - starts)
+    return ranks
+
+
+def roc_auc(y_true, y_score, pos_label=None, sample_weight=None):
+    """Calculate the area under the ROC curve for binary classification from the ranks of the scores.
+
+    The AUC equals the Mann-Whitney U statistic of the positive class's scores divided by ``n_pos * n_neg``, so it
+    needs only one sort of the scores rather than building the ROC curve. Tied scores count each tied (positive,
+    negative) pair as half, as the trapezoidal ROC AUC does. With sample weights, each pair counts by the product of
+    the weights of its records. Without, the counts are kept in integers, so the only rounding is in the final
+    division.
+
+    Args:
+        y_true (array-like): True labels.
+        y_score (array-like): Scores for the positive class, such as probabilities or decision function values.
+        pos_label (object?): The positive class. Defaults to None, which uses the greater of the two labels present,
+            as ``sklearn.metrics.roc_auc_score`` does.
+        sample_weight (array-like?): Weight of each record. Defaults to None, which weights them equally.
+
+    Returns:
+        float: The ROC AUC, matching ``sklearn.metrics.roc_auc_score`` to within floating-point rounding.
+    """
+    is_positive = _positive_mask(y_true, pos_label)
+    y_score = np.asarray(y_score, dtype=float).reshape(-1)
+    if sample_weight is None:
+        weight = np.ones(len(y_score), dtype=np.int64)
+    else:
+        weight = np.asarray(sample_weight, dtype=float).reshape(-1)
+    positive_weight = np.where(is_positive, weight, 0)
+    negative_weight = weight - positive_weight
+    total_positive, total_negative = positive_weight.sum(), negative_weight.sum()
+    if total_positive == 0 or total_negative == 0:
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+
+    order = np.argsort(y_score, kind="mergesort")
+    starts, _ = _tie_groups(y_score[order])
+    group_positive = np.add.reduceat(positive_weight[order], starts)
+    group_negative = np.add.reduceat(negative_weight[order], starts)
+
+    # Each positive record beats the negatives in lower groups, and ties with (counting half) those in its own group
+    negative_below = np.cumsum(group_negative) - group_negative
+    doubled_u = np.sum(group_positive * (2 * negative_below + group_negative))
+    return float(doubled_u / (2 * total_positive * total_negative))
+
+
+def roc_curve(y_true, y_score, pos_label=None):
+    """Calculate the ROC curve for binary classification, with a point for each distinct score.
+
+    Args:
+        y_true (array-like): True labels.
+        y_score (array-like): Scores for the positive class, such as probabilities or decision function values.
+        pos_label (object?): The positive class. Defaults to None, which uses the greater of the two labels present.
+
+    Returns:
+        tuple: The false positive rates, true positive rates and thresholds, ordered by decreasing threshold and
+            starting from (0, 0, inf), as ``sklearn.metrics.roc_curve(..., drop_intermediate=False)`` returns them.
+    """
+    is_positive = _positive_mask(y_true, pos_label)
+    y_score = np.asarray(y_score, dtype=float).reshape(-1)
+
+    order = np.argsort(y_score, kind="mergesort")[::-1]
+    sorted_scores = y_score[order]
+    # The last record of each run of tied scores, where the counts above the threshold are complete
+    ends = np.r_[np.flatnonzero(sorted_scores[1:] != sorted_scores[:-1]), len(sorted_scores) - 1]
+    tps = np.cumsum(is_positive[order])[ends]
+    fps = ends + 1 - tps
+
+    tpr = np.r_[0, tps] / tps[-1] if tps[-1] > 0 else np.full(len(tps) + 1, np.nan)
+    fpr = np.r_[0, fps] / fps[-1] if fps[-1] > 0 else np.full(len(fps) + 1, np.nan)
+    return fpr, tpr, np.r_[np.inf, sorted_scores[ends]]
+
+
+@dataclass
+class AucEstimate:
+    """An approximate ROC AUC, with bounds on the exact AUC of the records summarised."""
+    auc: float
+    lower: float
+    upper: float
+
+
+def sketch_auc(sketch):
+    """Estimate the ROC AUC from a ``streaming_tuner.ScoreSketch``, with bounds on the exact AUC.
+
+    A sketch holds a histogram of the scores of each class, so it can be built over data too large to hold in memory
+    (with ``update`` on each batch) or in parts (with ``merge``). Pairs of a positive and a negative record in
+    different bins are ordered correctly, but the order of pairs in the same bin is lost: the estimate counts those
+    as ties (half), which is the trapezoidal area under the sketch's ROC curve, and the exact AUC lies between
+    counting none and all of them. The width of the bounds shrinks as the number of bins grows.
+
+    Args:
+        sketch (ScoreSketch): The histograms of the scores of each class.
+
+    Returns:
+        AucEstimate: The estimate and the lower and upper bounds of the exact AUC.
+    """
+    negatives, positives = (row.astype(float) for row in sketch.counts)
+    total_positive, total_negative = positives.sum(), negatives.sum()
+    if total_positive == 0 or total_negative == 0:
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+    pairs = total_positive * total_negative
+    negative_below = np.cumsum(negatives) - negatives
+    ordered = np.sum(positives * negative_below) / pairs
+    same_bin = np.sum(positives * negatives) / pairs
+    return AucEstimate(float(ordered + same_bin / 2), float(ordered), float(ordered + same_bin))
+
+
+@dataclass
+class DeLongResult:
+    """A comparison of the ROC AUCs of two models scored on the same records, with DeLong's test.
+
+    covariance is the 2x2 covariance matrix of the two AUC estimates, and z and p_value are for the null hypothesis
+    that the two AUCs are equal (a two-sided test).
+    """
+    auc_a: float
+    auc_b: float
+    covariance: np.ndarray
+    z: float
+    p_value: float
+
+    @property
+    def difference(self):
+        """float: auc_a - auc_b."""
+        return self.auc_a - self.auc_b
+
+
+def _delong_components(y_score, is_positive):
+    """Calculate the structural components of DeLong's method for one model's scores.
+
+    Uses one sort of all the scores: the positive and negative records appear in sorted order within it, so their
+    ranks among their own class are found from the same sort (Sun & Xu's fast DeLong algorithm).
+
+    Args:
+        y_score (array): Scores for the positive class.
+        is_positive (array): Boolean mask of the positive records.
+
+    Returns:
+        tuple: The AUC, and the components for the positive records (the fraction of negatives each one beats) and
+            the negative records (the fraction of positives that beat each one).
+    """
+    order = np.argsort(y_score, kind="mergesort")
+    ranks = _midranks(y_score, order)
+    sorted_positive = is_positive[order]
+    positive_order = order[sorted_positive]
+    negative_order = order[~sorted_positive]
+
+    n_pos, n_neg = len(positive_order), len(negative_order)
+    positive_ranks = np.empty(len(y_score))
+    positive_ranks[positive_order] = _midranks(y_score[positive_order], np.arange(n_pos))
+    positive_ranks[negative_order] = _midranks(y_score[negative_order], np.arange(n_neg))
+
+    v10 = (ranks[is_positive] - positive_ranks[is_positive]) / n_neg
+    v01 = 1 - (ranks[~is_positive] - positive_ranks[~is_positive]) / n_pos
+    return float(v10.mean()), v10, v01
+
+
+def delong_test(y_true, y_score_a, y_score_b, pos_label=None):
+    """Compare the ROC AUCs of two models scored on the same records with DeLong's test.
+
+    The variance of each AUC and the covariance between them come from DeLong's structural components, which
+    account for the two AUCs being estimated on the same records. Each model's scores are sorted once.
+
+    Args:
+        y_true (array-like): True labels.
+        y_score_a (array-like): The first model's scores for the positive class.
+        y_score_b (array-like): The second model's scores for the positive class.
+        pos_label (object?): The positive class. Defaults to None, which uses the greater of the two labels present.
+
+    Returns:
+        DeLongResult: The two AUCs, their covariance matrix, and the z statistic and p-value of their difference.
+    """
+    is_positive = _positive_mask(y_true, pos_label)
+    if is_positive.all() or not is_positive.any():
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+    components = [_delong_components(np.asarray(y_score, dtype=float).reshape(-1), is_positive)
+                  for y_score in (y_score_a, y_score_b)]
+    aucs = [auc for auc, _, _ in components]
+    v10 = np.vstack([v10 for _, v10, _ in components])
+    v01 = np.vstack([v01 for _, _, v01 in components])
+    covariance = np.cov(v10) / v10.shape[1] + np.cov(v01) / v01.shape[1]
+
+    variance = covariance[0, 0] + covariance[1, 1] - 2 * covariance[0, 1]
+    difference = aucs[0] - aucs[1]
+    if variance > 0:
+        z = difference / math.sqrt(variance)
+    else:
+        z = 0.0 if difference == 0 else math.copysign(math.inf, difference)
+    return DeLongResult(aucs[0], aucs[1], covariance, z, math.erfc(abs(z) / math.sqrt(2)))
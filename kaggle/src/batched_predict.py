@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def _rows(X, start, stop):
+    """Get a range of rows of an array, DataFrame or sparse matrix."""
+    if hasattr(X, "iloc"):
+        return X.iloc[start:stop]
+    return X[start:stop]
+
+
+def _n_rows(X):
+    """Get the number of rows of an array, DataFrame or sparse matrix."""
+    return X.shape[0]
+
+
+class BatchedPredictor:
+    """Score records in chunks, so that the memory used by a model's temporaries does not grow with the data.
+
+    Models such as KNN, SVC and stacked ensembles allocate temporaries in proportion to the number of records they
+    are given (KNN's distance matrix, for example), which on hundreds of thousands of records can exceed the memory of
+    the features and scores themselves. This runs the preprocessor (if any) and the model on ``chunk_size`` records
+    at a time and writes each chunk's output into a buffer allocated once for the whole result, so the extra memory is
+    that of one chunk per thread whatever the number of records.
+
+    With ``n_jobs``, chunks are processed by a thread pool. This helps where the model releases the GIL for most of
+    its work (as NumPy and most sklearn estimators do) and multiplies the memory used for temporaries by n_jobs.
+
+    Args:
+        model (Classifier?): A fitted model. May be None for a predictor that only transforms.
+        chunk_size (int?): Number of records per chunk. Defaults to 10000.
+        preprocessor (Transformer?): A fitted transformer applied to each chunk before the model. Defaults to None.
+        n_jobs (int?): Number of threads. Defaults to None, which processes the chunks in turn.
+    """
+
+    def __init__(self, model=None, chunk_size=10_000, preprocessor=None, n_jobs=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.model = model
+        self.chunk_size = chunk_size
+        self.preprocessor = preprocessor
+        self.n_jobs = n_jobs
+
+    @property
+    def classes_(self):
+        """array: The classes of the model."""
+        return self.model.classes_
+
+    def transform(self, X):
+        """Apply the preprocessor to each chunk.
+
+        Args:
+            X (array-like): Features.
+
+        Returns:
+            array: The transformed features. Sparse output is stacked into a sparse matrix rather than a buffer, and
+                DataFrame output (from a preprocessor with ``set_output(transform="pandas")``) is returned as a
+                DataFrame with the index of X.
+        """
+        if self.preprocessor is None:
+            raise ValueError("BatchedPredictor has no preprocessor")
+        return self.__map(self.preprocessor.transform, X, preprocess=False)
+
+    def predict_proba(self, X):
+        """Get the predicted probabilities of each class, chunk by chunk.
+
+        Args:
+            X (array-like): Features, before the preprocessor (if any).
+
+        Returns:
+            array: The probabilities, as returned by ``model.predict_proba``.
+        """
+        return self.__map(self.model.predict_proba, X)
+
+    def decision_function(self, X):
+        """Get the decision function values, chunk by chunk.
+
+        Args:
+            X (array-like): Features, before the preprocessor (if any).
+
+        Returns:
+            array: The decision function values, as returned by ``model.decision_function``.
+        """
+        return self.__map(self.model.decision_function, X)
+
+    def predict(self, X):
+        """Get the predicted labels, chunk by chunk.
+
+        Args:
+            X (array-like): Features, before the preprocessor (if any).
+
+        Returns:
+            array: The labels, as returned by ``model.predict``.
+        """
+        return self.__map(self.model.predict, X)
+
+    def __map(self, func, X, preprocess=True):
+        """Apply func to each chunk of X, after the preprocessor where preprocess is True, and collect the results.
+
+        The first chunk is processed on its own to find the shape and dtype of the output, so that the buffer for the
+        whole output can be allocated before the rest are processed. A later chunk whose dtype cannot be cast safely
+        into the buffer (floats or NaN after a chunk of integers, say) is kept aside, and the buffer is promoted to
+        the common dtype once all the chunks are done. DataFrame output is concatenated instead, keeping the dtype of
+        each column.
+        """
+        n = _n_rows(X)
+        if preprocess and self.preprocessor is not None:
+            transform = self.preprocessor.transform
+
+            def apply(chunk):
+                return func(transform(chunk))
+        else:
+            apply = func
+
+        bounds = [(start, min(start + self.chunk_size, n)) for start in range(0, n, self.chunk_size)]
+        if not bounds:
+            return apply(X)
+        first = apply(_rows(X, *bounds[0]))
+
+        if hasattr(first, "tocsr"):
+            # sparse output has no fixed size per row, so the chunks are stacked instead
+            from scipy import sparse
+            rest = self.__run(lambda bound: apply(_rows(X, *bound)), bounds[1:])
+            return sparse.vstack([first, *rest], format="csr")
+
+        if isinstance(first, pd.DataFrame):
+            # the columns may have different dtypes, which a single buffer would lose
+            rest = self.__run(lambda bound: apply(_rows(X, *bound)), bounds[1:])
+            out = pd.concat([first, *rest])
+            if hasattr(X, "index"):
+                out.index = X.index
+            return out
+
+        first = np.asarray(first)
+        out = np.empty((n,) + first.shape[1:], dtype=first.dtype)
+        out[:len(first)] = first
+        promoted = {}
+
+        def fill(bound):
+            chunk = np.asarray(apply(_rows(X, *bound)))
+            if np.can_cast(chunk.dtype, out.dtype, casting="safe"):
+                out[bound[0]:bound[1]] = chunk
+            else:
+                promoted[bound] = chunk
+
+        self.__run(fill, bounds[1:])
+        if promoted:
+            out = out.astype(np.result_type(out.dtype, *(chunk.dtype for chunk in promoted.values())), copy=False)
+            for (start, stop), chunk in promoted.items():
+                out[start:stop] = chunk
+        return out
+
+    def __run(self, func, items):
+        """Apply func to each item, in a thread pool where n_jobs is set, returning the results in order."""
+        if self.n_jobs is None or self.n_jobs == 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            return list(executor.map(func, items))
@@ -0,0 +1,353 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+# the largest step halvings in one Newton iteration of the Platt fit
+MAX_HALVINGS = 50
+
+
+def _binary_labels(y, pos_label):
+    """Get labels as 0 and 1, with pos_label defaulting to the greater of the two labels present."""
+    y = np.asarray(y).reshape(-1)
+    if pos_label is None:
+        classes = np.unique(y)
+        if len(classes) > 2:
+            raise ValueError("Calibration is for binary classification; y has more than two classes")
+        pos_label = classes[-1]
+    return (y == pos_label).astype(float)
+
+
+def _weights(sample_weight, n):
+    return np.ones(n) if sample_weight is None else np.asarray(sample_weight, dtype=float).reshape(-1)
+
+
+class Calibrator(ABC):
+    """Map a model's scores to calibrated probabilities of the positive class.
+
+    A calibrator is fitted once from scores and labels, normally the cached out-of-fold scores of an ``OOFStore``
+    entry, and then calibrates any number of scores with a single ``np.interp`` or ``np.searchsorted`` call. Its state
+    is a few small arrays, written by ``save`` to an .npz file that ``load_calibrator`` reads back without pickle.
+
+    Subclasses implement ``fit``, ``transform`` and ``_arrays``, and set ``kind``.
+    """
+    kind = None
+
+    @abstractmethod
+    def fit(self, scores, y, sample_weight=None, pos_label=None):
+        """Fit the calibrator to scores and labels, returning the calibrator."""
+
+    @abstractmethod
+    def transform(self, scores):
+        """Map scores to calibrated probabilities of the positive class."""
+
+    @abstractmethod
+    def _arrays(self):
+        """Get the fitted state as a dict of arrays, for ``save``."""
+
+    def fit_transform(self, scores, y, sample_weight=None, pos_label=None):
+        return self.fit(scores, y, sample_weight, pos_label).transform(scores)
+
+    def save(self, path):
+        """Write the calibrator to an .npz file of plain arrays.
+
+        Args:
+            path (str or Path): The .npz file.
+        """
+        np.savez(Path(path), kind=np.array(self.kind), **self._arrays())
+
+    @classmethod
+    def _from_arrays(cls, arrays):
+        calibrator = cls.__new__(cls)
+        for name, value in arrays.items():
+            setattr(calibrator, name, value)
+        return calibrator
+
+
+class PlattCalibrator(Calibrator):
+    """Platt scaling: a logistic function of the score, ``1 / (1 + exp(-(a * score + b)))``.
+
+    The coefficients are fitted by Newton's method with step halving on the cross-entropy against Platt's smoothed
+    targets, ``(n+ + 1) / (n+ + 2)`` for positives and ``1 / (n- + 2)`` for negatives, as in
+    ``CalibratedClassifierCV(method="sigmoid")``.
+
+    Args:
+        max_iter (int?): Most Newton iterations. Defaults to 100.
+        tol (float?): Stop once the largest gradient component, per record, is below this. Defaults to 1e-12.
+    """
+    kind = "platt"
+
+    def __init__(self, max_iter=100, tol=1e-12):
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def fit(self, scores, y, sample_weight=None, pos_label=None):
+        """Fit the coefficients.
+
+        Args:
+            scores (array-like): The model's scores, such as probabilities or decision function values.
+            y (array-like): Binary labels.
+            sample_weight (array-like?): Weight of each record. Defaults to None.
+            pos_label (object?): The positive label. Defaults to None, the greater label.
+
+        Returns:
+            PlattCalibrator: This calibrator.
+        """
+        from scipy.special import expit
+
+        f = np.asarray(scores, dtype=float).reshape(-1)
+        is_positive = _binary_labels(y, pos_label)
+        w = _weights(sample_weight, len(f))
+        n_positive = w[is_positive == 1].sum()
+        n_negative = w.sum() - n_positive
+        target = np.where(is_positive == 1, (n_positive + 1) / (n_positive + 2), 1 / (n_negative + 2))
+
+        def loss(a, b):
+            z = a * f + b
+            # -log(expit(z)) = log(1 + exp(-z)), computed without overflow
+            return (w * (target * np.logaddexp(0, -z) + (1 - target) * np.logaddexp(0, z))).sum()
+
+        a, b = 0.0, float(np.log((n_positive + 1) / (n_negative + 1)))
+        current = loss(a, b)
+        for _ in range(self.max_iter):
+            p = expit(a * f + b)
+            residual = w * (p - target)
+            gradient = np.array([residual @ f, residual.sum()])
+            if np.abs(gradient).max() < self.tol * w.sum():
+                break
+            curvature = w * p * (1 - p)
+            hessian = np.array([[curvature @ (f * f), curvature @ f], [curvature @ f, curvature.sum()]])
+            step = np.linalg.solve(hessian + 1e-12 * np.eye(2), gradient)
+            scale = 1.0
+            for _ in range(MAX_HALVINGS):
+                candidate = loss(a - scale * step[0], b - scale * step[1])
+                if candidate <= current:
+                    break
+                scale /= 2
+            else:
+                break
+            a, b, current = a - scale * step[0], b - scale * step[1], candidate
+        self.a, self.b = a, b
+        return self
+
+    def transform(self, scores):
+        """Calibrate scores.
+
+        Args:
+            scores (array-like): The model's scores.
+
+        Returns:
+            np.ndarray: The probability of the positive class for each score.
+        """
+        from scipy.special import expit
+
+        return expit(self.a * np.asarray(scores, dtype=float) + self.b)
+
+    def _arrays(self):
+        return {"a": np.array(self.a), "b": np.array(self.b)}
+
+    @classmethod
+    def _from_arrays(cls, arrays):
+        return super()._from_arrays({"a": float(arrays["a"]), "b": float(arrays["b"])})
+
+
+def _pool_adjacent_violators(y, w):
+    """Fit a non-decreasing sequence to y by weighted least squares.
+
+    Args:
+        y (array): Values, in the order of the sorted scores.
+        w (array): Positive weight of each value.
+
+    Returns:
+        array: The fitted non-decreasing values.
+    """
+    # each block is the weighted mean, total weight and length of a run of pooled values
+    means, weights, lengths = [], [], []
+    for value, weight in zip(y.tolist(), w.tolist()):
+        length = 1
+        while means and means[-1] >= value:
+            total = weights[-1] + weight
+            value = (means[-1] * weights[-1] + value * weight) / total
+            weight = total
+            length += lengths[-1]
+            means.pop()
+            weights.pop()
+            lengths.pop()
+        means.append(value)
+        weights.append(weight)
+        lengths.append(length)
+    return np.repeat(means, lengths)
+
+
+class IsotonicCalibrator(Calibrator):
+    """Isotonic calibration: the non-decreasing step-wise linear function of the score closest to the labels.
+
+    Fitted with pool-adjacent-violators on the sorted unique scores (the labels of tied scores averaged first), and
+    reduced to the points where the fitted function changes slope, so ``transform`` is a single ``np.interp``. Scores
+    outside the fitted range are clipped to it. This matches ``CalibratedClassifierCV(method="isotonic")``.
+    """
+    kind = "isotonic"
+
+    def fit(self, scores, y, sample_weight=None, pos_label=None):
+        """Fit the calibration function.
+
+        Args:
+            scores (array-like): The model's scores.
+            y (array-like): Binary labels.
+            sample_weight (array-like?): Weight of each record. Defaults to None.
+            pos_label (object?): The positive label. Defaults to None, the greater label.
+
+        Returns:
+            IsotonicCalibrator: This calibrator.
+        """
+        scores = np.asarray(scores, dtype=float).reshape(-1)
+        is_positive = _binary_labels(y, pos_label)
+        w = _weights(sample_weight, len(scores))
+        keep = w > 0
+        scores, is_positive, w = scores[keep], is_positive[keep], w[keep]
+
+        unique, inverse = np.unique(scores, return_inverse=True)
+        unique_w = np.bincount(inverse, weights=w, minlength=len(unique))
+        unique_y = np.bincount(inverse, weights=w * is_positive, minlength=len(unique)) / unique_w
+        fitted = _pool_adjacent_violators(unique_y, unique_w)
+
+        # only the ends of each flat run are needed to interpolate
+        knot = np.ones(len(fitted), dtype=bool)
+        knot[1:-1] = (fitted[1:-1] != fitted[:-2]) | (fitted[1:-1] != fitted[2:])
+        self.x, self.y = unique[knot], fitted[knot]
+        return self
+
+    def transform(self, scores):
+        """Calibrate scores.
+
+        Args:
+            scores (array-like): The model's scores.
+
+        Returns:
+            np.ndarray: The probability of the positive class for each score.
+        """
+        return np.interp(np.asarray(scores, dtype=float), self.x, self.y)
+
+    def _arrays(self):
+        return {"x": self.x, "y": self.y}
+
+
+class HistogramCalibrator(Calibrator):
+    """Histogram binning: the rate of positives among the calibration records in the score's bin.
+
+    Args:
+        n_bins (int?): Number of bins. Defaults to 15.
+        strategy (str?): "quantile" for bins with equal numbers of records, or "uniform" for bins of equal width.
+            Defaults to "quantile".
+    """
+    kind = "histogram"
+
+    def __init__(self, n_bins=15, strategy="quantile"):
+        if strategy not in ("quantile", "uniform"):
+            raise ValueError(f"strategy must be 'quantile' or 'uniform', not {strategy!r}")
+        self.n_bins = n_bins
+        self.strategy = strategy
+
+    def fit(self, scores, y, sample_weight=None, pos_label=None):
+        """Fit the bin edges and the rate of positives in each bin.
+
+        Args:
+            scores (array-like): The model's scores.
+            y (array-like): Binary labels.
+            sample_weight (array-like?): Weight of each record. Defaults to None.
+            pos_label (object?): The positive label. Defaults to None, the greater label.
+
+        Returns:
+            HistogramCalibrator: This calibrator.
+        """
+        scores = np.asarray(scores, dtype=float).reshape(-1)
+        is_positive = _binary_labels(y, pos_label)
+        w = _weights(sample_weight, len(scores))
+        if self.strategy == "quantile":
+            edges = np.unique(np.quantile(scores, np.linspace(0, 1, self.n_bins + 1)))
+        else:
+            edges = np.linspace(scores.min(), scores.max(), self.n_bins + 1)
+        # the inner edges, which are all transform needs
+        self.edges = edges[1:-1]
+        bins = np.searchsorted(self.edges, scores, side="right")
+        totals = np.bincount(bins, weights=w, minlength=len(self.edges) + 1)
+        positives = np.bincount(bins, weights=w * is_positive, minlength=len(self.edges) + 1)
+        rates = np.full(len(totals), np.nan)
+        np.divide(positives, totals, out=rates, where=totals > 0)
+        # empty bins take the rate of the nearest bin before them, or after them for leading empty bins
+        filled = np.flatnonzero(~np.isnan(rates))
+        nearest = filled[np.clip(np.searchsorted(filled, np.arange(len(rates)), side="right") - 1, 0, None)]
+        self.rates = rates[nearest]
+        return self
+
+    def transform(self, scores):
+        """Calibrate scores.
+
+        Args:
+            scores (array-like): The model's scores.
+
+        Returns:
+            np.ndarray: The probability of the positive class for each score.
+        """
+        return self.rates[np.searchsorted(self.edges, np.asarray(scores, dtype=float), side="right")]
+
+    def _arrays(self):
+        return {"edges": self.edges, "rates": self.rates}
+
+
+CALIBRATORS = {calibrator.kind: calibrator for calibrator in (PlattCalibrator, IsotonicCalibrator,
+                                                                HistogramCalibrator)}
+
+
+def load_calibrator(path):
+    """Read a calibrator written by ``Calibrator.save``.
+
+    Args:
+        path (str or Path): The .npz file.
+
+    Returns:
+        Calibrator: The fitted calibrator.
+    """
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != "kind"}
+        kind = str(data["kind"])
+    return CALIBRATORS[kind]._from_arrays(arrays)
+
+
+class CalibratedModel:
+    """A fitted binary classifier with its scores mapped through a fitted calibrator.
+
+    This replaces ``CalibratedClassifierCV(FrozenEstimator(model))``, which fits the calibration when it is fitted, for
+    a calibrator fitted once from cached scores. As there, the model's decision function is calibrated where it has
+    one, and otherwise its probability of the positive class, so the calibrator should be fitted to the same scores.
+
+    Args:
+        model (Classifier): The fitted model.
+        calibrator (Calibrator): The fitted calibrator.
+        response_method (str?): "decision_function", "predict_proba", or "auto" for the first the model has.
+            Defaults to "auto".
+    """
+
+    def __init__(self, model, calibrator, response_method="auto"):
+        if response_method == "auto":
+            response_method = "decision_function" if hasattr(model, "decision_function") else "predict_proba"
+        self.model = model
+        self.calibrator = calibrator
+        self.response_method = response_method
+        self.classes_ = model.classes_
+
+    def scores(self, X):
+        """Get the model's uncalibrated scores."""
+        scores = getattr(self.model, self.response_method)(X)
+        return scores[:, 1] if self.response_method == "predict_proba" else scores
+
+    def predict_proba(self, X):
+        """Get the calibrated probability of each class, of shape (records, 2)."""
+        proba = np.empty((X.shape[0], 2))
+        proba[:, 1] = self.calibrator.transform(self.scores(X))
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X, threshold=0.5):
+        """Predict class labels at a threshold on the calibrated probability of the positive class."""
+        return self.classes_[(self.predict_proba(X)[:, 1] > threshold).astype(int)]
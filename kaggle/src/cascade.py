@@ -0,0 +1,209 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class BandSearchResult:
+    """The band of cheap-model probabilities sent on to the expensive model, and what it costs.
+
+    Records with a cheap-model probability from ``lower`` to ``upper`` (inclusive) are scored by the expensive model
+    and classified at ``threshold``; those below the band are classified negative and those above it positive.
+    ``reference_score`` is the metric of the expensive model alone at ``threshold``, and ``exit_fraction`` the
+    fraction of records that the cheap model decides.
+    """
+    lower: float
+    upper: float
+    threshold: float
+    reference_score: float
+    score: float
+    exit_fraction: float
+    n_evaluations: int
+
+    @property
+    def loss(self):
+        return abs(self.reference_score - self.score)
+
+
+def _cascade_labels(target_classes, cheap_proba, expensive_proba, lower, upper, threshold):
+    """Get the cascade's class labels from both models' probabilities of the positive class."""
+    in_band = (cheap_proba >= lower) & (cheap_proba <= upper)
+    positive = np.where(in_band, expensive_proba >= threshold, cheap_proba > upper)
+    return np.where(positive, target_classes[1], target_classes[0])
+
+
+def tune_band(y_true, target_classes, cheap_proba, expensive_proba, metric, higher_is_better=True, tolerance=0.005,
+              threshold=None, n_edges=20, **kwargs):
+    """Find the band of cheap-model probabilities to send to the expensive model.
+
+    The expensive model's threshold is tuned first, with the same search as ``ClassificationThresholdTuner``, unless
+    given. Then each pair of band edges from the quantiles of the cheap model's probabilities is scored, and the
+    narrowest band (the one letting the most records exit early) whose metric is within ``tolerance`` of the
+    expensive model alone is returned. The full range of probabilities is always a candidate, so a band is always
+    found.
+
+    Both sets of probabilities should be for the same validation records, not the records the models were fitted on.
+    As in the tuner, the labels are compared as strings, so the metric's arguments (such as ``pos_label``) should be
+    strings too.
+
+    Args:
+        y_true (array-like): True labels.
+        target_classes (list): The negative and positive class labels, in that order.
+        cheap_proba (array-like): The cheap model's probability of the positive class for each record.
+        expensive_proba (array-like): The expensive model's probability of the positive class for each record.
+        metric (function): A function of y_true and the predicted labels, such as ``f1_score``.
+        higher_is_better (bool?): Whether higher values of the metric are better. Defaults to True.
+        tolerance (float?): The largest loss in the metric allowed. Defaults to 0.005.
+        threshold (float?): The expensive model's threshold. Defaults to None, which tunes it.
+        n_edges (int?): Number of quantiles of the cheap probabilities tried as band edges. Defaults to 20.
+        **kwargs: Any arguments of the metric, such as ``pos_label``.
+
+    Returns:
+        BandSearchResult: The band, with its score and exit fraction.
+    """
+    from headless_tuner import HeadlessThresholdTuner
+
+    y_true = np.asarray(y_true).astype(str)
+    target_classes = [str(label) for label in target_classes]
+    cheap_proba = np.asarray(cheap_proba, dtype=float).reshape(-1)
+    expensive_proba = np.asarray(expensive_proba, dtype=float).reshape(-1)
+    if threshold is None:
+        threshold = HeadlessThresholdTuner(cache_size=0).search_threshold(
+            y_true, target_classes, expensive_proba, metric, higher_is_better, **kwargs).threshold
+    reference = metric(y_true, np.where(expensive_proba >= threshold, target_classes[1], target_classes[0]), **kwargs)
+
+    edges = np.unique(np.quantile(cheap_proba, np.linspace(0, 1, n_edges + 1)))
+    sorted_proba = np.sort(cheap_proba)
+    below = np.searchsorted(sorted_proba, edges, side="left")
+    above = len(cheap_proba) - np.searchsorted(sorted_proba, edges, side="right")
+    best, n_evaluations = None, 0
+    for i, lower in enumerate(edges):
+        # from the narrowest band with this lower edge to the widest, so the first within tolerance exits the most
+        for j in range(i, len(edges)):
+            exit_fraction = (below[i] + above[j]) / len(cheap_proba)
+            if best is not None and exit_fraction < best.exit_fraction:
+                break
+            score = metric(y_true, _cascade_labels(target_classes, cheap_proba, expensive_proba, lower, edges[j],
+                                                   threshold), **kwargs)
+            n_evaluations += 1
+            loss = reference - score if higher_is_better else score - reference
+            if loss > tolerance:
+                continue
+            if (best is None or exit_fraction > best.exit_fraction
+                    or (score > best.score if higher_is_better else score < best.score)):
+                best = BandSearchResult(float(lower), float(edges[j]), float(threshold), reference, score,
+                                        float(exit_fraction), 0)
+            break
+    best.n_evaluations = n_evaluations
+    return best
+
+
+class CascadeClassifier:
+    """Score records with a cheap model, sending only the uncertain ones to an expensive model.
+
+    Most applicants are clearly low risk, so a cheap model (such as the logistic regression) can decide them, and the
+    expensive model (such as a stacked ensemble or the MLP) is only run on the records whose cheap probability falls
+    in the band found by ``tune_band``.
+
+    Args:
+        cheap (Classifier): The fitted cheap model, whose positive class probability should be calibrated.
+        expensive (Classifier): The fitted expensive model.
+        lower (float): The lower edge of the band.
+        upper (float): The upper edge of the band.
+        threshold (float?): The expensive model's threshold. Defaults to 0.5.
+        classes (array?): The negative and positive class labels. Defaults to the cheap model's ``classes_``.
+    """
+
+    def __init__(self, cheap, expensive, lower, upper, threshold=0.5, classes=None):
+        self.cheap = cheap
+        self.expensive = expensive
+        self.lower = lower
+        self.upper = upper
+        self.threshold = threshold
+        self.classes_ = np.asarray(cheap.classes_ if classes is None else classes)
+        self.last_exit_fraction = None
+
+    @classmethod
+    def from_search(cls, cheap, expensive, result, classes=None):
+        """Build a cascade from the result of ``tune_band``."""
+        return cls(cheap, expensive, result.lower, result.upper, result.threshold, classes)
+
+    def _scores(self, X):
+        """Get the cheap probability of every record, the expensive probability of those in the band, and the band."""
+        cheap_proba = self.cheap.predict_proba(X)[:, 1]
+        in_band = (cheap_proba >= self.lower) & (cheap_proba <= self.upper)
+        expensive_proba = np.full(len(cheap_proba), np.nan)
+        if in_band.any():
+            rows = X.iloc if hasattr(X, "iloc") else X
+            expensive_proba[in_band] = self.expensive.predict_proba(rows[in_band])[:, 1]
+        self.last_exit_fraction = float(1 - in_band.mean()) if len(in_band) else None
+        return cheap_proba, expensive_proba, in_band
+
+    def predict_proba(self, X):
+        """Get the probability of each class: the expensive model's for records in the band, and the cheap model's for
+        the others. The two models' probabilities are on different scales, so use ``predict`` for decisions.
+
+        Args:
+            X (array-like): Features.
+
+        Returns:
+            np.ndarray: The probability of each class, of shape (records, 2).
+        """
+        cheap_proba, expensive_proba, in_band = self._scores(X)
+        proba = np.empty((len(cheap_proba), 2))
+        proba[:, 1] = np.where(in_band, expensive_proba, cheap_proba)
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        """Predict class labels: negative below the band, positive above it, and from the expensive model's threshold
+        within it.
+
+        Args:
+            X (array-like): Features.
+
+        Returns:
+            np.ndarray: The predicted labels.
+        """
+        cheap_proba, expensive_proba, _ = self._scores(X)
+        return _cascade_labels(self.classes_, cheap_proba, expensive_proba, self.lower, self.upper, self.threshold)
+
+
+@dataclass
+class CascadeReport:
+    """How a cascade compares with its expensive model alone on a test set."""
+    exit_fraction: float
+    score: float
+    expensive_score: float
+    seconds: float
+    expensive_seconds: float
+
+    @property
+    def throughput_gain(self):
+        return self.expensive_seconds / self.seconds
+
+
+def cascade_report(cascade, X_test, y_test, metric, **kwargs):
+    """Score a test set with a cascade and with its expensive model alone.
+
+    Args:
+        cascade (CascadeClassifier): The cascade.
+        X_test (array-like): Test features.
+        y_test (array-like): Test labels.
+        metric (function): A function of y_true and the predicted labels.
+        **kwargs: Any arguments of the metric.
+
+    Returns:
+        CascadeReport: The fraction of records that exited early, the metric of each and the time each took.
+    """
+    start = time.perf_counter()
+    predictions = cascade.predict(X_test)
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expensive_proba = cascade.expensive.predict_proba(X_test)[:, 1]
+    expensive_seconds = time.perf_counter() - start
+    expensive_predictions = np.where(expensive_proba >= cascade.threshold, cascade.classes_[1], cascade.classes_[0])
+    return CascadeReport(cascade.last_exit_fraction, metric(y_test, predictions, **kwargs),
+                         metric(y_test, expensive_predictions, **kwargs), seconds, expensive_seconds)
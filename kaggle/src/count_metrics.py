@@ -0,0 +1,162 @@
+"""
+Classification metrics calculated from confusion counts rather than from labels. Each binary metric takes arrays (or
+scalars) of true positives, false positives, false negatives and true negatives and is vectorized over them, so a
+metric may be evaluated for many thresholds at once. The multi-class metrics (prefixed cm_) take stacks of confusion
+matrices in the same way. Where a metric is undefined (for example, precision where nothing is predicted positive),
+0.0 is returned, matching sklearn's default zero_division behaviour.
+"""
+
+import numpy as np
+
+
+def _divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), 0.0)
+
+
+def precision(tp, fp, fn, tn):
+    return _divide(tp, tp + fp)
+
+
+def recall(tp, fp, fn, tn):
+    return _divide(tp, tp + fn)
+
+
+def specificity(tp, fp, fn, tn):
+    return _divide(tn, tn + fp)
+
+
+def f1(tp, fp, fn, tn):
+    return _divide(2 * tp, 2 * tp + fp + fn)
+
+
+def f1_macro(tp, fp, fn, tn):
+    return (f1(tp, fp, fn, tn) + f1(tn, fn, fp, tp)) / 2.0
+
+
+def accuracy(tp, fp, fn, tn):
+    return _divide(tp + tn, tp + fp + fn + tn)
+
+
+def balanced_accuracy(tp, fp, fn, tn):
+    return (recall(tp, fp, fn, tn) + specificity(tp, fp, fn, tn)) / 2.0
+
+
+def mcc(tp, fp, fn, tn):
+    tp, fp, fn, tn = (np.asarray(x, dtype=float) for x in (tp, fp, fn, tn))
+    return _divide(tp * tn - fp * fn, np.sqrt((tp + fp) * (tp + fn) * (tn + fp) * (tn + fn)))
+
+
+COUNT_METRICS = {
+    'precision': precision,
+    'recall': recall,
+    'specificity': specificity,
+    'f1': f1,
+    'f1_macro': f1_macro,
+    'accuracy': accuracy,
+    'balanced_accuracy': balanced_accuracy,
+    'mcc': mcc,
+}
+
+
+def get_count_metric(metric):
+    """
+    Get a count-based metric function.
+
+    :param metric: str or function
+        Either the name of one of the metrics in COUNT_METRICS, or a function taking (tp, fp, fn, tn) arrays and
+        returning an array of scores.
+    :return: function
+    """
+    if callable(metric):
+        return metric
+    if metric not in COUNT_METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Use one of {sorted(COUNT_METRICS)} or a function of "
+                         f"(tp, fp, fn, tn).")
+    return COUNT_METRICS[metric]
+
+
+# Multi-class metrics, calculated from confusion matrices rather than from (tp, fp, fn, tn). Each function takes an
+# array of shape (..., n_classes, n_classes), with rows for the true classes and columns for the predicted classes as
+# in sklearn's confusion_matrix(), and returns one score for each matrix. As with sklearn's defaults, macro averages
+# are taken over the classes present in either the true or the predicted labels.
+
+def _per_class(cm):
+    cm = np.asarray(cm, dtype=float)
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)
+    n_true = cm.sum(axis=-1)
+    n_pred = cm.sum(axis=-2)
+    return tp, n_true, n_pred
+
+
+def _macro(values, present):
+    return _divide(np.sum(values * present, axis=-1), np.sum(present, axis=-1))
+
+
+def cm_accuracy(cm):
+    tp, n_true, _ = _per_class(cm)
+    return _divide(tp.sum(axis=-1), n_true.sum(axis=-1))
+
+
+def cm_precision_macro(cm):
+    tp, n_true, n_pred = _per_class(cm)
+    return _macro(_divide(tp, n_pred), (n_true + n_pred) > 0)
+
+
+def cm_recall_macro(cm):
+    tp, n_true, n_pred = _per_class(cm)
+    return _macro(_divide(tp, n_true), (n_true + n_pred) > 0)
+
+
+def cm_f1_macro(cm):
+    tp, n_true, n_pred = _per_class(cm)
+    return _macro(_divide(2 * tp, n_true + n_pred), (n_true + n_pred) > 0)
+
+
+def cm_f1_weighted(cm):
+    tp, n_true, n_pred = _per_class(cm)
+    return _divide(np.sum(_divide(2 * tp, n_true + n_pred) * n_true, axis=-1), n_true.sum(axis=-1))
+
+
+def cm_balanced_accuracy(cm):
+    tp, n_true, _ = _per_class(cm)
+    return _macro(_divide(tp, n_true), n_true > 0)
+
+
+def cm_mcc(cm):
+    tp, n_true, n_pred = _per_class(cm)
+    correct = tp.sum(axis=-1)
+    total = n_true.sum(axis=-1)
+    numerator = correct * total - np.sum(n_true * n_pred, axis=-1)
+    denominator = np.sqrt((total ** 2 - np.sum(n_pred ** 2, axis=-1)) * (total ** 2 - np.sum(n_true ** 2, axis=-1)))
+    return _divide(numerator, denominator)
+
+
+CONFUSION_METRICS = {
+    'accuracy': cm_accuracy,
+    'precision_macro': cm_precision_macro,
+    'recall_macro': cm_recall_macro,
+    'f1_macro': cm_f1_macro,
+    'f1_weighted': cm_f1_weighted,
+    'balanced_accuracy': cm_balanced_accuracy,
+    'mcc': cm_mcc,
+}
+
+
+def get_confusion_metric(metric):
+    """
+    Get a multi-class metric calculated from confusion matrices.
+
+    :param metric: str or function
+        Either the name of one of the metrics in CONFUSION_METRICS, or a function taking an array of confusion matrices
+        with shape (..., n_classes, n_classes) and returning an array of scores.
+    :return: function
+    """
+    if callable(metric):
+        return metric
+    if metric not in CONFUSION_METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Use one of {sorted(CONFUSION_METRICS)} or a function of "
+                         f"confusion matrices.")
+    return CONFUSION_METRICS[metric]
@@ -0,0 +1,175 @@
+import pickle
+import statistics
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# teacher probabilities are clipped to this distance from 0 and 1 before taking the logit
+PROBA_EPS = 1e-6
+
+
+def soft_targets(store, final_estimator, names=None, passthrough=False):
+    """Get a stacked ensemble's probabilities for the training and test records from an ``OOFStore``.
+
+    The training probabilities come from the meta-learner applied to the base models' out-of-fold predictions, so
+    they are not fitted to each record's own label, and the test probabilities from the meta-learner applied to the
+    predictions of the base models fitted on all the training records, as ``StackingClassifier`` scores them.
+
+    Args:
+        store (OOFStore): The store, with the base models added. Its X_test can be unlabeled, such as the submission
+            records.
+        final_estimator (Estimator): The unfitted meta-learner.
+        names (list?): Names of the base models to stack. Defaults to None, which uses all of them.
+        passthrough (bool?): Whether the meta-learner also sees the original features. Defaults to False.
+
+    Returns:
+        tuple: The positive class's probability for each training record and each test record.
+    """
+    meta, test_features = store.fit_meta(final_estimator, names, passthrough)
+    train_features, _ = store.features(names)
+    if passthrough:
+        train_features = np.hstack([train_features, np.asarray(store.X_train, dtype=float)])
+    return meta.predict_proba(train_features)[:, 1], meta.predict_proba(test_features)[:, 1]
+
+
+class DistilledClassifier:
+    """A binary classifier that scores with a regressor trained on a teacher's log-odds.
+
+    Args:
+        regressor (Estimator): The fitted student regressor.
+        classes (array?): The class labels. Defaults to [0, 1].
+    """
+
+    def __init__(self, regressor, classes=(0, 1)):
+        self.regressor = regressor
+        self.classes_ = np.asarray(classes)
+
+    def decision_function(self, X):
+        """Get the student's log-odds of the positive class."""
+        return np.asarray(self.regressor.predict(X), dtype=float)
+
+    def predict_proba(self, X):
+        """Get the probability of each class, of shape (records, 2)."""
+        from scipy.special import expit
+
+        proba = np.empty((X.shape[0], 2))
+        proba[:, 1] = expit(self.decision_function(X))
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        """Predict class labels at a probability of 0.5."""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def distill(student, X_train, soft_train, X_unlabeled=None, soft_unlabeled=None, classes=(0, 1)):
+    """Train a single model to reproduce a teacher ensemble's probabilities.
+
+    The student is a regressor fitted to the teacher's log-odds, which (unlike the teacher's hard labels) carry how
+    sure the teacher is about each record, and unlike probabilities are not squeezed together near 0 and 1. Training
+    on the teacher's probabilities for unlabeled records as well, such as the submission records, gives the student
+    more of the teacher's behaviour to learn from, in the region where it will be used.
+
+    Args:
+        student (Estimator): An unfitted sklearn regressor, such as ``HistGradientBoostingRegressor`` or
+            ``MLPRegressor``. It is cloned.
+        X_train (array-like): Training features.
+        soft_train (array-like): The teacher's positive class probability for each training record, which should be
+            out-of-fold, as from ``soft_targets``.
+        X_unlabeled (array-like?): Further records to train on. Defaults to None.
+        soft_unlabeled (array-like?): The teacher's positive class probability for each of X_unlabeled. Defaults to
+            None.
+        classes (array?): The class labels of the teacher. Defaults to [0, 1].
+
+    Returns:
+        DistilledClassifier: The fitted student.
+    """
+    import pandas as pd
+    from scipy.special import logit
+    from sklearn.base import clone
+
+    X, soft = X_train, np.asarray(soft_train, dtype=float)
+    if X_unlabeled is not None:
+        if soft_unlabeled is None:
+            raise ValueError("soft_unlabeled is needed with X_unlabeled")
+        if isinstance(X_train, pd.DataFrame):
+            X = pd.concat([X_train, pd.DataFrame(X_unlabeled, columns=X_train.columns)], ignore_index=True)
+        else:
+            X = np.vstack([np.asarray(X_train), np.asarray(X_unlabeled)])
+        soft = np.concatenate([soft, np.asarray(soft_unlabeled, dtype=float)])
+    target = logit(np.clip(soft, PROBA_EPS, 1 - PROBA_EPS))
+    return DistilledClassifier(clone(student).fit(X, target), classes)
+
+
+@dataclass
+class DistillationReport:
+    """How a distilled student compares with its teacher on a labelled test set.
+
+    The latencies are the median time to score one record alone and the time per record when scoring the whole test
+    set at once; the sizes are of the pickled models, which for a teacher with a ``KNeighborsClassifier`` includes the
+    training records it searches.
+    """
+    teacher_auc: float
+    student_auc: float
+    teacher_seconds_per_record: float
+    student_seconds_per_record: float
+    teacher_batch_seconds_per_record: float
+    student_batch_seconds_per_record: float
+    teacher_bytes: int
+    student_bytes: int
+
+    @property
+    def auc_gap(self):
+        return self.teacher_auc - self.student_auc
+
+    @property
+    def speedup(self):
+        return self.teacher_seconds_per_record / self.student_seconds_per_record
+
+    @property
+    def batch_speedup(self):
+        return self.teacher_batch_seconds_per_record / self.student_batch_seconds_per_record
+
+    @property
+    def memory_reduction(self):
+        return self.teacher_bytes / self.student_bytes
+
+
+def _single_record_seconds(model, rows, n_records):
+    """Get the median time of scoring records one at a time."""
+    times = []
+    for i in range(n_records):
+        record = rows[i:i + 1]
+        start = time.perf_counter()
+        model.predict_proba(record)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def distillation_report(teacher, student, X_test, y_test, n_single=100):
+    """Compare a distilled student with its teacher.
+
+    Args:
+        teacher (Classifier): The fitted teacher, such as a ``StackingClassifier``.
+        student (Classifier): The fitted student, such as from ``distill``.
+        X_test (array-like): Test features.
+        y_test (array-like): Binary test labels.
+        n_single (int?): Number of records scored one at a time for the single-record latency. Defaults to 100.
+
+    Returns:
+        DistillationReport: The AUC, latency and size of each model.
+    """
+    from auc import roc_auc
+
+    rows = X_test.iloc if hasattr(X_test, "iloc") else X_test
+    n = X_test.shape[0]
+    results = {}
+    for name, model in (("teacher", teacher), ("student", student)):
+        start = time.perf_counter()
+        scores = model.predict_proba(X_test)[:, 1]
+        results[f"{name}_batch_seconds_per_record"] = (time.perf_counter() - start) / n
+        results[f"{name}_auc"] = roc_auc(y_test, scores)
+        results[f"{name}_seconds_per_record"] = _single_record_seconds(model, rows, min(n_single, n))
+        results[f"{name}_bytes"] = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    return DistillationReport(**results)
@@ -1,11 +1,446 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from auc import roc_auc, roc_curve
+from batched_predict import BatchedPredictor
+
+
+def _predict_scores(model, X, chunk_size=None):
+    """Get the scores for a set of records from a single inference pass.
+
+    Uses ``predict_proba`` where the model has it, and ``decision_function`` otherwise.
+
+    Args:
+        model (Classifier): A fitted classification model.
+        X (array-like): Features.
+        chunk_size (int?): If given, score this many records at a time with ``BatchedPredictor``. Defaults to None.
+
+    Returns:
+        tuple: The scores (an array with a column per class, or a 1d array of decision values for binary
+            classification) and a bool indicating whether they are probabilities.
+    """
+    batched = BatchedPredictor(model, chunk_size) if chunk_size is not None else model
+    if hasattr(model, "predict_proba"):
+        return batched.predict_proba(X), True
+    if hasattr(model, "decision_function"):
+        return batched.decision_function(X), False
+    raise ValueError(f"{type(model).__name__} has neither predict_proba nor decision_function")
+
+
+def _labels_from_scores(scores, classes, threshold):
+    """Derive the predicted labels from the scores of a single inference pass.
+
+    For binary classification, the positive (second) class is predicted where its score is greater than the threshold.
+    Without a threshold, or for multi-class classification, the class with the highest score is predicted.
+
+    Args:
+        scores (array): Scores from ``_predict_scores``, or precomputed probabilities.
+        classes (array): The class labels, in the order of the columns of scores.
+        threshold (float): The threshold for binary classification, or None for the class with the highest score.
+
+    Returns:
+        array: The predicted labels.
+    """
+    classes = np.asarray(classes)
+    if threshold is not None and (scores.ndim == 1 or scores.shape[1] == 1):
+        return classes[(scores.reshape(-1) > threshold).astype(int)]
+    if threshold is not None and scores.shape[1] == 2:
+        return classes[(scores[:, 1] > threshold).astype(int)]
+    return classes[np.argmax(scores, axis=1)]
+
+
+def _predict_disagrees(model):
+    """Whether a model's ``predict`` is known to disagree with its ``predict_proba``.
+
+    ``SVC`` and ``NuSVC`` predict from their decision function, while their probabilities come from a separate Platt
+    scaling, so the two can differ near the boundary. This looks through pipelines and stacked ensembles to the model
+    that makes the final prediction.
+    """
+    from sklearn.ensemble import StackingClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.svm import SVC, NuSVC
+
+    while isinstance(model, (Pipeline, StackingClassifier)):
+        model = model.steps[-1][1] if isinstance(model, Pipeline) else model.final_estimator_
+    return isinstance(model, (SVC, NuSVC))
+
+
+def _predicted_labels(model, X, scores, is_proba, classes, threshold, use_predict=False, chunk_size=None):
+    """Get the predicted labels for one set of records.
+
+    The labels are derived from the scores of the single inference pass: the class with the highest probability (or,
+    for binary decision function values, the positive class where the value is greater than 0.0), or with a
+    threshold, the positive class where its score is greater than it. Without a threshold, ``model.predict`` is run
+    instead where it is known to disagree with the probabilities (see ``_predict_disagrees``) or use_predict is set.
+
+    Args:
+        model (Classifier?): The fitted model, or None where the scores were precomputed.
+        X (array-like): Features.
+        scores (array): Scores from ``_predict_scores`` or precomputed probabilities.
+        is_proba (bool): Whether the scores are probabilities rather than decision function values.
+        classes (array): The class labels, in the order of the score columns.
+        threshold (float?): Threshold for the positive class, or None for the labels ``model.predict`` would give.
+        use_predict (bool?): Whether to run ``model.predict`` for the labels where there is no threshold. Defaults to
+            False.
+        chunk_size (int?): If given, run ``predict`` on this many records at a time. Defaults to None.
+
+    Returns:
+        array: The predicted labels.
+    """
+    if threshold is None and model is not None and (use_predict or (is_proba and _predict_disagrees(model))):
+        batched = BatchedPredictor(model, chunk_size) if chunk_size is not None else model
+        return np.asarray(batched.predict(X))
+    if threshold is None and (scores.ndim == 1 or scores.shape[1] == 1):
+        threshold = 0.5 if is_proba else 0.0
+    return _labels_from_scores(scores, classes, threshold)
+
+
+def _positive_scores(scores):
+    """Get the scores used for the ROC-AUC: those of the positive class for binary classification, and the full matrix
+    of probabilities for multi-class classification."""
+    if scores.ndim == 2 and scores.shape[1] == 2:
+        return scores[:, 1]
+    if scores.ndim == 2 and scores.shape[1] == 1:
+        return scores[:, 0]
+    return scores
+
+
+def _confusion_counts(y_true, y_pred):
+    """Build the confusion matrix for a set of predictions in a single ``np.bincount`` pass.
+
+    Args:
+        y_true (array-like): True labels.
+        y_pred (array-like): Predicted labels.
+
+    Returns:
+        tuple: The sorted labels present in either y_true or y_pred (as with ``sklearn.metrics.confusion_matrix``),
+            and the confusion matrix, with a row for each true label and a column for each predicted label.
+    """
+    y_true = np.asarray(y_true)
+    codes, labels = pd.factorize(np.concatenate([y_true, np.asarray(y_pred)]), sort=True)
+    labels = np.asarray(labels)
+    n_labels = len(labels)
+    true_codes, pred_codes = codes[:len(y_true)], codes[len(y_true):]
+    cm = np.bincount(true_codes * n_labels + pred_codes, minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+    return labels, cm
+
+
+def _divide(numerator, denominator):
+    """Divide, giving 0.0 where the denominator is 0 (sklearn's default zero_division behaviour, without the warning)."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def _precision_recall_f1(labels, cm, pos_label=1, average="binary"):
+    """Calculate the precision, recall and F1 score from a confusion matrix, as ``sklearn.metrics.precision_score``,
+    ``recall_score`` and ``f1_score`` do from the labels.
+
+    Args:
+        labels (array): The labels of the rows and columns of cm.
+        cm (array): Confusion matrix from ``_confusion_counts``.
+        pos_label (object?): The positive class where average is "binary". Defaults to 1.
+        average (str?): One of "binary", "micro", "macro", "weighted" or None (for the score of each label).
+            Defaults to "binary".
+
+    Returns:
+        tuple: The precision, recall and F1 score.
+    """
+    tp = np.diagonal(cm)
+    true_sum = cm.sum(axis=1)
+    pred_sum = cm.sum(axis=0)
+
+    if average == "binary":
+        if len(labels) > 2:
+            raise ValueError("Target is multiclass but average='binary'. Please choose another average setting, one "
+                             "of [None, 'micro', 'macro', 'weighted'].")
+        present = labels.tolist()
+        if pos_label not in present:
+            if len(present) >= 2:
+                raise ValueError(f"pos_label={pos_label} is not a valid label. It should be one of {present}")
+            return 0.0, 0.0, 0.0
+        idx = present.index(pos_label)
+        tp, true_sum, pred_sum = tp[idx:idx + 1], true_sum[idx:idx + 1], pred_sum[idx:idx + 1]
+    elif average == "micro":
+        tp, true_sum, pred_sum = np.array([tp.sum()]), np.array([true_sum.sum()]), np.array([pred_sum.sum()])
+    elif average not in (None, "macro", "weighted"):
+        raise ValueError("average has to be one of (None, 'micro', 'macro', 'weighted', 'binary')")
+
+    precision = _divide(tp, pred_sum)
+    recall = _divide(tp, true_sum)
+    f1 = _divide(2.0 * tp, true_sum + pred_sum)
+    if average is None:
+        return precision, recall, f1
+    if average == "weighted":
+        if true_sum.sum() == 0:
+            return 0.0, 0.0, 0.0
+        return tuple(float(np.average(x, weights=true_sum)) for x in (precision, recall, f1))
+    return tuple(float(np.average(x)) for x in (precision, recall, f1))
+
+
+def _classification_report(labels, cm, digits=2):
+    """Format the text report of ``sklearn.metrics.classification_report`` from a confusion matrix.
+
+    Args:
+        labels (array): The labels of the rows and columns of cm.
+        cm (array): Confusion matrix from ``_confusion_counts``.
+        digits (int?): Number of digits for the scores. Defaults to 2.
+
+    Returns:
+        str: The report, identical to ``classification_report(y_true, y_pred, digits=digits)``.
+    """
+    target_names = ["%s" % label for label in labels]
+    precision, recall, f1 = _precision_recall_f1(labels, cm, average=None)
+    support = cm.sum(axis=1)
+
+    headers = ["precision", "recall", "f1-score", "support"]
+    width = max(max(len(name) for name in target_names), len("weighted avg"), digits)
+    head_fmt = "{:>{width}s} " + " {:>9}" * len(headers)
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+    report = head_fmt.format("", *headers, width=width) + "\n\n"
+    for row in zip(target_names, precision, recall, f1, support):
+        report += row_fmt.format(*row, width=width, digits=digits)
+    report += "\n"
+
+    # With every label included, the micro average is the accuracy
+    row_fmt_accuracy = "{:>{width}s} " + " {:>9.{digits}}" * 2 + " {:>9.{digits}f}" + " {:>9}\n"
+    accuracy = _precision_recall_f1(labels, cm, average="micro")[2]
+    report += row_fmt_accuracy.format("accuracy", "", "", accuracy, np.sum(support), width=width, digits=digits)
+    for average in ("macro", "weighted"):
+        report += row_fmt.format(average + " avg", *_precision_recall_f1(labels, cm, average=average),
+                                 np.sum(support), width=width, digits=digits)
+    return report
+
+
+def _auc(y_true, scores, roc_auc_average):
+    """Calculate the ROC AUC: from the ranks of the positive class's scores for binary classification, and with
+    ``sklearn.metrics.roc_auc_score`` (one vs rest) for multi-class classification."""
+    scores = _positive_scores(scores)
+    if scores.ndim == 1:
+        return roc_auc(y_true, scores)
+    from sklearn.metrics import roc_auc_score
+    return roc_auc_score(y_true, scores, multi_class="ovr", average=roc_auc_average)
+
+
+def _normalize_rows(cm):
+    """Normalize a confusion matrix over the true labels, as ``normalize="true"`` does in sklearn."""
+    with np.errstate(all="ignore"):
+        return np.nan_to_num(cm / cm.sum(axis=1, keepdims=True))
+
+
+@dataclass
+class SplitEvaluation:
+    """The evaluation of a model on one set of records.
+
+    The curve arrays are those of the ROC curve for binary classification, as returned by ``auc.roc_curve``, and are
+    None for multi-class classification.
+    """
+    labels: np.ndarray
+    confusion_matrix: np.ndarray
+    accuracy: float
+    precision: float
+    recall: float
+    f1: float
+    auc: float
+    fpr: np.ndarray = None
+    tpr: np.ndarray = None
+    thresholds: np.ndarray = None
+
+    @property
+    def report(self):
+        """str: The text report of ``sklearn.metrics.classification_report``."""
+        return _classification_report(self.labels, self.confusion_matrix)
+
+
+@dataclass
+class ClassificationEvaluation:
+    """The evaluation of a model on the training and test sets, as returned by ``evaluate_classification``."""
+    model_name: str
+    train: SplitEvaluation
+    test: SplitEvaluation
+
+    def to_frame(self):
+        """Collect the scores in a single-row DataFrame indexed by the model name, as ``eval_classification`` returns.
+
+        Returns:
+            DataFrame: The accuracy, precision, recall, F1 score and ROC AUC of the training and test sets.
+        """
+        results = pd.DataFrame(index=[self.model_name])
+        for column, attribute in (("acc", "accuracy"), ("prec", "precision"), ("recall", "recall"), ("f1", "f1"),
+                                  ("auc", "auc")):
+            results["train_" + column] = getattr(self.train, attribute)
+            results["test_" + column] = getattr(self.test, attribute)
+        return results
+
+
+def _evaluate_split(y_true, y_pred, scores, pos_label, average, roc_auc_average):
+    """Evaluate the predictions and scores of one set of records.
+
+    Args:
+        y_true (array-like): True labels.
+        y_pred (array): Predicted labels from ``_predicted_labels``.
+        scores (array): Scores from ``_predict_scores`` or precomputed probabilities.
+        pos_label (int): Positive label for binary classification.
+        average (str): Method of averaging for multiclass problems.
+        roc_auc_average (str): Method of averaging for ROC-AUC score in multiclass problems.
+
+    Returns:
+        SplitEvaluation: The confusion matrix, scores and ROC curve.
+    """
+    # build the confusion matrix once; the report and scores are all derived from it
+    labels, cm = _confusion_counts(y_true, y_pred)
+    precision, recall, f1 = _precision_recall_f1(labels, cm, pos_label, average)
+    evaluation = SplitEvaluation(labels, cm, np.trace(cm) / cm.sum(), precision, recall, f1,
+                                 _auc(y_true, scores, roc_auc_average))
+    if _positive_scores(scores).ndim == 1:
+        evaluation.fpr, evaluation.tpr, evaluation.thresholds = roc_curve(y_true, _positive_scores(scores))
+    return evaluation
+
+
+def evaluate_classification(model, X_train, y_train, X_test, y_test, model_name="model", pos_label=1,
+                            average="binary", roc_auc_average="macro", threshold=None, train_proba=None,
+                            test_proba=None, chunk_size=None, use_predict=False):
+    """Evaluate the classification performance of a machine learning model without printing or plotting anything.
+
+    This is the computation behind ``eval_classification``, for use in loops (such as cross-validation or
+    hyperparameter searches) where the reports and figures are not wanted. It does not import matplotlib. The result
+    can be shown later with ``render_evaluation``.
+
+    Args:
+        model (Classifier): The machine learning model to be evaluated.
+        X_train (array-like): Training features.
+        y_train (array-like): Training labels.
+        X_test (array-like): Test features.
+        y_test (array-like): Test labels.
+        model_name (str?): Name of the model. Defaults to "model".
+        pos_label (int?): Positive label for binary classification. Defaults to 1.
+        average (str?): Method of averaging for multiclass problems. Defaults to "binary".
+        roc_auc_average (str?): Method of averaging for ROC-AUC score in multiclass problems. Defaults to "macro".
+        threshold (float?): If given, for binary classification the positive class is predicted where its score is
+            greater than this. Defaults to None, which predicts the class with the highest score (0.0 for binary
+            decision function values), as ``model.predict`` does for most models.
+        train_proba (array-like?): Precomputed probabilities for X_train, either of the positive class or with a column
+            per class. If given, the model is not run on X_train. Defaults to None.
+        test_proba (array-like?): Precomputed probabilities for X_test, as for train_proba. Defaults to None.
+        chunk_size (int?): If given, run the model on this many records at a time, which bounds the memory used by
+            models (such as KNN or SVC) whose temporaries grow with the number of records. Defaults to None.
+        use_predict (bool?): Whether to label the records with ``model.predict``, at the cost of a second inference
+            pass, for models whose ``predict`` disagrees with their probabilities. Defaults to False; SVC and NuSVC
+            (which predict from their decision function) are always labelled this way without a threshold.
+
+    Returns:
+        ClassificationEvaluation: The confusion matrices, scores and ROC curves of the training and test sets.
+    """
+    if model is None and (train_proba is None or test_proba is None):
+        raise ValueError("model may only be None where both train_proba and test_proba are given")
+
+    # score each set once, unless the probabilities were precomputed
+    if train_proba is None:
+        train_scores, train_is_proba = _predict_scores(model, X_train, chunk_size)
+    else:
+        train_scores, train_is_proba = np.asarray(train_proba), True
+    if test_proba is None:
+        test_scores, test_is_proba = _predict_scores(model, X_test, chunk_size)
+    else:
+        test_scores, test_is_proba = np.asarray(test_proba), True
+
+    if model is not None and hasattr(model, "classes_"):
+        classes = model.classes_
+    else:
+        classes = np.unique(np.concatenate([np.asarray(y_train), np.asarray(y_test)]))
+
+    # the model is only run again for the labels where its predict is known to disagree with its scores
+    train_pred = _predicted_labels(model if train_proba is None else None, X_train, train_scores, train_is_proba,
+                                   classes, threshold, use_predict, chunk_size)
+    test_pred = _predicted_labels(model if test_proba is None else None, X_test, test_scores, test_is_proba, classes,
+                                  threshold, use_predict, chunk_size)
+    train = _evaluate_split(y_train, train_pred, train_scores, pos_label, average, roc_auc_average)
+    test = _evaluate_split(y_test, test_pred, test_scores, pos_label, average, roc_auc_average)
+    return ClassificationEvaluation(model_name, train, test)
+
+
+def _side_by_side(strings, size=54, space=1):
+    """Print classification reports side by side.
+    
+    This function takes a list of strings, each representing a classification report, and prints them side by side in a
+    formatted manner. Each string is truncated to a specified size, and lines are joined with a given space.
+    
+    Args:
+        strings (list): A list of strings containing classification reports.
+        size (int): The maximum width of each line in the output. Defaults to 54.
+        space (int): The number of spaces between columns in the output. Defaults to 1.
+    
+    Returns:
+        str: A string representing the side-by-side formatted classification reports.
+    """
+    strings = list(strings)
+    result = []
+
+    while any(strings):
+        line = []
+
+        for i, s in enumerate(strings):
+            buf = s[:size]
+            
+            try:
+                n = buf.index("\n")
+                line.append(buf[:n].ljust(size))
+                strings[i] = s[n+1:]
+            except ValueError:
+                line.append(buf.ljust(size))
+                strings[i] = s[size:]
+
+        result.append((" " * space).join(line))
+    
+    return "\n".join(result)
+
+
+def render_evaluation(evaluation, display_labels=("Non-Defaulter", "Defaulter")):
+    """Print the side-by-side classification reports and show the normalized confusion matrices of an evaluation.
+
+    matplotlib is imported here rather than in ``evaluate_classification``, so evaluations that are never rendered do
+    not need it.
+
+    Args:
+        evaluation (ClassificationEvaluation): The result of ``evaluate_classification``.
+        display_labels (sequence?): Labels for the confusion matrix axes. Defaults to ("Non-Defaulter", "Defaulter").
+    """
+    from sklearn.metrics import ConfusionMatrixDisplay
+    import matplotlib.pyplot as plt
+
+    # set up report strings with titles
+    s1 = " "*20 + "Train Evaluation" + "\n" + evaluation.train.report
+    s2 = " "*20 + "Test Evaluation" + "\n" + evaluation.test.report
+    print(_side_by_side([s1, s2]))
+    
+    # print confusion matrices side by side
+    fig, (ax1, ax2) = plt.subplots(nrows=1, ncols=2, figsize=(8, 4))
+    ConfusionMatrixDisplay(_normalize_rows(evaluation.train.confusion_matrix), display_labels=list(display_labels)).plot(cmap="Blues", ax=ax1)
+    ConfusionMatrixDisplay(_normalize_rows(evaluation.test.confusion_matrix), display_labels=list(display_labels)).plot(cmap="Greens", ax=ax2)
+    plt.tight_layout()  
+    plt.show()
+
+
 def eval_classification(model, X_train, y_train, X_test, y_test, model_name="model", results_frame=None,
-                        pos_label=1, average="binary", roc_auc_average="macro"):
+                        pos_label=1, average="binary", roc_auc_average="macro", threshold=None,
+                        train_proba=None, test_proba=None, chunk_size=None, use_predict=False, render=True):
     
     """Evaluate the classification performance of a machine learning model using various metrics.
     
     This function trains and evaluates a given classification model on both training and test datasets. It prints side-by-
     side classification reports for train and test sets and displays normalized confusion matrices. Additionally, it
     calculates and returns various evaluation metrics such as accuracy, precision, recall, F1-score, and ROC-AUC score.
+
+    The model is run once on each set: the labels are derived from the predicted probabilities (or, for models without
+    ``predict_proba``, the ``decision_function`` values) rather than by calling ``predict`` separately. Models whose
+    ``predict`` is known to disagree with their probabilities (such as ``SVC(probability=True)``, which predicts from
+    its decision function) are also run with ``predict``, as are all models with ``use_predict=True``. Probabilities
+    calculated elsewhere may be passed instead, in which case the model is not run on that set.
+
+    The reports and figures can be turned off with ``render=False``; ``evaluate_classification`` returns the full
+    evaluation (including the confusion matrices and ROC curves) rather than only the scores.
     
     Args:
         model (Classifier): The machine learning model to be evaluated.
@@ -18,82 +453,32 @@ def eval_classification(model, X_train, y_train, X_test, y_test, model_name="mod
         pos_label (int?): Positive label for binary classification. Defaults to 1.
         average (str?): Method of averaging for multiclass problems. Defaults to "binary".
         roc_auc_average (str?): Method of averaging for ROC-AUC score in multiclass problems. Defaults to "macro".
+        threshold (float?): If given, for binary classification the positive class is predicted where its score is
+            greater than this. Defaults to None, which predicts the class with the highest score (0.0 for binary
+            decision function values), as ``model.predict`` does for most models.
+        train_proba (array-like?): Precomputed probabilities for X_train, either of the positive class or with a column
+            per class. If given, the model is not run on X_train. Defaults to None.
+        test_proba (array-like?): Precomputed probabilities for X_test, as for train_proba. Defaults to None.
+        chunk_size (int?): If given, run the model on this many records at a time, which bounds the memory used by
+            models (such as KNN or SVC) whose temporaries grow with the number of records. Defaults to None.
+        use_predict (bool?): Whether to label the records with ``model.predict``, at the cost of a second inference
+            pass, for models whose ``predict`` disagrees with their probabilities. Defaults to False; SVC and NuSVC
+            (which predict from their decision function) are always labelled this way without a threshold.
+        render (bool?): Whether to print the classification reports and show the confusion matrices. Defaults to True.
     
     Returns:
         DataFrame: A pandas DataFrame containing the evaluation metrics.
     """
-    from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
-                                 f1_score, classification_report, ConfusionMatrixDisplay, 
-                                 roc_auc_score)
-    import pandas as pd
-    import matplotlib.pyplot as plt
-    
-    # make predictions
-    train_pred = model.predict(X_train)
-    test_pred = model.predict(X_test)
-    
-    # create function to print classification reports (which are strings) side by side
-    def side_by_side(strings, size=54, space=1):
-        """Print classification reports side by side.
-        
-        This function takes a list of strings, each representing a classification report, and prints them side by side in a
-        formatted manner. Each string is truncated to a specified size, and lines are joined with a given space.
-        
-        Args:
-            strings (list): A list of strings containing classification reports.
-            size (int): The maximum width of each line in the output. Defaults to 54.
-            space (int): The number of spaces between columns in the output. Defaults to 1.
-        
-        Returns:
-            str: A string representing the side-by-side formatted classification reports.
-        """
-        strings = list(strings)
-        result = []
-
-        while any(strings):
-            line = []
-
-            for i, s in enumerate(strings):
-                buf = s[:size]
-                
-                try:
-                    n = buf.index("\n")
-                    line.append(buf[:n].ljust(size))
-                    strings[i] = s[n+1:]
-                except ValueError:
-                    line.append(buf.ljust(size))
-                    strings[i] = s[size:]
-
-            result.append((" " * space).join(line))
-        
-        return "\n".join(result)
-    
-    # set up report strings with titles
-    s1 = " "*20 + "Train Evaluation" + "\n" + classification_report(y_train, train_pred)
-    s2 = " "*20 + "Test Evaluation" + "\n" + classification_report(y_test, test_pred)
-    print(side_by_side([s1, s2]))
-    
-    # print confusion matrices side by side
-    fig, (ax1, ax2) = plt.subplots(nrows=1, ncols=2, figsize=(8, 4))
-    ConfusionMatrixDisplay.from_predictions(y_train, train_pred, normalize="true", cmap="Blues", ax=ax1,  display_labels=["Non-Defaulter", "Defaulter"],)
-    ConfusionMatrixDisplay.from_predictions(y_test, test_pred, normalize="true", cmap="Greens", ax=ax2, display_labels=["Non-Defaulter", "Defaulter"])
-    plt.tight_layout()  
-    plt.show()
+    evaluation = evaluate_classification(model, X_train, y_train, X_test, y_test, model_name=model_name,
+                                         pos_label=pos_label, average=average, roc_auc_average=roc_auc_average,
+                                         threshold=threshold, train_proba=train_proba, test_proba=test_proba,
+                                         chunk_size=chunk_size, use_predict=use_predict)
+    if render:
+        render_evaluation(evaluation)
 
     # collect score results in data frame
-    results = pd.DataFrame(index=[model_name])
-    results["train_acc"] = accuracy_score(y_train, train_pred)
-    results["test_acc"] = accuracy_score(y_test, test_pred)
-    results["train_prec"] = precision_score(y_train, train_pred, pos_label=pos_label, average=average)
-    results["test_prec"] = precision_score(y_test, test_pred, pos_label=pos_label, average=average)
-    results["train_recall"] = recall_score(y_train, train_pred, pos_label=pos_label, average=average)
-    results["test_recall"] = recall_score(y_test, test_pred, pos_label=pos_label, average=average)
-    results["train_f1"] = f1_score(y_train, train_pred, pos_label=pos_label, average=average)
-    results["test_f1"] = f1_score(y_test, test_pred, pos_label=pos_label, average=average)
-    results["train_auc"] = roc_auc_score(y_train, model.predict_proba(X_train)[:, 1], multi_class="ovr", average=roc_auc_average)
-    results["test_auc"] = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1], multi_class="ovr", average=roc_auc_average)  
-
+    results = evaluation.to_frame()
     if results_frame is not None:
         results = pd.concat([results_frame, results])
  
-    return results
\ No newline at end of file
+    return results
@@ -1,53 +1,163 @@
-def eval_regression(model, X_train, y_train, name='model'):
+import numpy as np
+
+
+def adj_r2(r2, x):
+    """Calculate the adjusted R-squared value.
+
+    The adjusted R-squared is a modified version of R-squared that adjusts for the number of predictors in the model. It
+    provides a more accurate measure of goodness of fit when comparing models with different numbers of predictors.
+
+    Args:
+        r2 (float): The coefficient of determination (R-squared) value.
+        x (np.ndarray or tuple): An array of predictor variables, or its shape as a tuple of (number of records,
+            number of predictors).
+
+    Returns:
+        float: The adjusted R-squared value.
+    """
+    n, p = x if isinstance(x, tuple) else x.shape[:2]
+    return 1 - (((n - 1) / (n - p  - 1)) * (1 - r2))
+
+
+class RegressionMetricsAccumulator:
+    """Accumulate regression metrics over batches of predictions in a single pass.
+
+    Each ``update`` adds a batch of targets and predictions to a set of running sums, from which ``result`` gives the
+    MAE, MSE, RMSE, MAPE and R2 (and the adjusted R2 given the number of predictors) of all the records seen, without
+    keeping them. The variance of the targets (needed for R2) is accumulated as a mean and a sum of squared deviations
+    combined with Chan et al.'s parallel formula, which unlike a sum of squares does not lose precision when the
+    targets are large relative to their spread. Accumulators for separate parts of the data (from worker processes,
+    for example) can be combined with ``merge``.
+
+    The metrics match sklearn's to within floating-point rounding, including the ``eps`` floor on the denominator of
+    the MAPE and the R2 of constant targets (1.0 for perfect predictions, otherwise 0.0). Targets must be 1-d.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+        self.sum_abs_error = 0.0
+        self.sum_squared_error = 0.0
+        self.sum_abs_percentage_error = 0.0
+
+    def update(self, y_true, y_pred):
+        """Add a batch of targets and predictions.
+
+        Args:
+            y_true (array-like): True targets.
+            y_pred (array-like): Predicted targets.
+
+        Returns:
+            RegressionMetricsAccumulator: This accumulator, so that calls can be chained.
+        """
+        y_true = np.asarray(y_true, dtype=float)
+        y_pred = np.asarray(y_pred, dtype=float)
+        if y_true.ndim > 1 and y_true.shape[1] > 1:
+            raise ValueError("RegressionMetricsAccumulator only supports 1-d targets")
+        y_true = y_true.reshape(-1)
+        y_pred = y_pred.reshape(-1)
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"y_true and y_pred have different lengths: {len(y_true)} and {len(y_pred)}")
+        if len(y_true) == 0:
+            return self
+
+        batch = RegressionMetricsAccumulator()
+        batch.n = len(y_true)
+        batch.y_mean = float(y_true.mean())
+        batch.y_m2 = float(np.square(y_true - batch.y_mean).sum())
+        error = np.abs(y_true - y_pred)
+        batch.sum_abs_error = float(error.sum())
+        batch.sum_squared_error = float(np.square(error).sum())
+        batch.sum_abs_percentage_error = float((error / np.maximum(np.abs(y_true), np.finfo(np.float64).eps)).sum())
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Add the records accumulated by another accumulator.
+
+        Args:
+            other (RegressionMetricsAccumulator): The accumulator to add.
+
+        Returns:
+            RegressionMetricsAccumulator: This accumulator, so that calls can be chained.
+        """
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.y_mean - self.y_mean
+        self.y_m2 += other.y_m2 + delta * delta * self.n * other.n / n
+        self.y_mean += delta * other.n / n
+        self.n = n
+        self.sum_abs_error += other.sum_abs_error
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_abs_percentage_error += other.sum_abs_percentage_error
+        return self
+
+    def result(self, n_features=None):
+        """Calculate the metrics of the records accumulated so far.
+
+        Args:
+            n_features (int?): Number of predictors, for the adjusted R2. Defaults to None, which leaves it out.
+
+        Returns:
+            dict: The MAE, MSE, RMSE, MAPE, R2 and (given n_features) Adjusted R2, by the names used in
+                ``eval_regression``.
+        """
+        if self.n == 0:
+            raise ValueError("No records have been accumulated")
+        mse = self.sum_squared_error / self.n
+        if self.y_m2 != 0:
+            r2 = 1 - self.sum_squared_error / self.y_m2
+        else:
+            r2 = 1.0 if self.sum_squared_error == 0 else 0.0
+        results = {
+            "MAE": self.sum_abs_error / self.n,
+            "MSE": mse,
+            "RMSE": float(np.sqrt(mse)),
+            "MAPE": self.sum_abs_percentage_error / self.n,
+            "R2": r2,
+        }
+        if n_features is not None:
+            results["Adjusted R2"] = adj_r2(r2, (self.n, n_features))
+        return results
+
+
+def eval_regression(model, X_train, y_train, name='model', chunk_size=None):
     """Evaluate and calculate various regression metrics for a given model.
-    
+
     This function takes a trained regression model, training data features (X_train), and training data targets (y_train).
     It calculates several key performance metrics including Mean Absolute Error (MAE), Mean Squared Error (MSE), Root Mean
     Squared Error (RMSE), Mean Absolute Percentage Error (MAPE), R2 Score, and Adjusted R2 Score. The results are returned
     in a pandas DataFrame with the specified model name as the index.
-    
+
+    All the metrics are calculated in one pass with ``RegressionMetricsAccumulator``. With ``chunk_size``, the model
+    predicts that many records at a time and each chunk of predictions is accumulated and discarded, so the
+    predictions for the whole set are never held in memory.
+
     Args:
         model (object): A trained regression model.
         X_train (array-like): Training data features.
         y_train (array-like): Training data targets.
         name (str?): Name of the model for the results DataFrame. Defaults to 'model'.
-    
+        chunk_size (int?): Number of records to predict at a time. Defaults to None, which predicts them all at once.
+
     Returns:
         pandas.DataFrame: A DataFrame containing the calculated metrics.
     """
-    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_absolute_percentage_error, root_mean_squared_error
     import pandas as pd
-    
-    def adj_r2(r2, x):
-        """Calculate the adjusted R-squared value.
-        
-        The adjusted R-squared is a modified version of R-squared that adjusts for the number of predictors in the model. It
-        provides a more accurate measure of goodness of fit when comparing models with different numbers of predictors.
-        
-        Args:
-            r2 (float): The coefficient of determination (R-squared) value.
-            x (np.ndarray): An array of predictor variables.
-        
-        Returns:
-            float: The adjusted R-squared value.
-        """
-        n = x.shape[0]
-        p = x.shape[1]
-        return 1 - (((n - 1) / (n - p  - 1)) * (1 - r2))
-
-    train_pred = model.predict(X_train)
-    MAPE = mean_absolute_percentage_error(y_train, train_pred)
-    r2 = r2_score(y_train, train_pred)
-    RMSE = root_mean_squared_error(y_train, train_pred)
-    MSE = mean_squared_error(y_train, train_pred)
-    MAE = mean_absolute_error(y_train, train_pred)
-    a_r2 = adj_r2(r2, X_train)
+
+    accumulator = RegressionMetricsAccumulator()
+    y_train = np.asarray(y_train)
+    if chunk_size is None:
+        accumulator.update(y_train, model.predict(X_train))
+    else:
+        rows = X_train.iloc if hasattr(X_train, "iloc") else X_train
+        for start in range(0, len(y_train), chunk_size):
+            stop = start + chunk_size
+            accumulator.update(y_train[start:stop], model.predict(rows[start:stop]))
+
     metrics = ["MAE", "MSE", "RMSE", "MAPE", "R2", "Adjusted R2"]
     results = pd.DataFrame(columns=metrics, index=[name])
-    results['MAE'] = [MAE]
-    results['MSE'] = [MSE]
-    results['RMSE'] = RMSE
-    results['MAPE'] = MAPE
-    results['R2'] = r2
-    results['Adjusted R2'] = a_r2
-    return results
\ No newline at end of file
+    for metric, value in accumulator.result(n_features=X_train.shape[1]).items():
+        results[metric] = [value]
+    return results
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from leaderboard import hash_data, load_arrays, save_arrays
+
+# The thread limits set in each worker process by _limit_threads, kept so that they stay in place
+_thread_limits = None
+
+
+@dataclass
+class SearchResult:
+    """The result of ``halving_search``.
+
+    trials has a row for each configuration evaluated at each resource, including those read from the trial log.
+    n_fits counts the model fits run by this search, excluding those whose scores came from the log.
+    """
+    best_params: dict
+    best_score: float
+    best_estimator: object
+    trials: pd.DataFrame
+    n_fits: int
+    elapsed_seconds: float
+
+
+def _make_folds(y, cv, random_state):
+    """Split the records into stratified folds, with each fold's training records in a random order.
+
+    Taking the first n training records then gives a random subsample, and the subsamples of increasing n are nested,
+    so a configuration promoted to a larger resource is trained on a superset of the records it was scored on before.
+
+    Args:
+        y (array): Labels.
+        cv (int): Number of folds.
+        random_state (int?): Seed for the folds and the order of the training records.
+
+    Returns:
+        dict: The training and validation indices of each fold, as train_0, val_0, train_1 and so on.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    rng = np.random.default_rng(random_state)
+    folds = {}
+    splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    for i, (train, val) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[f"train_{i}"] = rng.permutation(train)
+        folds[f"val_{i}"] = val
+    return folds
+
+
+def _limit_threads(n_threads):
+    """Limit the BLAS and OpenMP threads of a worker process, so that n_jobs workers do not oversubscribe the CPUs."""
+    from threadpoolctl import threadpool_limits
+
+    global _thread_limits
+    _thread_limits = threadpool_limits(limits=n_threads)
+
+
+def _trial_key(params, resource, data_key):
+    """Hash a configuration, its resource and the data and search settings, to identify a trial in the log."""
+    text = repr((sorted(params.items()), resource, data_key))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _read_log(log_path):
+    """Read the scores of the trials in a JSONL trial log, by trial key.
+
+    A partly written last line (from an interrupted search) is ignored.
+    """
+    trials = {}
+    if log_path is None or not Path(log_path).exists():
+        return trials
+    with open(log_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            trials[record["key"]] = record
+    return trials
+
+
+def _fit_and_score(estimator, params, resource_name, resource, data, fold, scoring):
+    """Fit a configuration on one fold's training records and score it on the fold's validation records.
+
+    Args:
+        estimator (Estimator): The unfitted estimator, which is cloned.
+        params (dict): The configuration's parameters.
+        resource_name (str): "n_samples", or the name of the parameter that the resource sets.
+        resource (int): The number of training records, or the value of the resource parameter.
+        data (dict): X, y and the fold indices, or the paths from ``save_arrays`` in a worker process.
+        fold (int): The fold.
+        scoring (str?): An sklearn scorer name, or None for the estimator's ``score``.
+
+    Returns:
+        float: The validation score.
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+
+    if isinstance(data["y"], tuple):
+        data = load_arrays(data)
+    X, y = data["X"], data["y"]
+    rows = X.iloc if hasattr(X, "iloc") else X
+    train, val = np.asarray(data[f"train_{fold}"]), np.asarray(data[f"val_{fold}"])
+    if resource_name == "n_samples":
+        train = train[:resource]
+    else:
+        params = {**params, resource_name: resource}
+
+    model = clone(estimator).set_params(**params)
+    model.fit(rows[train], y[train])
+    if scoring is None:
+        return float(model.score(rows[val], y[val]))
+    return float(get_scorer(scoring)(model, rows[val], y[val]))
+
+
+def _schedule(max_resource, min_resource, factor, n_candidates, min_floor):
+    """Get the resources of the rungs of one round of successive halving, ending at max_resource.
+
+    There are enough rungs to narrow n_candidates down to at most factor in the last, unless min_resource (or
+    min_floor, where min_resource is None) allows fewer.
+    """
+    n_rungs = max(1, math.ceil(math.log(n_candidates, factor))) if n_candidates > 1 else 1
+    if min_resource is None:
+        min_resource = max(max_resource / factor ** (n_rungs - 1), min_floor)
+    n_rungs = min(n_rungs, int(math.floor(math.log(max_resource / min_resource, factor) + 1e-9)) + 1)
+    resources = [max_resource / factor ** (n_rungs - 1 - i) for i in range(n_rungs)]
+    return [max(1, int(round(r))) for r in resources]
+
+
+def halving_search(estimator, param_grid, X, y, method="halving", resource="n_samples", max_resource=None,
+                   min_resource=None, factor=3, cv=5, scoring=None, n_candidates=None, log_path=None,
+                   cache_dir=None, n_jobs=None, refit=True, random_state=None):
+    """Search a parameter grid with successive halving or Hyperband, as a faster alternative to ``GridSearchCV``.
+
+    Successive halving scores every configuration with a small resource (a subsample of the training records, or a
+    small value of a parameter such as ``max_iter`` or ``n_estimators``), keeps the best ``1 / factor`` of them,
+    and repeats with ``factor`` times the resource, until the last few are scored with the full resource. Hyperband
+    runs several rounds of successive halving, from many configurations and a small resource to a few and a large
+    one, which hedges against configurations that are slow to show their quality.
+
+    The folds are split once, and where ``n_jobs`` is set, X, y and the fold indices are saved as .npy files under
+    ``cache_dir`` (named by the hash of the data and folds) and memory-mapped by the worker processes. Each trial
+    (the scores of one configuration at one resource) is appended to the JSONL file ``log_path`` as it finishes, and
+    a search given the same log skips the trials already in it, so an interrupted search resumes where it stopped.
+
+    With ``resource="n_samples"``, estimators whose behaviour depends on the number of records should have it fixed:
+    ``HistGradientBoostingClassifier``'s default ``early_stopping="auto"``, for example, only stops early with more
+    than 10,000 records, so subsamples smaller than that train for the full ``max_iter`` and cost more than the full
+    data. Set ``early_stopping`` explicitly in that case.
+
+    Args:
+        estimator (Estimator): An unfitted sklearn estimator.
+        param_grid (dict): Lists of values by parameter name, as for ``GridSearchCV``.
+        X (array-like): Features, already preprocessed.
+        y (array-like): Labels.
+        method (str?): "halving" or "hyperband". Defaults to "halving".
+        resource (str?): "n_samples" to allocate training records, or the name of an integer parameter of the
+            estimator to allocate (which should not be in param_grid). Defaults to "n_samples".
+        max_resource (int?): The full resource. Defaults to None, which is the number of training records in the
+            smallest fold, or the estimator's value of the resource parameter.
+        min_resource (int?): The smallest resource. Defaults to None, which sets it from the number of
+            configurations so that the last rung scores at most factor of them.
+        factor (int?): The proportion of configurations kept and the growth in the resource at each rung.
+            Defaults to 3.
+        cv (int?): Number of stratified folds. Defaults to 5.
+        scoring (str?): An sklearn scorer name, such as "roc_auc". Defaults to None, which uses the estimator's
+            ``score``.
+        n_candidates (int?): For "halving", the number of configurations sampled from the grid. Defaults to None,
+            which uses them all.
+        log_path (str or Path?): JSONL file of trials, read to resume and appended to. Defaults to None.
+        cache_dir (str or Path?): Directory for the memory-mapped data where n_jobs is set. Defaults to None, which
+            uses a "halving_cache" directory next to log_path (or in the working directory).
+        n_jobs (int?): Number of worker processes for the fits. Defaults to None, which fits in this process.
+        refit (bool?): Whether to fit the best configuration on all the records. Defaults to True.
+        random_state (int?): Seed for the folds and the sampling of configurations. Defaults to None.
+
+    Returns:
+        SearchResult: The best configuration and its score at the full resource, the refitted estimator (or None),
+            and the trials.
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import ParameterGrid
+
+    if method not in ("halving", "hyperband"):
+        raise ValueError(f"method must be 'halving' or 'hyperband', not {method!r}")
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(y)
+    grid = list(ParameterGrid(param_grid))
+    folds = _make_folds(y, cv, random_state)
+
+    if resource == "n_samples":
+        max_resource = max_resource or min(len(folds[f"train_{i}"]) for i in range(cv))
+        min_floor = min(max_resource, 20 * len(np.unique(y)))
+    else:
+        max_resource = max_resource or estimator.get_params()[resource]
+        min_floor = 1
+
+    data = {"X": X, "y": y, **folds}
+    data_hash = hash_data(X, y, *folds.values())
+    data_key = (data_hash, repr(estimator), resource, scoring, cv)
+    logged = _read_log(log_path)
+    trials = []
+    n_fits = 0
+
+    if n_jobs is not None and n_jobs != 1:
+        if cache_dir is None:
+            cache_dir = Path(log_path).parent / "halving_cache" if log_path is not None else Path("halving_cache")
+        task_data = save_arrays(data, Path(cache_dir) / data_hash)
+        executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_limit_threads,
+                                       initargs=(max(1, (os.cpu_count() or 1) // n_jobs),))
+    else:
+        task_data, executor = data, None
+
+    def run_rung(candidates, resource_value, bracket, rung):
+        """Score each candidate with the resource, reading trials from the log where possible."""
+        nonlocal n_fits
+        keys = [_trial_key(params, resource_value, data_key) for params in candidates]
+        pending = [(i, fold) for i, key in enumerate(keys) if key not in logged for fold in range(cv)]
+        tasks = [(estimator, candidates[i], resource, resource_value, task_data, fold, scoring)
+                 for i, fold in pending]
+        rung_start = time.perf_counter()
+        if executor is None:
+            fold_scores = [_fit_and_score(*task) for task in tasks]
+        else:
+            fold_scores = list(executor.map(_fit_and_score, *zip(*tasks))) if tasks else []
+        n_fits += len(tasks)
+        seconds = (time.perf_counter() - rung_start) / max(1, len(tasks) // cv)
+
+        scores_by_candidate = {}
+        for (i, fold), score in zip(pending, fold_scores):
+            scores_by_candidate.setdefault(i, []).append(score)
+        means = []
+        for i, (params, key) in enumerate(zip(candidates, keys)):
+            resumed = key in logged
+            if not resumed:
+                record = {"key": key, "params": json.loads(json.dumps(params, default=repr)),
+                          "resource": resource_value, "fold_scores": scores_by_candidate[i],
+                          "mean_score": float(np.mean(scores_by_candidate[i])), "seconds": seconds}
+                logged[key] = record
+                if log_path is not None:
+                    with open(log_path, "a") as f:
+                        f.write(json.dumps(record) + "\n")
+            record = logged[key]
+            trials.append({"params": params, "resource": resource_value, "bracket": bracket, "rung": rung,
+                           "mean_score": record["mean_score"], "std_score": float(np.std(record["fold_scores"])),
+                           "seconds": record["seconds"], "resumed": resumed})
+            means.append(record["mean_score"])
+        return np.array(means)
+
+    def successive_halving(candidates, resources, bracket, n_keep=None):
+        """Run one round of successive halving, keeping n_keep[i] candidates after rung i (or 1 / factor)."""
+        for rung, resource_value in enumerate(resources):
+            scores = run_rung(candidates, resource_value, bracket, rung)
+            if rung < len(resources) - 1:
+                keep = n_keep[rung] if n_keep else max(1, math.ceil(len(candidates) / factor))
+                # stable, so ties keep the grid order
+                best = np.argsort(-scores, kind="stable")[:keep]
+                candidates = [candidates[i] for i in sorted(best)]
+
+    try:
+        if method == "halving":
+            if n_candidates is not None and n_candidates < len(grid):
+                grid = [grid[i] for i in sorted(rng.choice(len(grid), n_candidates, replace=False))]
+            resources = _schedule(max_resource, min_resource, factor, len(grid), min_floor)
+            successive_halving(grid, resources, bracket=0)
+        else:
+            # a bracket can start with no more configurations than the grid has, which bounds the number of brackets
+            floor = min_resource or min_floor
+            s_max = min(int(math.floor(math.log(max_resource / floor, factor) + 1e-9)),
+                        int(math.floor(math.log(len(grid), factor) + 1e-9)))
+            for bracket, s in enumerate(range(s_max, -1, -1)):
+                n = min(len(grid), math.ceil((s_max + 1) / (s + 1) * factor ** s))
+                candidates = [grid[i] for i in sorted(rng.choice(len(grid), n, replace=False))]
+                resources = [max(1, int(round(max_resource * factor ** (i - s)))) for i in range(s + 1)]
+                n_keep = [max(1, int(n * factor ** -(i + 1))) for i in range(s)]
+                successive_halving(candidates, resources, bracket, n_keep)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    trials = pd.DataFrame(trials)
+    final = trials[trials["resource"] == trials["resource"].max()]
+    best = final.loc[final["mean_score"].idxmax()]
+    best_params = dict(best["params"])
+
+    best_estimator = None
+    if refit:
+        refit_params = best_params if resource == "n_samples" else {**best_params, resource: max_resource}
+        best_estimator = clone(estimator).set_params(**refit_params).fit(X, y)
+    return SearchResult(best_params, float(best["mean_score"]), best_estimator, trials, n_fits,
+                        time.perf_counter() - start_time)
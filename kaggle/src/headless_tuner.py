@@ -0,0 +1,659 @@
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from threshold_sweep import CurveCache
+
+
+@dataclass
+class LabelStats:
+    """
+    Precision, recall and F1 score for each class (and their macro averages) and the confusion matrix, given a set
+    of predicted labels.
+    """
+    target_classes: list
+    metrics: pd.DataFrame
+    confusion_matrix: np.ndarray
+
+
+@dataclass
+class StatsTable:
+    """
+    The table of statistics by range of predicted probability, along with the cumulative precision and recall curves
+    derived from it.
+    """
+    target_classes: list
+    table: pd.DataFrame
+    mid_probability: np.ndarray
+    cumulative_precision: np.ndarray
+    cumulative_recall: np.ndarray
+
+
+@dataclass
+class RocCurve:
+    fpr: np.ndarray
+    tpr: np.ndarray
+    thresholds: np.ndarray
+    auc: float
+
+
+@dataclass
+class ProbaStats:
+    """
+    Summary of the quality of a set of predicted probabilities. scores and roc_curves are keyed by the class treated as
+    the positive class: the second class for binary classification and each class in turn (one vs rest) for
+    multi-class classification.
+    """
+    target_classes: list
+    predictions: list
+    label_stats: LabelStats
+    scores: dict = field(default_factory=dict)
+    roc_curves: dict = field(default_factory=dict)
+
+
+@dataclass
+class ByThresholdStats:
+    """
+    The confusion matrix and macro F1 score for each of a range of thresholds. For binary classification, the point on
+    the ROC curve for each threshold is also given. For multi-class classification, predictions holds the index (into
+    target_classes) of the predicted class for each threshold and record.
+    """
+    target_classes: list
+    thresholds: np.ndarray
+    confusion_matrices: np.ndarray
+    f1_macro: np.ndarray
+    roc_curve: RocCurve = None
+    fpr: np.ndarray = None
+    tpr: np.ndarray = None
+    predictions: np.ndarray = None
+
+
+@dataclass
+class SliceTable:
+    target_classes: list
+    table: pd.DataFrame
+    edges: list
+
+
+@dataclass
+class TuneIteration:
+    """
+    The thresholds tried in one iteration of tune_threshold() and the score for each. all_equal is set where every
+    threshold gave the same score, which ends the search.
+    """
+    thresholds: np.ndarray
+    scores: np.ndarray
+    all_equal: bool = False
+
+
+@dataclass
+class TuneResult:
+    """
+    The best threshold found (a list with one threshold per class for multi-class classification) and the history of
+    the search. n_evaluations is the number of thresholds (or sets of thresholds) scored, and elapsed_seconds the wall
+    time of the search, so that searches may be compared. score is set where the search calculates it.
+    """
+    threshold: object
+    iterations: list = field(default_factory=list)
+    score: float = None
+    n_evaluations: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class HeadlessThresholdTuner:
+    """
+    The computations behind ClassificationThresholdTuner, without any display. Each method returns a result object
+    holding tables as DataFrames and curves as arrays, and nothing is printed or plotted, so this may be used in batch
+    jobs. matplotlib, seaborn and IPython are not imported by this module.
+
+    Invalid arguments raise a ValueError.
+    """
+
+    def __init__(self, cache_size=8):
+        """
+        :param cache_size: int
+            The number of sets of predictions for which the sorted scores and the ROC and precision-recall curves are
+            held, so that calling several methods on the same predictions calculates these only once. 0 disables the
+            cache.
+        """
+        self.curve_cache = CurveCache(cache_size)
+
+    @staticmethod
+    def stats_labels(y_true, target_classes, y_pred):
+        """
+        Calculate the basic metrics related to a set of predicted labels.
+
+        :param y_true: array of strings.
+            True labels for each record
+        :param target_classes: array of strings.
+            Set of labels. Specified to ensure the output is presented in a sensible order.
+        :param y_pred: array of strings
+            Predicted labels for each record
+        :return: LabelStats
+        """
+        from sklearn.metrics import precision_score, recall_score, f1_score, confusion_matrix
+
+        # Ensure y_true and y_pred are in the same format
+        y_true = pd.Series(y_true).astype(str)
+        y_pred = pd.Series(y_pred).astype(str)
+        target_classes = [str(x) for x in target_classes]
+
+        # The basic binary metrics: precision, recall, F1
+        prec_arr = precision_score(y_true, y_pred, labels=target_classes, average=None)
+        rec_arr  = recall_score(y_true, y_pred, labels=target_classes, average=None)
+        f1_arr   = f1_score(y_true, y_pred, labels=target_classes, average=None)
+
+        metrics_df = pd.DataFrame(
+            [['Precision'] + prec_arr.tolist(),
+             ['Recall']    + rec_arr.tolist(),
+             ['F1']        + f1_arr.tolist()],
+            columns=['Metric'] + target_classes)
+        metrics_df['Macro'] = [precision_score(y_true, y_pred, average='macro'),
+                               recall_score(y_true, y_pred, average='macro'),
+                               f1_score(y_true, y_pred, average='macro')]
+
+        cm = confusion_matrix(y_true, y_pred, labels=target_classes)
+        return LabelStats(target_classes, metrics_df, cm)
+
+    @staticmethod
+    def stats_table(y_true, target_classes, y_pred_proba, num_ranges=10):
+        """
+        Calculate the breakdown of the precision and recall (as well as other statistics) for each range of the
+        predicted probabilities. See ClassificationThresholdTuner.print_stats_table() for a description of the table.
+        Available only for binary classification.
+
+        :param y_true: array of strings
+            True labels for each record
+        :param target_classes: array of strings
+            Set of labels. Specified to allow displaying the positive class by name.
+        :param y_pred_proba: array of floats
+            Predicted labels for each record
+        :param num_ranges: int
+            The number of rows in the table.
+        :return: StatsTable
+        """
+
+        if len(target_classes) > 2:
+            raise ValueError("This method is currently available only for binary classification")
+
+        y_true = pd.Series(y_true).astype(str)
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = [str(x) for x in target_classes]
+
+        if y_pred_proba.ndim == 2:
+            y_pred_proba = y_pred_proba[:, 1]
+
+        d = pd.DataFrame({"Y": y_true, "Proba": y_pred_proba})
+        total_class_1 = y_true.tolist().count(target_classes[1])
+        d['Rank'] = d['Proba'].rank(pct=True)
+        size_range = 1.0 / num_ranges
+        start_range = 0.0
+        end_range = size_range
+        rows = []
+        for i in range(num_ranges):
+            sub_d = d[(d['Rank'] >= start_range) & (d['Rank'] < end_range)]
+            rows.append([start_range,
+                         end_range,
+                         sub_d['Proba'].min(),
+                         sub_d['Proba'].max(),
+                         sub_d['Y'].tolist().count(target_classes[0]),
+                         sub_d['Y'].tolist().count(target_classes[1]),
+                         len(sub_d),
+                         (sub_d['Y'].tolist().count(target_classes[1]) / len(sub_d)) if len(sub_d) else 0,
+                         sub_d['Y'].tolist().count(target_classes[1]) / total_class_1
+                         ])
+            start_range = end_range
+            end_range = end_range + size_range
+            if (end_range + size_range) > 100.0:
+                end_range = 100.0
+
+        display_df = pd.DataFrame(
+            rows,
+            columns=['Start Range %',
+                     'End Range %',
+                     'Min Probability',
+                     'Max Probability',
+                     f'Count {target_classes[0]}',
+                     f'Count {target_classes[1]}',
+                     'Total Count',
+                     'Precision',
+                     'Recall'
+                     ]
+        )
+        display_df = display_df.iloc[::-1]
+        display_df = display_df.reset_index(drop=True)
+        display_df[f'Cumulative Count {target_classes[1]}'] = display_df[f'Count {target_classes[1]}'].cumsum()
+        display_df['Cumulative Total Count'] = display_df['Total Count'].cumsum()
+        display_df['Cumulative Precision'] = display_df[f'Cumulative Count {target_classes[1]}'] / \
+                                             display_df['Cumulative Total Count']
+        display_df['Cumulative Recall'] = display_df[f'Cumulative Count {target_classes[1]}'] / total_class_1
+
+        curve_df = display_df.dropna()
+        mid_probability = (curve_df['Min Probability'] + curve_df['Max Probability']) / 2.0
+        return StatsTable(target_classes, display_df, mid_probability.to_numpy(),
+                          curve_df['Cumulative Precision'].to_numpy(), curve_df['Cumulative Recall'].to_numpy())
+
+    def stats_proba(self, y_true, target_classes, y_pred_proba, default_class=None, thresholds=None):
+        """
+        Calculate a summary of the quality of the predicted probabilities: the label metrics using the thresholds
+        provided (or the default behaviour if None), and the Brier score, AUROC and ROC curve. For multi-class
+        classification, the Brier score, AUROC and ROC curve are calculated for each class vs all others.
+
+        :param y_true: array of strings
+            True labels for each record
+        :param target_classes: array of strings
+            A list of the unique values. See ClassificationThresholdTuner.print_stats_proba().
+        :param y_pred_proba: array of floats
+            For binary classification, a 1d or 2d array. For multi-class classification, a 2d array.
+        :param default_class: string
+            Used only for multi-class classification, and must be specified along with thresholds.
+        :param thresholds: float or array of floats
+            For binary classification should be a float. For multiclass classification, should be an array of floats,
+            with a value for each class.
+        :return: ProbaStats
+        """
+        from sklearn.metrics import brier_score_loss
+
+        y_true, target_classes, y_pred_proba = self.__validate(y_true, target_classes, y_pred_proba)
+        if len(target_classes) > 2:
+            if (default_class and not thresholds) or (not default_class and thresholds):
+                raise ValueError("Either specify both of default_class and threshold, or neither. Exiting.")
+        if default_class and (default_class not in target_classes):
+            raise ValueError("default_class is not in target_classes. Exiting.")
+
+        predictions = self.get_predictions(target_classes, y_pred_proba, default_class, thresholds)
+        result = ProbaStats(target_classes, predictions, self.stats_labels(y_true, target_classes, predictions))
+
+        if len(target_classes) == 2:
+            if y_pred_proba.ndim == 2:
+                y_pred_proba = y_pred_proba[:, 1]
+            positive_probas = {target_classes[1]: y_pred_proba}
+        else:
+            positive_probas = {target_class: y_pred_proba[:, class_idx]
+                               for class_idx, target_class in enumerate(target_classes)}
+
+        for target_class, class_proba in positive_probas.items():
+            # Ensure y_true is in {0, 1} format
+            y_true_zero_one = (y_true == target_class).astype(int)
+            sweep = self.curve_cache.get(y_true, [f'not {target_class}', target_class], class_proba)
+            if not (sweep.n_pos and sweep.n_neg):
+                raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+            result.scores[target_class] = pd.DataFrame(
+                [['Brier Score', brier_score_loss(y_true_zero_one, class_proba)],
+                 ['AUROC',       sweep.roc_auc()]],
+                columns=['Metric', 'Score']
+            )
+            result.roc_curves[target_class] = RocCurve(*sweep.roc_curve(), sweep.roc_auc())
+        return result
+
+    def by_threshold(self, y_true, target_classes, y_pred_proba, default_class=None, start=0.1, end=0.9,
+                     num_steps=9):
+        """
+        Calculate the effects of each of a range of threshold values. For multi-class classification, this uses the
+        same threshold for all classes other than the default class.
+
+        :param y_true: array.
+            True labels for each record
+        :param target_classes: array.
+            Set of labels. Specified to ensure the output is presented in a sensible order.
+        :param y_pred_proba: array.
+            Predicted labels for each record
+        :param default_class: string
+            Used only for multi-class classification. Must be an element of target_classes if specified.
+        :param start: float
+            The first threshold considered
+        :param end: float
+            The last threshold considered
+        :param num_steps: int
+            The number of thresholds
+        :return: ByThresholdStats
+        """
+        from sklearn.metrics import f1_score, confusion_matrix
+
+        y_true, target_classes, y_pred_proba = self.__validate(y_true, target_classes, y_pred_proba)
+
+        step = (end - start) / (num_steps - 1)
+        thresholds = list(np.arange(start, end, step)) + [end]
+        thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
+        thresholds = np.array(sorted(list(set(thresholds))))
+
+        if len(target_classes) == 2:
+            # Ensure the predictions are in a 1d array, though a 2d array may be passed
+            if y_pred_proba.ndim == 2:
+                y_pred_proba = y_pred_proba[:, 1]
+            sweep = self.curve_cache.get(y_true, target_classes, y_pred_proba)
+            roc_fpr, roc_tpr = sweep.roc_point(thresholds)
+            return ByThresholdStats(
+                target_classes,
+                thresholds,
+                np.stack([sweep.confusion_matrix(threshold) for threshold in thresholds]),
+                sweep.f1_macro(thresholds),
+                roc_curve=RocCurve(*sweep.roc_curve(), sweep.roc_auc()),
+                fpr=roc_fpr,
+                tpr=roc_tpr)
+
+        class_idx_map = {target_class: class_idx for class_idx, target_class in enumerate(target_classes)}
+        cms, f1s, predictions = [], [], []
+        for threshold in thresholds:
+            pred = self.get_predictions(target_classes, y_pred_proba, default_class, [threshold]*len(target_classes))
+            cms.append(confusion_matrix(y_true, pred, labels=target_classes))
+            f1s.append(f1_score(y_true, pred, average='macro'))
+            predictions.append([class_idx_map[x] for x in pred])
+        return ByThresholdStats(target_classes, thresholds, np.stack(cms), np.array(f1s),
+                                predictions=np.array(predictions, dtype=np.min_scalar_type(len(target_classes))))
+
+    def slices(self, y_true, target_classes, y_pred_proba, start=0.1, end=0.9, num_slices=10):
+        """
+        Calculate the count & fraction of each class within each slice of the predicted probabilities. Available only
+        for binary classification.
+
+        :param y_true: array.
+            True labels for each record
+        :param target_classes: array.
+            Set of labels. Specified to ensure the output is presented in a sensible order.
+        :param y_pred_proba: array.
+            Predicted probability(ies) for each record
+        :param start: float
+        :param end: float
+        :param num_slices: int
+        :return: SliceTable
+        """
+
+        def get_counts(sub_d, true_labels):
+            row = []
+            for label in true_labels:
+                row.append(sub_d['Y'].tolist().count(label))
+            return row
+
+        y_true = pd.Series(y_true).astype(str)
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = [str(x) for x in target_classes]
+
+        if len(target_classes) == 1:
+            raise ValueError("The target_classes must have at least two unique values")
+        if len(target_classes) > 2:
+            raise ValueError("describe_slices() is currently supported only for binary classification")
+
+        if y_pred_proba.ndim == 2:
+            y_pred_proba = y_pred_proba[:, 1]
+
+        d = pd.DataFrame({"Y": y_true,
+                          "Pred_Proba": y_pred_proba})
+        true_labels = d['Y'].unique()
+
+        step = (end - start) / num_slices
+        thresholds = [0] + list(np.arange(start, end, step)) + [end, 1.0]
+        thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
+        thresholds = sorted(list(set(thresholds)))
+
+        display_rows = []
+        for slice_idx in range(len(thresholds)-1):
+            lower_range = thresholds[slice_idx]
+            upper_range = thresholds[slice_idx + 1]
+            sub_d = d[(d['Pred_Proba'] > lower_range) & (d['Pred_Proba'] <= upper_range)]
+            row = get_counts(sub_d, true_labels)
+            display_rows.append([slice_idx + 1, lower_range, upper_range] + row)
+        display_df = pd.DataFrame(display_rows, columns=['Slice', 'Min Prob', 'Max Prob'] + true_labels.tolist())
+
+        # Add columns to represent the labels as fractions of each slice
+        display_df['Total'] = display_df[true_labels].sum(axis=1)
+        for label in true_labels:
+            display_df[f"Fraction {label}"] = display_df[label] / display_df['Total']
+
+        return SliceTable(target_classes, display_df, thresholds)
+
+    def search_threshold(self, y_true, target_classes, y_pred_proba, metric, higher_is_better=True, default_class=None,
+                         max_iterations=5, progress=None, **kwargs):
+        """
+        Find the ideal threshold(s) to optimize the specified metric. See ClassificationThresholdTuner.tune_threshold()
+        for a description of the search.
+
+        :param y_true: array of str
+            Ground truth labels for each record
+        :param target_classes: array of str
+            List of unique values in the target column.
+        :param y_pred_proba: array of floats representing probabilities
+            For multiclass classification, this is a 2d array. For binary classification, this may be 1d or 2d.
+        :param metric: function
+            Must be a function that expects y_true and y_pred (as labels).
+        :param higher_is_better: bool
+        :param default_class: str
+            Must be set for multiclass classification. Not used for binary classification.
+        :param max_iterations: int
+        :param progress: function
+            Optional wrapper for the iterable of iterations, such as tqdm, to report progress.
+        :param kwargs: Any arguments related to the metric.
+        :return: TuneResult. For binary classification, the threshold is a single float. For multi-class
+            classification, it is a list with a threshold for each class, with 0.0 set for the default class.
+        """
+        def evaluate(pred):
+            nonlocal n_evaluations
+            n_evaluations += 1
+            return metric(y_true, pred, **kwargs)
+
+        def finish(result):
+            result.n_evaluations = n_evaluations
+            result.elapsed_seconds = time.perf_counter() - start_time
+            return result
+
+        def sort_thresholds(test_vals, scores_arr):
+            if higher_is_better:
+                return pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index[::-1].tolist()].values.tolist()
+            return pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index.tolist()].values.tolist()
+
+        def get_test_vals(min_range, max_range, extra_vals=()):
+            test_vals = [min_range]
+            step = (max_range - min_range) / 10.0
+            for i in np.arange(min_range, max_range, step):
+                test_vals.append(i)
+            test_vals.append(max_range)
+            test_vals.extend(extra_vals)
+            return list(set(test_vals))
+
+        def find_best_thresholds(min_range, max_range):
+            """
+            Called in binary classification case. Finds the best threshold between min_range and max_range
+            (inclusive).
+            :return:
+                1. bool indicating if all thresholds within the specified range lead to the same score.
+                2. [] if the bool is set True. Otherwise an array of threshold values sorted from the best to the worst.
+                Generally the first two of these may be used as the range for the next iteration, and the first of
+                these as the best threshold discovered so far.
+            """
+            test_vals = get_test_vals(min_range, max_range)
+            scores_arr = []
+            for threshold in test_vals:
+                pred = np.where(y_pred_proba >= threshold, target_classes[1], target_classes[0])
+                score = evaluate(pred)
+                scores_arr.append(score)
+            all_equal = len(set(scores_arr)) == 1
+            result.iterations.append(TuneIteration(np.array(test_vals), np.array(scores_arr), all_equal))
+            if all_equal:
+                return True, []
+            return False, sort_thresholds(test_vals, scores_arr)
+
+        def find_best_threshold_multi(class_idx, min_range, max_range, thresholds):
+            """
+            Similar to find_best_thresholds(), but handles the multi-class case. Each execution of this tunes the
+            threshold for only one of the classes, holding the other thresholds constant.
+            """
+            # We include the current value for the threshold in the set tried this iteration to ensure we cannot
+            # move to another value that is worse that this.
+            test_vals = get_test_vals(min_range, max_range, [thresholds[class_idx]])
+            scores_arr = []
+            thresholds = thresholds.copy()
+            for threshold in test_vals:
+                thresholds[class_idx] = threshold
+                pred = self.get_predictions(target_classes, y_pred_proba, default_class, thresholds)
+                score = evaluate(pred)
+                scores_arr.append(score)
+            if len(set(scores_arr)) == 1:
+                return True, []
+            return False, sort_thresholds(test_vals, scores_arr)
+
+        start_time = time.perf_counter()
+        n_evaluations = 0
+        y_true = pd.Series(y_true).astype(str)
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = [str(x) for x in target_classes]
+
+        if len(target_classes) == 1:
+            raise ValueError("target_classes must have at least two values")
+
+        iterations = range(max_iterations)
+        if progress is not None:
+            iterations = progress(iterations)
+
+        if len(target_classes) == 2:
+            # Ensure the predictions are in a 1d array, though a 2d array may be passed
+            if y_pred_proba.ndim == 2:
+                y_pred_proba = y_pred_proba[:, 1]
+
+            result = TuneResult(None)
+            min_range = 0.0
+            max_range = 1.0
+            sorted_array = [min_range]
+            for _ in iterations:
+                are_equal, sorted_array = find_best_thresholds(min_range, max_range)
+                if are_equal:  # are_equal is True if all thresholds result in the same scores
+                    result.threshold = min_range + ((max_range - min_range) / 2)
+                    return finish(result)
+                min_range = min(sorted_array[:2])
+                max_range = max(sorted_array[:2])
+                if min_range == max_range:
+                    result.threshold = min_range
+                    return finish(result)
+
+            result.threshold = sorted_array[0]
+            return finish(result)
+
+        if default_class is None:
+            raise ValueError("Default class must be specified to tune thresholds with multi-class classification")
+        default_class_idx = target_classes.index(default_class)
+        thresholds = [0.5]*(len(target_classes))
+        thresholds[default_class_idx] = 0.0  # The threshold for the default class is always 0.0
+        prev_thresholds = thresholds.copy()
+        for _ in iterations:  # Loop max_iterations times, each time adjusting each threshold.
+            for class_idx, class_label in enumerate(target_classes):
+                if class_label == default_class:
+                    continue
+                min_range = 0.0
+                max_range = 1.0
+                # Loop again for max_iterations times, to set the current threshold given the other thresholds.
+                for iter_idx in range(max_iterations):
+                    are_equal, sorted_array = find_best_threshold_multi(class_idx, min_range, max_range, thresholds)
+                    if are_equal:
+                        break
+                    min_range = min(sorted_array[:2])
+                    max_range = max(sorted_array[:2])
+                    if min_range == max_range:
+                        break
+                    thresholds[class_idx] = sorted_array[0]
+            if thresholds == prev_thresholds:
+                break
+            prev_thresholds = thresholds.copy()
+        return finish(TuneResult(thresholds))
+
+    @staticmethod
+    def search_multiclass_thresholds(y_true, target_classes, y_pred_proba, default_class, metric='f1_macro',
+                                     higher_is_better=True, candidates=None, max_iterations=5, n_restarts=1, tol=0.0,
+                                     n_jobs=None, random_state=None):
+        """
+        Find the ideal thresholds for multi-class classification with metrics calculated from confusion matrices,
+        evaluating every candidate threshold for a class at once. This is much faster than search_threshold() with
+        large numbers of records. See multiclass_tuner.tune_multiclass_thresholds() for a description of the
+        parameters.
+
+        :return: TuneResult, with a threshold for each class (0.0 for the default class)
+        """
+        from multiclass_tuner import tune_multiclass_thresholds
+        return tune_multiclass_thresholds(y_true, target_classes, y_pred_proba, default_class, metric=metric,
+                                          higher_is_better=higher_is_better, candidates=candidates,
+                                          max_iterations=max_iterations, n_restarts=n_restarts, tol=tol,
+                                          n_jobs=n_jobs, random_state=random_state)
+
+    @staticmethod
+    def bootstrap_threshold(y_true, target_classes, y_pred_proba, metric='f1_macro', higher_is_better=True,
+                            n_resamples=1000, method='poisson', thresholds=None, n_jobs=None, random_state=None):
+        """
+        Estimate how stable the optimal threshold, and the metric at it, are by bootstrapping the records. Available
+        for binary classification, with metrics calculated from confusion counts. See
+        threshold_bootstrap.bootstrap_threshold() for a description of the parameters.
+
+        :return: BootstrapResult, with confidence_interval() to summarize the distributions
+        """
+        from threshold_bootstrap import bootstrap_threshold
+        return bootstrap_threshold(y_true, target_classes, y_pred_proba, metric=metric,
+                                   higher_is_better=higher_is_better, n_resamples=n_resamples, method=method,
+                                   thresholds=thresholds, n_jobs=n_jobs, random_state=random_state)
+
+    @staticmethod
+    def get_predictions(target_classes, y_pred_proba, default_class, thresholds):
+        """
+        Get the class predictions given a set of probabilities.
+
+        :param target_classes: array of str
+            Names of the target classes in the order of the probabilities in y_pred_proba
+        :param y_pred_proba: array of float
+            Predicted probabilities. For binary classification, may be a 1d or 2d array. For multiclass classification,
+            must be a 2d array.
+        :param default_class: str
+            One element of target_classes
+        :param thresholds: float or array of float
+            For binary classification, should be a float. For multiclass classification, must be an array of floats.
+        :return: array of class labels
+        """
+        def clean_probas(x, threshold):
+            if x > threshold:
+                return x
+            return -np.inf
+
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = [str(x) for x in target_classes]
+
+        if (len(target_classes) == 2) and (y_pred_proba.ndim == 2):
+            y_pred_proba = y_pred_proba[:, 1]
+
+        d = pd.DataFrame(y_pred_proba.tolist())
+        if len(target_classes) == 2:
+            if y_pred_proba.ndim == 2:
+                y_pred_proba = y_pred_proba[:, 1]
+            threshold = thresholds  # With binary classification, we use a single threshold
+            if threshold is None:
+                threshold = 0.5
+            d['Pred'] = np.where(y_pred_proba > threshold, target_classes[1], target_classes[0])
+        else:
+            proba_cols = d.columns
+            if default_class is not None:
+                for class_idx, class_name in enumerate(target_classes):
+                    if class_name == default_class:
+                        continue
+                    d[proba_cols[class_idx]] = d[proba_cols[class_idx]].apply(clean_probas, threshold=thresholds[class_idx])
+
+            d['Max Proba'] = d.max(axis=1)
+            d['Pred'] = d[proba_cols].idxmax(axis=1)
+            d['Pred'] = pd.Series([target_classes[x] for x in d['Pred']])
+
+        return d['Pred'].tolist()
+
+    @staticmethod
+    def __validate(y_true, target_classes, y_pred_proba):
+        """
+        Convert the inputs to the standard formats and check the shape of y_pred_proba matches target_classes.
+        """
+        y_true = pd.Series(y_true).astype(str)
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = [str(x) for x in target_classes]
+
+        if len(target_classes) == 1:
+            raise ValueError("target_classes must have at least two distinct values")
+        elif len(target_classes) == 2:
+            if (not ((y_pred_proba.ndim == 1) or (len(y_pred_proba[0]) == 1))) and (not (len(y_pred_proba[0]) == 2)):
+                raise ValueError("Where there are two target classes, each element of y_pred_proba must have either 1 "
+                                 "or 2 values")
+        elif len(y_pred_proba[0]) != len(target_classes):
+            raise ValueError("The shape of y_pred_proba does not match the number of target classes")
+        return y_true, target_classes, y_pred_proba
+
@@ -0,0 +1,303 @@
+import hashlib
+import importlib.util
+import json
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from eval_classification import evaluate_classification
+
+SPLITS = ("X_train", "y_train", "X_test", "y_test")
+
+
+def _part_format():
+    """Get the file format of the log parts: Parquet where an engine for it is installed, otherwise CSV."""
+    if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+        return "parquet"
+    return "csv"
+
+
+def hash_data(*arrays):
+    """Hash a set of arrays (or DataFrames and Series) by their values, shapes and column names.
+
+    Args:
+        *arrays (array-like): The arrays to hash, such as the training and test features and labels.
+
+    Returns:
+        str: A hex digest that changes whenever any of the values change.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        columns = list(array.columns) if isinstance(array, pd.DataFrame) else None
+        values = np.asarray(array)
+        digest.update(repr((values.shape, str(values.dtype), columns)).encode())
+        digest.update(pd.util.hash_array(values.ravel()).tobytes())
+    return digest.hexdigest()
+
+
+def _model_params(model):
+    """Get the parameters of a model, for the log and the cache key.
+
+    Args:
+        model (Classifier): A fitted model, normally with sklearn's ``get_params``.
+
+    Returns:
+        dict: The parameters by name, or an empty dict for a model without ``get_params``.
+    """
+    return model.get_params() if hasattr(model, "get_params") else {}
+
+
+def _model_key(model, eval_kwargs):
+    """Hash a model's class and parameters, along with the evaluation settings.
+
+    Args:
+        model (Classifier): A fitted model.
+        eval_kwargs (dict): The keyword arguments passed to ``evaluate_classification``.
+
+    Returns:
+        str: A hex digest identifying the model configuration.
+    """
+    params = sorted(_model_params(model).items())
+    text = repr((type(model).__module__, type(model).__qualname__, params, sorted(eval_kwargs.items())))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _plain_values(name, values):
+    """Get an array that ``np.save`` writes without pickle and ``np.load`` memory-maps to the same values.
+
+    Object arrays of strings become fixed-width string arrays, which read back as the same strings. Anything else that
+    would not survive the round trip raises a ValueError rather than being converted.
+    """
+    if values.dtype == object:
+        if not all(isinstance(value, str) for value in values.ravel()):
+            raise ValueError(f"{name} holds Python objects other than strings, which cannot be memory-mapped; "
+                             "encode them as numbers first")
+        return values.astype(str)
+    return values
+
+
+def _check_dtypes(name, array):
+    """Check that the columns of a DataFrame (or a Series) have NumPy dtypes, which survive the round trip."""
+    dtypes = array.dtypes.items() if isinstance(array, pd.DataFrame) else [(None, array.dtype)]
+    for column, dtype in dtypes:
+        if not isinstance(dtype, np.dtype):
+            where = name if column is None else f"Column {column!r} of {name}"
+            raise ValueError(f"{where} has dtype {dtype}, which cannot be memory-mapped; convert it to a NumPy "
+                             "dtype first")
+
+
+def _save(path, write):
+    """Write a file or directory under a temporary name and then rename it, so that it is never read part written."""
+    partial = path.with_name(f"{path.stem}.{uuid.uuid4().hex}{path.suffix}")
+    write(partial)
+    try:
+        partial.replace(path)
+    except OSError:
+        # a directory cannot replace another, so one saved by another process first is kept
+        if not path.is_dir():
+            raise
+        shutil.rmtree(partial)
+
+
+def save_arrays(data, directory):
+    """Save a set of arrays as .npy files, so that worker processes can memory-map them.
+
+    A DataFrame whose columns share a dtype is saved as a single 2-d array. Otherwise each column is saved in its own
+    file with its own dtype, so the workers see the same values as the process evaluating the models itself. Values
+    that cannot be memory-mapped unchanged (Python objects other than strings, and pandas extension dtypes such as
+    categoricals) raise a ValueError.
+
+    Args:
+        data (dict): The arrays (or DataFrames and Series) by name, such as the training and test features and labels
+            by the names in ``SPLITS``.
+        directory (Path): Where to save them. Files that already exist are reused, so the directory should be named
+            by the hash of the data.
+
+    Returns:
+        dict: For each array, the path of the .npy file (or of the directory of column files) and the column names
+            (None unless it is a DataFrame).
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    saved = {}
+    for name, array in data.items():
+        if isinstance(array, (pd.DataFrame, pd.Series)):
+            _check_dtypes(name, array)
+        if isinstance(array, pd.DataFrame) and array.dtypes.nunique() > 1:
+            path = directory / name
+            columns = [_plain_values(f"Column {column!r} of {name}", np.asarray(array[column]))
+                       for column in array.columns]
+            if not path.exists():
+                def write(partial, columns=columns):
+                    partial.mkdir()
+                    for i, values in enumerate(columns):
+                        np.save(partial / f"{i}.npy", values)
+                _save(path, write)
+        else:
+            path = directory / f"{name}.npy"
+            values = _plain_values(name, np.asarray(array))
+            if not path.exists():
+                _save(path, lambda partial, values=values: np.save(partial, values))
+        saved[name] = (path, list(array.columns) if isinstance(array, pd.DataFrame) else None)
+    return saved
+
+
+def load_arrays(saved):
+    """Memory-map the arrays saved by ``save_arrays``, restoring DataFrames. A DataFrame saved as a single array is
+    restored without copying its values; one saved column by column is assembled from its memory-mapped columns.
+
+    Args:
+        saved (dict): The paths and column names from ``save_arrays``.
+
+    Returns:
+        dict: The arrays (or DataFrames) by name.
+    """
+    data = {}
+    for name, (path, columns) in saved.items():
+        if path.is_dir():
+            frame = pd.DataFrame({i: np.load(path / f"{i}.npy", mmap_mode="r") for i in range(len(columns))})
+            frame.columns = columns
+            data[name] = frame
+            continue
+        values = np.load(path, mmap_mode="r")
+        data[name] = values if columns is None else pd.DataFrame(values, columns=columns, copy=False)
+    return data
+
+
+def _evaluate_model(name, model, data, eval_kwargs):
+    """Evaluate one model without rendering anything, timing the evaluation.
+
+    Args:
+        name (str): Name of the model.
+        model (Classifier): A fitted model.
+        data (dict): The training and test features and labels, or the paths from ``save_arrays`` in a worker
+            process.
+        eval_kwargs (dict): Keyword arguments for ``evaluate_classification``.
+
+    Returns:
+        dict: The scores from ``ClassificationEvaluation.to_frame`` and the evaluation time in seconds.
+    """
+    if isinstance(next(iter(data.values())), tuple):
+        data = load_arrays(data)
+    start = time.perf_counter()
+    evaluation = evaluate_classification(model, data["X_train"], data["y_train"], data["X_test"], data["y_test"],
+                                         model_name=name, **eval_kwargs)
+    row = evaluation.to_frame().iloc[0].to_dict()
+    row["eval_seconds"] = time.perf_counter() - start
+    return row
+
+
+class Leaderboard:
+    """Evaluate sets of fitted models, keeping every result in an on-disk log.
+
+    This replaces chaining ``eval_classification(..., results_frame=previous_results)`` for each model, which copies
+    the growing results for every model and evaluates them one at a time. ``evaluate`` runs the models in a process
+    pool, with the training and test data saved once as .npy files and memory-mapped by the workers rather than
+    copied to each of them. Each result is appended to the log as its own part file, along with the model's class,
+    parameters and evaluation time, so that results survive an interrupted run. A model whose class, parameters and
+    evaluation settings are in the log for the same data is not evaluated again.
+
+    The log parts are Parquet files where pyarrow or fastparquet is installed, and CSV files otherwise.
+
+    Args:
+        log_dir (str or Path): Directory for the log parts and the memory-mapped data.
+    """
+
+    def __init__(self, log_dir):
+        self.log_dir = Path(log_dir)
+        self.format = _part_format()
+
+    def results(self):
+        """Read the whole log.
+
+        Returns:
+            DataFrame: A row for each evaluation, in the order they finished, indexed by model name.
+        """
+        parts = sorted(self.log_dir.glob("part-*.parquet")) + sorted(self.log_dir.glob("part-*.csv"))
+        if not parts:
+            return pd.DataFrame()
+        frames = [pd.read_parquet(part) if part.suffix == ".parquet" else pd.read_csv(part) for part in parts]
+        log = pd.concat(frames, ignore_index=True).sort_values("timestamp", kind="stable")
+        return log.set_index("model")
+
+    def compact(self):
+        """Merge the log parts into a single part, to avoid reading many small files."""
+        parts = list(self.log_dir.glob("part-*.parquet")) + list(self.log_dir.glob("part-*.csv"))
+        if len(parts) > 1:
+            self.__write_part(self.results().reset_index())
+            for part in parts:
+                part.unlink()
+
+    def evaluate(self, models, X_train, y_train, X_test, y_test, n_jobs=None, force=False, **eval_kwargs):
+        """Evaluate a set of fitted models on the same data, using logged results where possible.
+
+        Args:
+            models (dict): Fitted models by name.
+            X_train (array-like): Training features.
+            y_train (array-like): Training labels.
+            X_test (array-like): Test features.
+            y_test (array-like): Test labels.
+            n_jobs (int?): Number of worker processes. Defaults to None, which evaluates the models in this process;
+                with n_jobs, the models must be picklable.
+            force (bool?): Whether to evaluate every model, even those already in the log. Defaults to False.
+            **eval_kwargs: Keyword arguments for ``evaluate_classification``, such as ``threshold`` or ``average``.
+
+        Returns:
+            DataFrame: The columns returned by ``eval_classification`` plus the evaluation time and whether the result
+                came from the log, with a row for each model in the order given.
+        """
+        data = dict(zip(SPLITS, (X_train, y_train, X_test, y_test)))
+        data_hash = hash_data(*data.values())
+        keys = {name: _model_key(model, eval_kwargs) for name, model in models.items()}
+
+        log = self.results()
+        rows = {}
+        if not force and len(log):
+            logged = log[log["data_hash"] == data_hash].reset_index().drop_duplicates("model_key", keep="last")
+            logged = logged.set_index("model_key")
+            for name, key in keys.items():
+                if key in logged.index:
+                    rows[name] = dict(logged.loc[key].drop(["model", "data_hash", "params", "model_class",
+                                                             "timestamp"]), model_key=key, cached=True)
+
+        pending = {name: model for name, model in models.items() if name not in rows}
+        if n_jobs is None or n_jobs == 1:
+            for name, model in pending.items():
+                rows[name] = self.__log(name, model, keys[name], data_hash,
+                                        _evaluate_model(name, model, data, eval_kwargs))
+        elif pending:
+            saved = save_arrays(data, self.log_dir / "data" / data_hash)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = {executor.submit(_evaluate_model, name, model, saved, eval_kwargs): name
+                           for name, model in pending.items()}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    rows[name] = self.__log(name, pending[name], keys[name], data_hash, future.result())
+
+        for name in pending:
+            rows[name]["cached"] = False
+        return pd.DataFrame.from_records([rows[name] for name in models], index=list(models))
+
+    def __log(self, name, model, key, data_hash, row):
+        """Append the result of one evaluation to the log, returning the result."""
+        params = json.dumps(_model_params(model), default=repr, sort_keys=True)
+        self.__write_part(pd.DataFrame([{
+            "model": name, "model_class": type(model).__qualname__, "model_key": key, "data_hash": data_hash,
+            "params": params, "timestamp": datetime.now(timezone.utc).isoformat(), **row,
+        }]))
+        return dict(row, model_key=key)
+
+    def __write_part(self, frame):
+        """Write a log part with a unique name, so that parts are never overwritten."""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = self.log_dir / f"part-{stamp}-{uuid.uuid4().hex[:8]}.{self.format}"
+        if self.format == "parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
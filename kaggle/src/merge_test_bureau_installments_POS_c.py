@@ -74,8 +74,9 @@ application_test = pd.merge(application_test, balances_and_payments, how="left",
 # pop off index ids
 ids = application_test.pop("SK_ID_CURR")
 
-# transform data
-application_test = preprocessor.transform(application_test)
+# transform data in chunks, so memory does not grow with the number of applications
+from batched_predict import BatchedPredictor
+application_test = BatchedPredictor(preprocessor=preprocessor, chunk_size=20_000).transform(application_test)
 
 # drop columns with collinear relationships (Pearson's correlation coefficients > 0.8)
 application_test.drop(columns=non_co_cols, inplace=True)
\ No newline at end of file
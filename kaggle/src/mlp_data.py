@@ -0,0 +1,189 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+
+def _apply(transformer, X):
+    """Apply a fitted transformer (anything with ``transform``) or a function to a chunk of features."""
+    return transformer.transform(X) if hasattr(transformer, "transform") else transformer(X)
+
+
+def write_features(path, X, transformers=(), chunk_size=50_000):
+    """Transform features chunk by chunk into a float32 .npy file, to be memory-mapped for training.
+
+    This replaces holding several full float64 copies of the features in memory (the preprocessor output, the
+    frame with the collinear columns dropped and the scaled array): only one chunk is transformed at a time, and
+    the result goes straight to disk at half the size.
+
+    Args:
+        path (str or Path): The .npy file to write.
+        X (array-like): Features before any transformation, such as the merged application data.
+        transformers (sequence?): Fitted transformers or functions applied to each chunk in turn, for example
+            ``(preprocessor, lambda df: df.drop(columns=non_co_cols), scaler)``. Defaults to none.
+        chunk_size (int?): Number of records per chunk. Defaults to 50000.
+
+    Returns:
+        np.memmap: The features, memory-mapped read-only from the file.
+    """
+    path = Path(path)
+    rows = X.iloc if hasattr(X, "iloc") else X
+    n = X.shape[0]
+    if n == 0:
+        # the number of output features is only known from a transformed chunk
+        raise ValueError("X has no records to write")
+    out = None
+    for start in range(0, n, chunk_size):
+        chunk = rows[start:start + chunk_size]
+        for transformer in transformers:
+            chunk = _apply(transformer, chunk)
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if out is None:
+            out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, chunk.shape[1]))
+        out[start:start + len(chunk)] = chunk
+    out.flush()
+    del out
+    return np.load(path, mmap_mode="r")
+
+
+def balanced_class_weight(y):
+    """Calculate class weights inversely proportional to the class frequencies, as sklearn's
+    ``compute_class_weight("balanced", ...)`` does.
+
+    Args:
+        y (array-like): Labels.
+
+    Returns:
+        dict: The weight of each class.
+    """
+    classes, counts = np.unique(np.asarray(y), return_counts=True)
+    weights = len(y) / (len(classes) * counts)
+    return {cls.item(): float(weight) for cls, weight in zip(classes, weights)}
+
+
+class BatchGenerator:
+    """Stream training batches from a memory-mapped feature file.
+
+    Each epoch, the records are split into contiguous blocks of ``block_size``; the order of the blocks is shuffled,
+    and so is the order of the records within each block. Batches are then taken in turn, so each batch is read from
+    one or two blocks of the file rather than from random places across it, which keeps the reads sequential enough
+    for the page cache when the file is larger than memory. A worker thread pool assembles up to ``prefetch`` batches
+    ahead of the one being trained on, so reading overlaps with training.
+
+    Batches are (features, labels, sample weights) tuples of float32 arrays, with the sample weights taken from
+    ``class_weight``, which weights the loss as passing ``class_weight`` to Keras' ``fit`` does.
+
+    Args:
+        X (array-like or str or Path): Features, normally from ``write_features``, or the path of a .npy file to
+            memory-map.
+        y (array-like): Labels.
+        batch_size (int?): Number of records per batch. Defaults to 2048.
+        block_size (int?): Number of records per shuffled block. Defaults to None, which is 16 batches.
+        shuffle (bool?): Whether to shuffle the blocks and records. Defaults to True; use False for validation.
+        class_weight (dict or str?): The weight of each class, or "balanced". Defaults to None, which weights every
+            record 1.
+        prefetch (int?): Number of batches assembled ahead. Defaults to 4.
+        n_workers (int?): Number of threads assembling batches. Defaults to 2.
+        seed (int?): Seed for the shuffling. Each epoch uses a different shuffle. Defaults to None.
+    """
+
+    def __init__(self, X, y, batch_size=2048, block_size=None, shuffle=True, class_weight=None, prefetch=4,
+                 n_workers=2, seed=None):
+        self.X = np.load(X, mmap_mode="r") if isinstance(X, (str, Path)) else X
+        self.y = np.asarray(y, dtype=np.float32).reshape(-1)
+        if len(self.y) != self.X.shape[0]:
+            raise ValueError(f"X has {self.X.shape[0]} records but y has {len(self.y)}")
+        self.batch_size = batch_size
+        self.block_size = block_size or 16 * batch_size
+        self.shuffle = shuffle
+        self.prefetch = max(1, prefetch)
+        self.n_workers = n_workers
+        self.seed = seed
+        self.epoch = 0
+
+        if class_weight == "balanced":
+            class_weight = balanced_class_weight(self.y)
+        if class_weight is None:
+            self.sample_weight = np.ones(len(self.y), dtype=np.float32)
+        else:
+            labels = np.asarray(y).reshape(-1)
+            classes = np.array(sorted(class_weight))
+            weights = np.array([class_weight[label] for label in classes], dtype=np.float32)
+            index = np.clip(np.searchsorted(classes, labels), 0, len(classes) - 1)
+            if not np.array_equal(classes[index], labels):
+                raise ValueError("y has classes without a weight in class_weight")
+            self.sample_weight = weights[index]
+
+    @property
+    def n_features(self):
+        return self.X.shape[1]
+
+    def __len__(self):
+        return -(-len(self.y) // self.batch_size)
+
+    def order(self, epoch):
+        """Get the order of the records in an epoch.
+
+        Args:
+            epoch (int): The epoch, which with the seed determines the shuffle.
+
+        Returns:
+            array: The index of each record, in the order they are batched.
+        """
+        n = len(self.y)
+        if not self.shuffle:
+            return np.arange(n)
+        rng = np.random.default_rng(None if self.seed is None else [self.seed, epoch])
+        starts = np.arange(0, n, self.block_size)
+        blocks = [start + rng.permutation(min(self.block_size, n - start)) for start in rng.permutation(starts)]
+        return np.concatenate(blocks)
+
+    def batch(self, index):
+        """Assemble the batch of a set of records.
+
+        Args:
+            index (array): The indices of the records.
+
+        Returns:
+            tuple: The features, labels and sample weights.
+        """
+        # reading in file order is faster, and the order within a batch makes no difference to training
+        index = np.sort(index)
+        return np.asarray(self.X[index], dtype=np.float32), self.y[index], self.sample_weight[index]
+
+    def __iter__(self):
+        """Yield the batches of the next epoch."""
+        order = self.order(self.epoch)
+        self.epoch += 1
+        bounds = range(0, len(order), self.batch_size)
+        if self.n_workers is None or self.n_workers < 1:
+            for start in bounds:
+                yield self.batch(order[start:start + self.batch_size])
+            return
+
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            pending = deque()
+            for start in bounds:
+                pending.append(executor.submit(self.batch, order[start:start + self.batch_size]))
+                if len(pending) > self.prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def to_dataset(self):
+        """Wrap the generator as a ``tf.data.Dataset`` of (features, labels, sample weights) batches for Keras'
+        ``fit``. Each pass over the dataset (each Keras epoch) starts a new epoch of the generator.
+
+        TensorFlow is imported here, so the rest of the generator can be used without it.
+
+        Returns:
+            tf.data.Dataset: The batches, with a further batch prefetched by TensorFlow.
+        """
+        import tensorflow as tf
+
+        signature = (tf.TensorSpec(shape=(None, self.n_features), dtype=tf.float32),
+                     tf.TensorSpec(shape=(None,), dtype=tf.float32),
+                     tf.TensorSpec(shape=(None,), dtype=tf.float32))
+        return tf.data.Dataset.from_generator(lambda: iter(self), output_signature=signature).prefetch(
+            tf.data.AUTOTUNE)
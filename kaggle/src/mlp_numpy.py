@@ -0,0 +1,389 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+
+def _relu(z):
+    return np.maximum(z, 0, out=z)
+
+
+def _sigmoid(z):
+    # the tanh form cannot overflow, unlike 1 / (1 + exp(-z))
+    z *= 0.5
+    np.tanh(z, out=z)
+    z += 1
+    z *= 0.5
+    return z
+
+
+def _tanh(z):
+    return np.tanh(z, out=z)
+
+
+def _softmax(z):
+    z -= z.max(axis=1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=1, keepdims=True)
+    return z
+
+
+def _linear(z):
+    return z
+
+
+ACTIVATIONS = {"relu": _relu, "sigmoid": _sigmoid, "tanh": _tanh, "softmax": _softmax, "linear": _linear}
+
+# layers that do nothing at inference
+SKIPPED_LAYERS = ("InputLayer", "Dropout", "GaussianNoise", "GaussianDropout", "AlphaDropout")
+
+
+def export_weights(model, path):
+    """Write the Dense layers of a Keras ``Sequential`` model to a flat .npz file for ``NumpyMLP``.
+
+    Dropout and the input layer, which do nothing at inference, are left out; any other kind of layer raises an
+    error rather than being silently dropped.
+
+    Args:
+        model (keras.Sequential): A trained model of Dense layers, such as ``model_bce``.
+        path (str or Path): The .npz file to write.
+
+    Returns:
+        NumpyMLP: The exported network.
+    """
+    network = NumpyMLP.from_keras(model)
+    network.save(path)
+    return network
+
+
+class NumpyMLP:
+    """Score a dense network with NumPy, without importing TensorFlow.
+
+    Each layer is a float32 matrix product (run by NumPy's BLAS), a bias and an activation, applied to a batch at a
+    time in place, so scoring needs no more memory than two layers' outputs for one batch. The outputs match Keras'
+    ``predict`` to within float32 rounding.
+
+    Args:
+        kernels (list): The weight matrix of each layer, of shape (inputs, units).
+        biases (list): The bias vector of each layer.
+        activations (list): The name of each layer's activation, one of those in ``ACTIVATIONS``.
+    """
+
+    def __init__(self, kernels, biases, activations):
+        if not len(kernels) == len(biases) == len(activations):
+            raise ValueError("kernels, biases and activations must have one entry per layer")
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+        self.kernels = [np.ascontiguousarray(kernel, dtype=np.float32) for kernel in kernels]
+        self.biases = [np.asarray(bias, dtype=np.float32).reshape(-1) for bias in biases]
+        self.activations = list(activations)
+
+    @classmethod
+    def from_keras(cls, model):
+        """Take the weights of a Keras ``Sequential`` model of Dense layers.
+
+        Args:
+            model (keras.Sequential): A trained model.
+
+        Returns:
+            NumpyMLP: The network.
+        """
+        kernels, biases, activations = [], [], []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind in SKIPPED_LAYERS:
+                continue
+            if kind != "Dense":
+                raise ValueError(f"Layer {layer.name} is a {kind}; only Dense and Dropout layers can be exported")
+            weights = layer.get_weights()
+            kernels.append(weights[0])
+            biases.append(weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1], dtype=np.float32))
+            activation = layer.get_config()["activation"]
+            activations.append(activation if isinstance(activation, str) else activation["config"]["name"])
+        return cls(kernels, biases, activations)
+
+    @classmethod
+    def load(cls, path):
+        """Read a network written by ``save`` or ``export_weights``.
+
+        Args:
+            path (str or Path): The .npz file.
+
+        Returns:
+            NumpyMLP: The network.
+        """
+        with np.load(path) as data:
+            n_layers = len(data["activations"])
+            return cls([data[f"kernel_{i}"] for i in range(n_layers)], [data[f"bias_{i}"] for i in range(n_layers)],
+                       [str(name) for name in data["activations"]])
+
+    def save(self, path):
+        """Write the network to a flat .npz file of plain arrays, which can be read without pickle.
+
+        Args:
+            path (str or Path): The .npz file.
+        """
+        arrays = {"activations": np.array(self.activations)}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"] = bias
+        np.savez(Path(path), **arrays)
+
+    @property
+    def n_features(self):
+        return self.kernels[0].shape[0]
+
+    @property
+    def n_outputs(self):
+        return self.kernels[-1].shape[1]
+
+    @property
+    def nbytes(self):
+        """Size of the weights and biases, in bytes."""
+        return sum(array.nbytes for array in [*self.kernels, *self.biases])
+
+    def _forward(self, X):
+        """Run one batch through the layers."""
+        h = X
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            h = h @ kernel
+            h += bias
+            h = ACTIVATIONS[activation](h)
+        return h
+
+    def predict(self, X, batch_size=None):
+        """Score records, as Keras' ``predict`` does.
+
+        Args:
+            X (array-like): Features, of shape (records, n_features). Converted to float32 a batch at a time.
+            batch_size (int?): Number of records per batch. Defaults to None, which scores them all at once.
+
+        Returns:
+            np.ndarray: The float32 outputs, of shape (records, n_outputs).
+        """
+        rows = X.iloc if hasattr(X, "iloc") else X
+        n = X.shape[0]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features but the network expects {self.n_features}")
+        batch_size = batch_size or max(n, 1)
+        out = np.empty((n, self.n_outputs), dtype=np.float32)
+        for start in range(0, n, batch_size):
+            batch = np.asarray(rows[start:start + batch_size], dtype=np.float32)
+            out[start:start + len(batch)] = self._forward(batch)
+        return out
+
+    def predict_proba(self, X, batch_size=None):
+        """Get class probabilities as sklearn classifiers do, so the network can be passed to ``eval_classification``.
+
+        A single sigmoid output is the positive class's probability; a softmax output is already one per class.
+
+        Args:
+            X (array-like): Features.
+            batch_size (int?): Number of records per batch. Defaults to None, which scores them all at once.
+
+        Returns:
+            np.ndarray: The probability of each class, of shape (records, classes).
+        """
+        scores = self.predict(X, batch_size)
+        if scores.shape[1] == 1:
+            return np.hstack([1 - scores, scores])
+        return scores
+
+    def predict_classes(self, X, threshold=0.5, batch_size=None):
+        """Predict class labels, thresholding a single sigmoid output or taking the most probable class.
+
+        Args:
+            X (array-like): Features.
+            threshold (float?): Threshold on the positive class's probability. Defaults to 0.5.
+            batch_size (int?): Number of records per batch. Defaults to None.
+
+        Returns:
+            np.ndarray: The predicted labels.
+        """
+        scores = self.predict(X, batch_size)
+        if scores.shape[1] == 1:
+            return (scores[:, 0] >= threshold).astype(int)
+        return scores.argmax(axis=1)
+
+
+def _quantize_columns(kernel):
+    """Quantize a weight matrix to int8 with a symmetric scale per output unit (column).
+
+    Args:
+        kernel (array): The float weights, of shape (inputs, units).
+
+    Returns:
+        tuple: The int8 weights and the float32 scale of each column, such that ``weights * scales`` approximates the
+            kernel.
+    """
+    scales = np.abs(kernel).max(axis=0) / 127
+    scales[scales == 0] = 1
+    weights = np.clip(np.rint(kernel / scales), -127, 127).astype(np.int8)
+    return weights, scales.astype(np.float32)
+
+
+class QuantizedMLP(NumpyMLP):
+    """Score a dense network with int8 weights.
+
+    Each layer's weights are quantized to int8 with a symmetric scale per output unit, which keeps the weights in a
+    quarter of the memory of float32 (and of the memory bandwidth of reading them on every batch). Scoring has two
+    modes:
+
+    * ``accumulate="float32"``: the int8 weights are widened to float32 one layer at a time and multiplied by BLAS,
+      then each output column is scaled. Only the weights are approximated.
+    * ``accumulate="int32"``: each layer's input is also quantized to int8, with a symmetric scale per layer
+      calibrated on a sample of records, and the products are accumulated in int32 as int8 inference hardware does,
+      before scaling back to float32. This shows the accuracy of fully integer inference. NumPy has no int8 matrix
+      product, so where a layer's sums cannot exceed 2**24 (fewer than 1040 inputs) they are computed exactly by
+      float32 BLAS instead, and otherwise by NumPy's much slower integer product.
+
+    Build it with ``quantize`` from a float network, rather than from the arguments below.
+
+    Args:
+        kernels (list): The int8 weight matrix of each layer, of shape (inputs, units).
+        kernel_scales (list): The float32 scale of each layer's columns.
+        biases (list): The float32 bias vector of each layer.
+        activations (list): The name of each layer's activation.
+        input_scales (array?): The scale of each layer's input, for ``accumulate="int32"``. Defaults to None.
+        accumulate (str?): "float32" or "int32". Defaults to "float32".
+    """
+
+    def __init__(self, kernels, kernel_scales, biases, activations, input_scales=None, accumulate="float32"):
+        super().__init__(kernels, biases, activations)
+        if accumulate not in ("float32", "int32"):
+            raise ValueError(f"accumulate must be 'float32' or 'int32', not {accumulate!r}")
+        if accumulate == "int32" and input_scales is None:
+            raise ValueError("accumulate='int32' needs input scales from calibration")
+        self.kernels = [np.asarray(kernel, dtype=np.int8) for kernel in kernels]
+        self.kernel_scales = [np.asarray(scale, dtype=np.float32).reshape(-1) for scale in kernel_scales]
+        self.input_scales = None if input_scales is None else np.asarray(input_scales, dtype=np.float32)
+        self.accumulate = accumulate
+
+    @classmethod
+    def quantize(cls, network, X_calibration=None, percentile=100.0, accumulate="float32"):
+        """Quantize a float network.
+
+        Args:
+            network (NumpyMLP): The float network.
+            X_calibration (array-like?): A sample of records, such as a few thousand rows of X_val, from which the
+                scale of each layer's input is calibrated. Needed for ``accumulate="int32"``. Defaults to None.
+            percentile (float?): Percentile of the absolute inputs that maps to 127; below 100, the rare largest
+                values are clipped in exchange for finer steps for the rest. Defaults to 100.0, the maximum.
+            accumulate (str?): "float32" or "int32". Defaults to "float32".
+
+        Returns:
+            QuantizedMLP: The quantized network.
+        """
+        kernels, kernel_scales = zip(*(_quantize_columns(kernel) for kernel in network.kernels))
+        input_scales = None
+        if X_calibration is not None:
+            input_scales = []
+            h = np.asarray(X_calibration, dtype=np.float32)
+            for kernel, bias, activation in zip(network.kernels, network.biases, network.activations):
+                input_scales.append(max(np.percentile(np.abs(h), percentile) / 127, np.finfo(np.float32).tiny))
+                h = h @ kernel
+                h += bias
+                h = ACTIVATIONS[activation](h)
+        return cls(kernels, kernel_scales, network.biases, network.activations, input_scales, accumulate)
+
+    @classmethod
+    def load(cls, path, accumulate="float32"):
+        """Read a network written by ``save``.
+
+        Args:
+            path (str or Path): The .npz file.
+            accumulate (str?): "float32" or "int32". Defaults to "float32".
+
+        Returns:
+            QuantizedMLP: The network.
+        """
+        with np.load(path) as data:
+            n_layers = len(data["activations"])
+            return cls([data[f"kernel_{i}"] for i in range(n_layers)], [data[f"scale_{i}"] for i in range(n_layers)],
+                       [data[f"bias_{i}"] for i in range(n_layers)], [str(name) for name in data["activations"]],
+                       data["input_scales"] if "input_scales" in data.files else None, accumulate)
+
+    def save(self, path):
+        """Write the network to a flat .npz file of plain arrays.
+
+        Args:
+            path (str or Path): The .npz file.
+        """
+        arrays = {"activations": np.array(self.activations)}
+        if self.input_scales is not None:
+            arrays["input_scales"] = self.input_scales
+        for i, (kernel, scale, bias) in enumerate(zip(self.kernels, self.kernel_scales, self.biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"scale_{i}"] = scale
+            arrays[f"bias_{i}"] = bias
+        np.savez(Path(path), **arrays)
+
+    @property
+    def nbytes(self):
+        """Size of the weights, scales and biases, in bytes."""
+        return sum(array.nbytes for array in [*self.kernels, *self.kernel_scales, *self.biases])
+
+    def dequantize(self):
+        """Get the float network with the quantized weights, which scores as ``accumulate="float32"`` does.
+
+        Returns:
+            NumpyMLP: The float network.
+        """
+        kernels = [kernel * scale for kernel, scale in zip(self.kernels, self.kernel_scales)]
+        return NumpyMLP(kernels, self.biases, self.activations)
+
+    def _forward(self, X):
+        """Run one batch through the layers."""
+        h = X
+        for i, (kernel, scale, bias, activation) in enumerate(zip(self.kernels, self.kernel_scales, self.biases,
+                                                                  self.activations)):
+            if self.accumulate == "float32":
+                h = h @ kernel.astype(np.float32)
+                h *= scale
+            else:
+                h_q = np.clip(np.rint(h / self.input_scales[i]), -127, 127)
+                if kernel.shape[0] * 127 * 127 < 2 ** 24:
+                    # every partial sum is an integer that float32 holds exactly, so BLAS gives the int32 result
+                    h = h_q @ kernel.astype(np.float32)
+                else:
+                    h = (h_q.astype(np.int32) @ kernel.astype(np.int32)).astype(np.float32)
+                h *= scale * self.input_scales[i]
+            h += bias
+            h = ACTIVATIONS[activation](h)
+        return h
+
+
+@dataclass
+class QuantizationReport:
+    """How much a quantized network changes the scores of a float network on a set of records."""
+    auc: float
+    quantized_auc: float
+    max_abs_difference: float
+    nbytes: int
+    quantized_nbytes: int
+
+    @property
+    def auc_delta(self):
+        return self.quantized_auc - self.auc
+
+
+def quantization_report(network, quantized, X_test, y_test, batch_size=None):
+    """Compare a quantized network with the float network it came from, such as on X_test.
+
+    Args:
+        network (NumpyMLP): The float network.
+        quantized (QuantizedMLP): The quantized network.
+        X_test (array-like): Features.
+        y_test (array-like): Binary labels.
+        batch_size (int?): Number of records per batch. Defaults to None.
+
+    Returns:
+        QuantizationReport: The AUC of each network, the largest change in a score and the weight sizes.
+    """
+    from auc import roc_auc
+
+    scores = network.predict(X_test, batch_size)[:, -1]
+    quantized_scores = quantized.predict(X_test, batch_size)[:, -1]
+    return QuantizationReport(roc_auc(y_test, scores), roc_auc(y_test, quantized_scores),
+                              float(np.abs(scores - quantized_scores).max()), network.nbytes, quantized.nbytes)
@@ -0,0 +1,178 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import count_metrics
+from headless_tuner import TuneIteration, TuneResult
+
+
+def tune_multiclass_thresholds(y_true, target_classes, y_pred_proba, default_class, metric='f1_macro',
+                               higher_is_better=True, candidates=None, max_iterations=5, n_restarts=1, tol=0.0,
+                               n_jobs=None, random_state=None):
+    """
+    Find a threshold for each class (other than the default class) optimizing the specified metric, using the same
+    prediction rule as get_predictions(): the probability of each non-default class is ignored unless it is greater
+    than the class's threshold, and the class with the highest remaining probability is predicted.
+
+    As with search_threshold(), the thresholds are tuned one class at a time, holding the others constant, repeated for
+    up to max_iterations passes over the classes. Each step evaluates every candidate threshold for the class in one
+    batched computation: holding the other thresholds constant, each record is predicted either as the class being
+    tuned (where its probability exceeds the threshold and beats the other remaining probabilities) or as the class it
+    would be predicted as otherwise. So the records are counted once by (candidate interval, true class, fallback
+    class), and the confusion matrix for every candidate is a cumulative sum over the intervals. The metric is then
+    calculated once over the stack of confusion matrices.
+
+    :param y_true: array
+        True labels for each record
+    :param target_classes: array of str
+        Names of the target classes in the order of the columns of y_pred_proba
+    :param y_pred_proba: 2d array of floats
+        Predicted probabilities, with one column per class
+    :param default_class: str
+        The class predicted where no other class's probability exceeds its threshold. Its threshold is always 0.0.
+    :param metric: str or function
+        The name of a metric in count_metrics.CONFUSION_METRICS, or a function of an array of confusion matrices. With
+        n_jobs, a function must be picklable (defined at module level).
+    :param higher_is_better: bool
+    :param candidates: array of floats
+        The thresholds tried for each class. Defaults to 1,001 evenly spaced values from 0.0 to 1.0.
+    :param max_iterations: int
+        The maximum number of passes over the classes.
+    :param n_restarts: int
+        The number of independent searches. The first starts with every threshold at 0.5, as in search_threshold(), and
+        the others from random candidates. The best result is returned.
+    :param tol: float
+        Stop a search once a pass over the classes improves the score by no more than this. With the default of 0.0,
+        a search stops once a pass changes no threshold.
+    :param n_jobs: int
+        The number of worker processes to run the restarts in. None or 1 runs them in the current process.
+    :param random_state: int
+        Seed for the starting thresholds of the restarts.
+    :return: TuneResult, with the iterations of the best search, its score, and the number of candidate evaluations
+        and wall time over all the restarts
+    """
+    start_time = time.perf_counter()
+    metric = count_metrics.get_confusion_metric(metric)
+    target_classes = [str(x) for x in target_classes]
+    n_classes = len(target_classes)
+    if n_classes < 3:
+        raise ValueError("tune_multiclass_thresholds() is for multi-class classification. For binary classification, "
+                         "use tune_threshold() or StreamingThresholdTuner.tune_threshold()")
+    if default_class is None or str(default_class) not in target_classes:
+        raise ValueError("default_class must be one of target_classes")
+    default_idx = target_classes.index(str(default_class))
+
+    y_pred_proba = np.asarray(y_pred_proba, dtype=float)
+    if y_pred_proba.ndim != 2 or y_pred_proba.shape[1] != n_classes:
+        raise ValueError("The shape of y_pred_proba does not match the number of target classes")
+    y_idx = pd.Categorical(pd.Series(y_true).astype(str), categories=target_classes).codes.astype(np.int64)
+    if (y_idx < 0).any():
+        raise ValueError("y_true contains labels not in target_classes")
+
+    if candidates is None:
+        candidates = np.linspace(0.0, 1.0, 1001)
+    candidates = np.unique(np.asarray(candidates, dtype=float))
+
+    rng = np.random.default_rng(random_state)
+    starts = []
+    for restart_idx in range(n_restarts):
+        thresholds = np.full(n_classes, 0.5) if restart_idx == 0 else rng.choice(candidates, n_classes)
+        thresholds[default_idx] = 0.0
+        starts.append(thresholds)
+
+    args = [(y_idx, y_pred_proba, default_idx, x, candidates, metric, higher_is_better, max_iterations, tol)
+            for x in starts]
+    if n_jobs is None or n_jobs == 1:
+        searches = [_coordinate_descent(*x) for x in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            searches = list(executor.map(_coordinate_descent, *zip(*args)))
+
+    scores = [x.score for x in searches]
+    best = searches[int(np.argmax(scores) if higher_is_better else np.argmin(scores))]
+    best.n_evaluations = sum(x.n_evaluations for x in searches)
+    best.elapsed_seconds = time.perf_counter() - start_time
+    return best
+
+
+def confusion_matrix(y_idx, y_pred_proba, default_idx, thresholds):
+    """
+    Get the confusion matrix for a set of thresholds, where y_idx holds the index of the true class of each record.
+    """
+    n_classes = y_pred_proba.shape[1]
+    pred_idx = np.argmax(_masked_proba(y_pred_proba, default_idx, thresholds), axis=1)
+    return np.bincount(y_idx * n_classes + pred_idx, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def candidate_confusion_matrices(y_idx, y_pred_proba, default_idx, thresholds, class_idx, candidates):
+    """
+    Get the confusion matrix for each candidate threshold for one class, holding the thresholds for the other classes
+    constant.
+
+    :return: array of shape (len(candidates), n_classes, n_classes)
+    """
+    n_classes = y_pred_proba.shape[1]
+    others = _masked_proba(y_pred_proba, default_idx, thresholds)
+    others[:, class_idx] = -np.inf
+    fallback_idx = np.argmax(others, axis=1)
+    fallback_proba = others[np.arange(len(others)), fallback_idx]
+    proba = y_pred_proba[:, class_idx]
+
+    # Records where the class would be predicted, if its probability exceeded the threshold. Where probabilities are
+    # tied, the first class is predicted, as with idxmax() in get_predictions().
+    can_switch = (proba > fallback_proba) | ((proba == fallback_proba) & (class_idx < fallback_idx))
+
+    # With every record predicted as its fallback class
+    cm = np.bincount(y_idx * n_classes + fallback_idx, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+    # The records that switch to the class at candidates[i] are those in intervals i+1 onwards: the candidates below
+    # their probability.
+    interval_idx = np.searchsorted(candidates, proba[can_switch], side='left')
+    cells = (interval_idx * n_classes + y_idx[can_switch]) * n_classes + fallback_idx[can_switch]
+    switched = np.bincount(cells, minlength=(len(candidates) + 1) * n_classes * n_classes)
+    switched = switched.reshape(len(candidates) + 1, n_classes, n_classes)
+    switched = np.cumsum(switched[::-1], axis=0)[::-1][1:]
+
+    cms = cm[np.newaxis] - switched
+    cms[:, :, class_idx] += switched.sum(axis=2)
+    return cms
+
+
+def _masked_proba(y_pred_proba, default_idx, thresholds):
+    masked = np.where(y_pred_proba > np.asarray(thresholds)[np.newaxis], y_pred_proba, -np.inf)
+    masked[:, default_idx] = y_pred_proba[:, default_idx]
+    return masked
+
+
+def _coordinate_descent(y_idx, y_pred_proba, default_idx, thresholds, candidates, metric, higher_is_better,
+                        max_iterations, tol):
+    def is_better(a, b):
+        return a > b if higher_is_better else a < b
+
+    thresholds = np.array(thresholds, dtype=float)
+    n_classes = y_pred_proba.shape[1]
+    score = float(metric(confusion_matrix(y_idx, y_pred_proba, default_idx, thresholds)))
+    result = TuneResult(None, n_evaluations=1)
+    for _ in range(max_iterations):
+        prev_score = score
+        changed = False
+        for class_idx in range(n_classes):
+            if class_idx == default_idx:
+                continue
+            cms = candidate_confusion_matrices(y_idx, y_pred_proba, default_idx, thresholds, class_idx, candidates)
+            scores = np.asarray(metric(cms), dtype=float)
+            result.n_evaluations += len(candidates)
+            result.iterations.append(TuneIteration(candidates, scores, bool(np.all(scores == scores[0]))))
+            best_idx = np.argmax(scores) if higher_is_better else np.argmin(scores)
+            # Keep the current threshold unless a candidate is strictly better, so the score never gets worse
+            if is_better(scores[best_idx], score):
+                thresholds[class_idx] = candidates[best_idx]
+                score = float(scores[best_idx])
+                changed = True
+        if not changed or abs(score - prev_score) <= tol:
+            break
+    result.threshold = thresholds.tolist()
+    result.score = score
+    return result
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from leaderboard import hash_data
+
+
+@dataclass
+class OOFEntry:
+    """A base model's stacking features: its out-of-fold predictions for the training records and the predictions
+    of the model fitted on all of them for the test records.
+
+    Both have a column per stacking feature, as ``StackingClassifier`` builds them: the positive class's probability
+    for binary classification, a probability per class for multi-class classification, or the decision function.
+    """
+    name: str
+    key: str
+    method: str
+    oof: np.ndarray
+    test: np.ndarray
+    fit_seconds: float
+
+
+def config_key(estimator):
+    """Hash an estimator's class and parameters, to identify its configuration.
+
+    Args:
+        estimator (Estimator): An sklearn estimator.
+
+    Returns:
+        str: A hex digest that changes whenever the class or any parameter changes.
+    """
+    params = sorted(estimator.get_params(deep=True).items())
+    text = repr((type(estimator).__module__, type(estimator).__qualname__, params))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _stack_method(estimator, method):
+    """Resolve "auto" to the first of predict_proba, decision_function and predict that the estimator has, as
+    ``StackingClassifier`` does."""
+    if method != "auto":
+        return method
+    for name in ("predict_proba", "decision_function", "predict"):
+        if hasattr(estimator, name):
+            return name
+    raise ValueError(f"{type(estimator).__name__} has none of predict_proba, decision_function and predict")
+
+
+def _stack_columns(predictions, method):
+    """Shape predictions as stacking features: one column per feature, dropping the redundant negative class
+    probability for binary classification, as ``StackingClassifier`` does."""
+    predictions = np.asarray(predictions, dtype=float)
+    if predictions.ndim == 1:
+        return predictions.reshape(-1, 1)
+    if method == "predict_proba" and predictions.shape[1] == 2:
+        return predictions[:, 1:]
+    return predictions
+
+
+def _fit_predict(estimator, method, X_fit, y_fit, X_predict):
+    """Fit a clone of the estimator and get the stacking features of another set of records.
+
+    Args:
+        estimator (Estimator): The unfitted estimator.
+        method (str): The prediction method.
+        X_fit (array-like): Features to fit on.
+        y_fit (array): Labels to fit on.
+        X_predict (array-like): Features to predict.
+
+    Returns:
+        array: The stacking features of X_predict.
+    """
+    from sklearn.base import clone
+
+    model = clone(estimator).fit(X_fit, y_fit)
+    return _stack_columns(getattr(model, method)(X_predict), method)
+
+
+class OOFStore:
+    """A disk cache of the out-of-fold (OOF) and test predictions of stacking base models.
+
+    ``StackingClassifier`` refits every base model with internal cross-validation each time it is fitted, so adding or
+    removing one base model retrains them all. This store computes each base model's OOF predictions (from a fixed
+    set of folds) and test predictions (from the model fitted on all the training records) once, and keeps them
+    keyed by the model's configuration and the data and folds. A meta-learner can then be fitted from the cached
+    columns of any set of base models, and a new base model only needs its own predictions computed.
+
+    Entries are .npz files (with a .json of metadata) under a directory named by the hash of the training and test
+    data and the folds, so changing the data or folds starts a new set of entries rather than reusing stale ones.
+
+    Args:
+        root (str or Path): Directory for the entries.
+        X_train (array-like): Training features.
+        y_train (array-like): Training labels.
+        X_test (array-like): Test features, such as the holdout or the submission records.
+        cv (int?): Number of stratified folds. Defaults to 5.
+        random_state (int?): Seed for the folds. Defaults to 42.
+    """
+
+    def __init__(self, root, X_train, y_train, X_test, cv=5, random_state=42):
+        from sklearn.model_selection import StratifiedKFold
+
+        self.X_train = X_train
+        self.y_train = np.asarray(y_train)
+        self.X_test = X_test
+        splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+        self.folds = list(splitter.split(np.zeros(len(self.y_train)), self.y_train))
+
+        fold_ids = np.empty(len(self.y_train), dtype=np.int64)
+        for i, (_, val) in enumerate(self.folds):
+            fold_ids[val] = i
+        self.split_key = hash_data(X_train, self.y_train, X_test, fold_ids)
+        self.directory = Path(root) / self.split_key
+        self.entries = {}
+
+    def add(self, name, estimator, method="auto", n_jobs=None, force=False):
+        """Get a base model's stacking features, computing them only if they are not in the store.
+
+        Args:
+            name (str): Name of the base model, used to select its columns.
+            estimator (Estimator): The unfitted base model.
+            method (str?): The prediction method, or "auto" for the first of predict_proba, decision_function and
+                predict, as ``StackingClassifier`` chooses. Defaults to "auto".
+            n_jobs (int?): Number of worker processes for the fold fits and the full fit. Defaults to None, which
+                fits them in this process.
+            force (bool?): Whether to recompute the predictions even if they are in the store. Defaults to False.
+
+        Returns:
+            OOFEntry: The OOF and test predictions.
+        """
+        method = _stack_method(estimator, method)
+        key = hashlib.blake2b(f"{config_key(estimator)}:{method}".encode(), digest_size=16).hexdigest()
+        path = self.directory / f"{key}.npz"
+
+        if path.exists() and not force:
+            with np.load(path) as data:
+                metadata = json.loads((self.directory / f"{key}.json").read_text())
+                entry = OOFEntry(name, key, method, data["oof"], data["test"], metadata["fit_seconds"])
+            self.entries[name] = entry
+            return entry
+
+        start = time.perf_counter()
+        rows = self.X_train.iloc if hasattr(self.X_train, "iloc") else self.X_train
+        tasks = [(estimator, method, rows[train], self.y_train[train], rows[val]) for train, val in self.folds]
+        tasks.append((estimator, method, self.X_train, self.y_train, self.X_test))
+        if n_jobs is None or n_jobs == 1:
+            predictions = [_fit_predict(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                predictions = list(executor.map(_fit_predict, *zip(*tasks)))
+
+        oof = np.empty((len(self.y_train), predictions[0].shape[1]))
+        for (_, val), fold_predictions in zip(self.folds, predictions[:-1]):
+            oof[val] = fold_predictions
+        entry = OOFEntry(name, key, method, oof, predictions[-1], time.perf_counter() - start)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.savez(self.directory / f"{key}.partial.npz", oof=entry.oof, test=entry.test)
+        (self.directory / f"{key}.json").write_text(json.dumps({
+            "name": name, "class": type(estimator).__qualname__, "method": method,
+            "params": estimator.get_params(deep=False), "fit_seconds": entry.fit_seconds,
+        }, default=repr, indent=2))
+        # rename last, so that an interrupted write never leaves an entry that looks complete
+        (self.directory / f"{key}.partial.npz").replace(path)
+        self.entries[name] = entry
+        return entry
+
+    def features(self, names=None):
+        """Stack the cached columns of a set of base models, in the order given.
+
+        Args:
+            names (list?): Names of base models added to the store. Defaults to None, which uses all of them in the
+                order they were added.
+
+        Returns:
+            tuple: The training features (the OOF predictions) and the test features.
+        """
+        names = list(self.entries) if names is None else names
+        missing = [name for name in names if name not in self.entries]
+        if missing:
+            raise KeyError(f"Base models not added to the store: {missing}")
+        oof = np.hstack([self.entries[name].oof for name in names])
+        test = np.hstack([self.entries[name].test for name in names])
+        return oof, test
+
+    def fit_meta(self, final_estimator, names=None, passthrough=False):
+        """Fit a meta-learner on the cached OOF predictions of a set of base models.
+
+        This gives the same final estimator as ``StackingClassifier`` with the same folds, without refitting the base
+        models.
+
+        Args:
+            final_estimator (Estimator): The unfitted meta-learner, which is cloned.
+            names (list?): Names of the base models to stack. Defaults to None, which uses all of them.
+            passthrough (bool?): Whether to include the original features, as in ``StackingClassifier``. Defaults to
+                False.
+
+        Returns:
+            tuple: The fitted meta-learner and its test features, so that ``meta.predict_proba(test_features)``
+                gives the stacked predictions for X_test.
+        """
+        from sklearn.base import clone
+
+        oof, test = self.features(names)
+        if passthrough:
+            oof = np.hstack([oof, np.asarray(self.X_train, dtype=float)])
+            test = np.hstack([test, np.asarray(self.X_test, dtype=float)])
+        return clone(final_estimator).fit(oof, self.y_train), test
@@ -0,0 +1,289 @@
+import numpy as np
+import pandas as pd
+
+import count_metrics
+from headless_tuner import RocCurve, SliceTable, StatsTable, TuneIteration, TuneResult
+
+
+class ScoreSketch:
+    """
+    A fixed-resolution summary of a binary set of predictions: for each of the two classes, a histogram of the
+    predicted probabilities of the positive class. The sketch is built by passing batches of (labels, scores) to
+    update(), so the full set of scores never needs to be held in memory, and sketches built separately (for example,
+    by different worker processes each scoring one shard) may be combined with merge() or +.
+
+    Thresholds are resolved to the bin edges: with the default 10,000 bins over [0.0, 1.0], thresholds are exact to
+    within 0.0001. Scores outside [low, high] are placed in the first or last bin.
+    """
+
+    def __init__(self, target_classes, n_bins=10_000, low=0.0, high=1.0):
+        """
+        :param target_classes: array of str
+            The two class labels, with the negative class first and the positive class second.
+        :param n_bins: int
+            The number of bins in each histogram.
+        :param low: float
+            The lowest score expected.
+        :param high: float
+            The highest score expected.
+        """
+        target_classes = [str(x) for x in target_classes]
+        if len(target_classes) != 2:
+            raise ValueError("ScoreSketch is available only for binary classification")
+        if not high > low:
+            raise ValueError("high must be greater than low")
+
+        self.target_classes = target_classes
+        self.n_bins = int(n_bins)
+        self.low = float(low)
+        self.high = float(high)
+        self.counts = np.zeros((2, self.n_bins), dtype=np.int64)  # Row 0: negative class, row 1: positive class
+        self.min_score = np.inf
+        self.max_score = -np.inf
+
+    @property
+    def edges(self):
+        return np.linspace(self.low, self.high, self.n_bins + 1)
+
+    @property
+    def n_records(self):
+        return int(self.counts.sum())
+
+    def update(self, y_true, y_pred_proba):
+        """
+        Add a batch of records to the sketch.
+
+        :param y_true: array
+            True labels for each record in the batch
+        :param y_pred_proba: array of floats
+            Predicted probabilities of the positive class. May be a 1d array or a 2d array with one column per class.
+        :return: self
+        """
+        y_pred_proba = np.asarray(y_pred_proba, dtype=float)
+        if y_pred_proba.ndim == 2:
+            y_pred_proba = y_pred_proba[:, 1]
+        if len(y_pred_proba) == 0:
+            return self
+        if np.isnan(y_pred_proba).any():
+            raise ValueError("y_pred_proba contains NaN, which has no bin in the sketch")
+        is_positive = np.asarray(y_true).astype(str) == self.target_classes[1]
+
+        bin_idx = self.bin_index(y_pred_proba)
+        self.counts += np.bincount(is_positive * self.n_bins + bin_idx,
+                                   minlength=2 * self.n_bins).reshape(2, self.n_bins)
+        self.min_score = min(self.min_score, float(y_pred_proba.min()))
+        self.max_score = max(self.max_score, float(y_pred_proba.max()))
+        return self
+
+    def bin_index(self, values):
+        """
+        Get the index of the bin containing each value. Bin i covers [edges[i], edges[i+1]).
+        """
+        scaled = (np.asarray(values, dtype=float) - self.low) * (self.n_bins / (self.high - self.low))
+        return np.clip(np.floor(scaled), 0, self.n_bins - 1).astype(np.int64)
+
+    def merge(self, other):
+        """
+        Combine this sketch with another built with the same classes and bins, returning a new sketch.
+        """
+        if (self.target_classes != other.target_classes or self.n_bins != other.n_bins or
+                self.low != other.low or self.high != other.high):
+            raise ValueError("Only sketches with the same target_classes, n_bins, low and high may be merged")
+        merged = ScoreSketch(self.target_classes, self.n_bins, self.low, self.high)
+        merged.counts = self.counts + other.counts
+        merged.min_score = min(self.min_score, other.min_score)
+        merged.max_score = max(self.max_score, other.max_score)
+        return merged
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def save(self, path):
+        """
+        Save the sketch to a .npz file, for example to pass it from a worker process to the process tuning the
+        thresholds.
+        """
+        np.savez(path, counts=self.counts, target_classes=np.array(self.target_classes),
+                 bins=np.array([self.low, self.high, self.n_bins]), range=np.array([self.min_score, self.max_score]))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            low, high, n_bins = data['bins']
+            sketch = cls(data['target_classes'].tolist(), int(n_bins), low, high)
+            sketch.counts = data['counts'].astype(np.int64)
+            sketch.min_score, sketch.max_score = (float(x) for x in data['range'])
+        return sketch
+
+
+class StreamingThresholdTuner:
+    """
+    Threshold tuning and summary statistics calculated from a ScoreSketch, in place of the full y_true and
+    y_pred_proba used by HeadlessThresholdTuner. Results are returned using the same result classes.
+
+    Records are predicted as the positive class where their score is greater than or equal to the threshold, as in
+    tune_threshold(). All thresholds are bin edges of the sketch.
+    """
+
+    def __init__(self, sketch):
+        self.sketch = sketch
+        # The number of records of each class at or above each bin edge (edges[0] through edges[n_bins]).
+        above = np.cumsum(sketch.counts[:, ::-1], axis=1)[:, ::-1]
+        self.neg_above = np.append(above[0], 0)
+        self.pos_above = np.append(above[1], 0)
+        self.n_neg = int(self.neg_above[0])
+        self.n_pos = int(self.pos_above[0])
+
+    def counts(self, thresholds):
+        """
+        Get the confusion counts for one or more thresholds, each rounded to the nearest bin edge.
+
+        :return: tuple of (tp, fp, fn, tn)
+        """
+        sketch = self.sketch
+        edge_idx = np.rint((np.asarray(thresholds, dtype=float) - sketch.low) *
+                           (sketch.n_bins / (sketch.high - sketch.low)))
+        edge_idx = np.clip(edge_idx, 0, sketch.n_bins).astype(np.int64)
+        tp = self.pos_above[edge_idx]
+        fp = self.neg_above[edge_idx]
+        return tp, fp, self.n_pos - tp, self.n_neg - fp
+
+    def tune_threshold(self, metric='f1_macro', higher_is_better=True, min_threshold=0.0, max_threshold=1.0):
+        """
+        Find the threshold optimizing the specified metric. As every bin edge can be evaluated at once, this is an
+        exhaustive search over the edges between min_threshold and max_threshold rather than the iterative search
+        used by tune_threshold().
+
+        :param metric: str or function
+            The name of a metric in count_metrics.COUNT_METRICS, or a function of (tp, fp, fn, tn) arrays.
+        :param higher_is_better: bool
+        :param min_threshold: float
+        :param max_threshold: float
+        :return: TuneResult, with one iteration holding the score at every edge considered
+        """
+        metric = count_metrics.get_count_metric(metric)
+        edges = self.sketch.edges
+        edges = edges[(edges >= min_threshold) & (edges <= max_threshold)]
+        if len(edges) == 0:
+            raise ValueError(f"No bin edge of the sketch lies between min_threshold={min_threshold} and "
+                             f"max_threshold={max_threshold}")
+        scores = np.asarray(metric(*self.counts(edges)), dtype=float)
+        best_idx = np.argmax(scores) if higher_is_better else np.argmin(scores)
+        all_equal = bool(np.all(scores == scores[0]))
+        return TuneResult(float(edges[best_idx]), [TuneIteration(edges, scores, all_equal)])
+
+    def stats_table(self, num_ranges=10):
+        """
+        Calculate the breakdown of the precision and recall for each range of the predicted probabilities, as in
+        HeadlessThresholdTuner.stats_table(). Ranges are formed from whole bins, so each range's share of the records
+        may differ from 1/num_ranges by up to the share of one bin, and the min and max probabilities are bin edges.
+
+        :param num_ranges: int
+        :return: StatsTable
+        """
+        target_classes = self.sketch.target_classes
+        counts = self.sketch.counts
+        edges = self.sketch.edges
+        total = counts.sum(axis=0)
+        n_records = total.sum()
+
+        # Assign each bin to a range using the percentile rank at its midpoint
+        mid_rank = (np.cumsum(total) - total / 2.0) / n_records
+        range_idx = np.minimum((mid_rank * num_ranges).astype(np.int64), num_ranges - 1)
+
+        rows = []
+        size_range = 1.0 / num_ranges
+        for i in range(num_ranges):
+            in_range = (range_idx == i) & (total > 0)
+            count_0 = int(counts[0, in_range].sum())
+            count_1 = int(counts[1, in_range].sum())
+            nonempty = np.flatnonzero(in_range)
+            rows.append([i * size_range,
+                         (i + 1) * size_range,
+                         edges[nonempty[0]] if len(nonempty) else np.nan,
+                         edges[nonempty[-1] + 1] if len(nonempty) else np.nan,
+                         count_0,
+                         count_1,
+                         count_0 + count_1,
+                         (count_1 / (count_0 + count_1)) if (count_0 + count_1) else 0,
+                         count_1 / self.n_pos if self.n_pos else 0
+                         ])
+
+        display_df = pd.DataFrame(
+            rows,
+            columns=['Start Range %',
+                     'End Range %',
+                     'Min Probability',
+                     'Max Probability',
+                     f'Count {target_classes[0]}',
+                     f'Count {target_classes[1]}',
+                     'Total Count',
+                     'Precision',
+                     'Recall'
+                     ]
+        )
+        display_df = display_df.iloc[::-1]
+        display_df = display_df.reset_index(drop=True)
+        display_df[f'Cumulative Count {target_classes[1]}'] = display_df[f'Count {target_classes[1]}'].cumsum()
+        display_df['Cumulative Total Count'] = display_df['Total Count'].cumsum()
+        display_df['Cumulative Precision'] = display_df[f'Cumulative Count {target_classes[1]}'] / \
+                                             display_df['Cumulative Total Count']
+        display_df['Cumulative Recall'] = display_df[f'Cumulative Count {target_classes[1]}'] / self.n_pos
+
+        curve_df = display_df.dropna()
+        mid_probability = (curve_df['Min Probability'] + curve_df['Max Probability']) / 2.0
+        return StatsTable(target_classes, display_df, mid_probability.to_numpy(),
+                          curve_df['Cumulative Precision'].to_numpy(), curve_df['Cumulative Recall'].to_numpy())
+
+    def slices(self, start=0.1, end=0.9, num_slices=10):
+        """
+        Calculate the count & fraction of each class within each slice of the predicted probabilities, as in
+        HeadlessThresholdTuner.slices(). Slice boundaries are rounded to the nearest bin edge.
+
+        As a sketch holds bins of [edges[i], edges[i+1]), each slice is [lower, upper) here, with the lowest slice
+        including everything below its upper edge, where HeadlessThresholdTuner.slices() uses (lower, upper]. Only
+        records with a score exactly on a boundary are counted in a different slice.
+
+        :param start: float
+        :param end: float
+        :param num_slices: int
+        :return: SliceTable
+        """
+        target_classes = self.sketch.target_classes
+        step = (end - start) / num_slices
+        thresholds = [0] + list(np.arange(start, end, step)) + [end, 1.0]
+        thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
+        thresholds = sorted(list(set(thresholds)))
+
+        tp, fp, _, _ = self.counts(thresholds)
+        # The records in each slice are those at or above its lower edge but not at or above its upper edge. The
+        # lowest slice includes everything below its upper edge.
+        pos_in_slice = tp[:-1] - tp[1:]
+        neg_in_slice = fp[:-1] - fp[1:]
+        pos_in_slice[0] = self.n_pos - tp[1]
+        neg_in_slice[0] = self.n_neg - fp[1]
+
+        display_df = pd.DataFrame({'Slice': np.arange(1, len(thresholds)),
+                                   'Min Prob': thresholds[:-1],
+                                   'Max Prob': thresholds[1:],
+                                   target_classes[0]: neg_in_slice,
+                                   target_classes[1]: pos_in_slice})
+        display_df['Total'] = display_df[target_classes].sum(axis=1)
+        for label in target_classes:
+            display_df[f"Fraction {label}"] = display_df[label] / display_df['Total']
+        return SliceTable(target_classes, display_df, thresholds)
+
+    def roc_curve(self):
+        """
+        Calculate the ROC curve using each bin edge as a threshold, and the area under it.
+
+        :return: RocCurve
+        """
+        # Work from the highest threshold (nothing predicted positive) to the lowest, as sklearn's roc_curve() does
+        thresholds = self.sketch.edges[::-1]
+        tp = self.pos_above[::-1]
+        fp = self.neg_above[::-1]
+        fpr = fp / self.n_neg if self.n_neg else np.zeros(len(fp))
+        tpr = tp / self.n_pos if self.n_pos else np.zeros(len(tp))
+        roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+        return RocCurve(fpr, tpr, thresholds, roc_auc)
@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import count_metrics
+
+
+@dataclass
+class BootstrapResult:
+    """
+    The distribution of the optimal threshold (and the metric) over bootstrap resamples of the records.
+
+    threshold and score are the optimal threshold and its score on the full data. For each resample, thresholds and
+    scores hold the optimal threshold and its score, and scores_at_threshold holds the score using the full-data
+    threshold: the spread of the latter describes how stable the metric is at the chosen cutoff.
+    """
+    threshold: float
+    score: float
+    thresholds: np.ndarray
+    scores: np.ndarray
+    scores_at_threshold: np.ndarray
+
+    def confidence_interval(self, level=0.95, values='thresholds'):
+        """
+        Get a percentile confidence interval.
+
+        :param level: float
+            The coverage of the interval, for example 0.95.
+        :param values: str
+            One of 'thresholds', 'scores' or 'scores_at_threshold'.
+        :return: tuple of (lower, upper)
+        """
+        alpha = (1.0 - level) / 2.0
+        lower, upper = np.quantile(getattr(self, values), [alpha, 1.0 - alpha])
+        return float(lower), float(upper)
+
+
+def bootstrap_threshold(y_true, target_classes, y_pred_proba, metric='f1_macro', higher_is_better=True,
+                        n_resamples=1000, method='poisson', thresholds=None, n_jobs=None, random_state=None):
+    """
+    Estimate the sampling distribution of the optimal threshold for binary classification by bootstrapping.
+
+    Each record is assigned once to the interval between two consecutive candidate thresholds, and the records are
+    counted by (interval, true class). Records within the same cell are interchangeable as far as any threshold is
+    concerned, so a resample only needs the resampled count of each cell: for Poisson weights the sum of the weights
+    of m records is Poisson(m), and for multinomial resampling the cell counts are jointly multinomial. The confusion
+    counts at every candidate threshold are then cumulative sums over the cells. A resample therefore costs
+    O(number of candidate thresholds), not O(number of records), and the records are scanned only once.
+
+    Records are predicted as the positive class where their score is greater than or equal to the threshold, as in
+    tune_threshold().
+
+    :param y_true: array
+        True labels for each record
+    :param target_classes: array of str
+        The two class labels, with the negative class first and the positive class second.
+    :param y_pred_proba: array of floats
+        Predicted probabilities of the positive class. May be a 1d array or a 2d array with one column per class.
+    :param metric: str or function
+        The name of a metric in count_metrics.COUNT_METRICS, or a function of (tp, fp, fn, tn) arrays. With n_jobs,
+        a function must be picklable (defined at module level).
+    :param higher_is_better: bool
+    :param n_resamples: int
+        The number of bootstrap resamples (B).
+    :param method: str
+        'poisson' to weight each record by an independent Poisson(1) draw, or 'multinomial' to draw n records with
+        replacement.
+    :param thresholds: array of floats
+        The candidate thresholds. Defaults to 1,001 evenly spaced values from 0.0 to 1.0.
+    :param n_jobs: int
+        The number of worker processes to spread the resamples over. None or 1 runs in the current process.
+    :param random_state: int
+        Seed for reproducible resamples. The results do not depend on n_jobs.
+    :return: BootstrapResult
+    """
+    metric = count_metrics.get_count_metric(metric)
+    target_classes = [str(x) for x in target_classes]
+    if len(target_classes) != 2:
+        raise ValueError("Bootstrapping the threshold is available only for binary classification")
+    if method not in ('poisson', 'multinomial'):
+        raise ValueError("method must be 'poisson' or 'multinomial'")
+
+    y_pred_proba = np.asarray(y_pred_proba, dtype=float)
+    if y_pred_proba.ndim == 2:
+        y_pred_proba = y_pred_proba[:, 1]
+    is_positive = pd.Series(y_true).astype(str).to_numpy() == target_classes[1]
+
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, 1001)
+    thresholds = np.unique(np.asarray(thresholds, dtype=float))
+    n_cells = len(thresholds) + 1
+
+    # Cell k holds the records whose score is at or above exactly k of the candidate thresholds.
+    cell_idx = np.searchsorted(thresholds, y_pred_proba, side='right')
+    cell_counts = np.bincount(is_positive * n_cells + cell_idx, minlength=2 * n_cells).reshape(2, n_cells)
+
+    full_scores = _scores(cell_counts[np.newaxis].astype(float), metric)[0]
+    best_idx = _best(full_scores[np.newaxis], higher_is_better)[0]
+
+    # Split the resamples into one block for each seed, so the results do not depend on the number of processes
+    block_size = 50
+    block_sizes = [min(block_size, n_resamples - start) for start in range(0, n_resamples, block_size)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(block_sizes))
+    args = [(cell_counts, size, method, seed, metric, higher_is_better, best_idx)
+            for size, seed in zip(block_sizes, seeds)]
+
+    if n_jobs is None or n_jobs == 1:
+        blocks = [_resample_block(*x) for x in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            blocks = list(executor.map(_resample_block, *zip(*args)))
+
+    resample_idx = np.concatenate([x[0] for x in blocks])
+    return BootstrapResult(
+        threshold=float(thresholds[best_idx]),
+        score=float(full_scores[best_idx]),
+        thresholds=thresholds[resample_idx],
+        scores=np.concatenate([x[1] for x in blocks]),
+        scores_at_threshold=np.concatenate([x[2] for x in blocks]))
+
+
+def _scores(cell_counts, metric):
+    """
+    Evaluate the metric at every candidate threshold, for a stack of (negative, positive) cell counts with shape
+    (n_resamples, 2, n_cells). Returns an array of shape (n_resamples, n_cells - 1).
+    """
+    # The records at or above threshold j are those in cells j+1 onwards
+    above = np.cumsum(cell_counts[:, :, ::-1], axis=2)[:, :, ::-1]
+    tp = above[:, 1, 1:]
+    fp = above[:, 0, 1:]
+    fn = above[:, 1, :1] - tp
+    tn = above[:, 0, :1] - fp
+    return np.asarray(metric(tp, fp, fn, tn), dtype=float)
+
+
+def _best(scores, higher_is_better):
+    return np.argmax(scores, axis=1) if higher_is_better else np.argmin(scores, axis=1)
+
+
+def _resample_block(cell_counts, n_resamples, method, seed, metric, higher_is_better, point_idx):
+    rng = np.random.default_rng(seed)
+    if method == 'poisson':
+        resampled = rng.poisson(cell_counts, size=(n_resamples,) + cell_counts.shape)
+    else:
+        n_records = cell_counts.sum()
+        resampled = rng.multinomial(n_records, cell_counts.ravel() / n_records, size=n_resamples)
+        resampled = resampled.reshape((n_resamples,) + cell_counts.shape)
+    scores = _scores(resampled.astype(float), metric)
+    best_idx = _best(scores, higher_is_better)
+    rows = np.arange(n_resamples)
+    return best_idx, scores[rows, best_idx], scores[:, point_idx]
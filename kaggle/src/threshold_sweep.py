@@ -0,0 +1,229 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import count_metrics
+
+
+class ThresholdSweep:
+    """
+    A precomputed view of a set of binary predictions that allows the confusion matrix (and the metrics derived from
+    it) to be looked up for any threshold without rescanning the data.
+
+    The scores are sorted once and the cumulative counts of each class are kept, so the number of records of each
+    class at or below any threshold is a single np.searchsorted() into the sorted scores followed by an index into the
+    cumulative counts. This makes sweeping many thresholds over a large validation set cheap, where creating label
+    predictions and calling sklearn metrics for each threshold is not.
+
+    The ROC and precision-recall curves are derived from the same cumulative counts, matching sklearn's roc_curve()
+    and precision_recall_curve(), and are calculated once per sweep.
+
+    A single stratified sample of the records may also be held, so that plots drawn for each threshold show the same
+    records rather than a fresh sample each time.
+    """
+
+    def __init__(self, y_true, target_classes, y_pred_proba, sample=None):
+        """
+        :param y_true: array
+            True labels for each record
+        :param target_classes: array
+            Set of two labels, with the negative class first and the positive class second.
+        :param y_pred_proba: array of floats
+            Predicted probabilities of the positive class. May be a 1d array or a 2d array with one column per class.
+        :param sample: DataFrame
+            Optional sample of the records (as created by the caller for plotting). Held as-is for reuse across
+            thresholds.
+        """
+        target_classes = [str(x) for x in target_classes]
+        if len(target_classes) != 2:
+            raise ValueError("ThresholdSweep is available only for binary classification")
+
+        y_pred_proba = np.asarray(y_pred_proba, dtype=float)
+        if y_pred_proba.ndim == 2:
+            y_pred_proba = y_pred_proba[:, 1]
+        is_positive = pd.Series(y_true).astype(str).to_numpy() == target_classes[1]
+
+        order = np.argsort(y_pred_proba, kind='stable')
+        self.target_classes = target_classes
+        self.sorted_scores = y_pred_proba[order]
+        self.cum_pos = np.concatenate(([0], np.cumsum(is_positive[order], dtype=np.int64)))
+        self.cum_neg = np.arange(len(self.sorted_scores) + 1, dtype=np.int64) - self.cum_pos
+        self.n_pos = int(self.cum_pos[-1])
+        self.n_neg = int(self.cum_neg[-1])
+        self.sample = sample
+        self._curves = {}
+
+    def __len__(self):
+        return len(self.sorted_scores)
+
+    def counts(self, thresholds, inclusive=False):
+        """
+        Get the confusion counts for one or more thresholds.
+
+        :param thresholds: float or array of floats
+        :param inclusive: bool
+            If False (the default, matching get_predictions()), records are predicted as the positive class where their
+            probability is strictly greater than the threshold. If True, where it is greater than or equal to it.
+        :return: tuple of (tp, fp, fn, tn), each an int or an array of ints matching the shape of thresholds
+        """
+        side = 'left' if inclusive else 'right'
+        idx = np.searchsorted(self.sorted_scores, thresholds, side=side)
+        fn = self.cum_pos[idx]
+        tn = self.cum_neg[idx]
+        return self.n_pos - fn, self.n_neg - tn, fn, tn
+
+    def confusion_matrix(self, threshold, inclusive=False):
+        """
+        Get the confusion matrix for a threshold, in the same layout as sklearn's confusion_matrix() with labels set
+        to target_classes: rows are the true classes and columns the predicted classes.
+        """
+        tp, fp, fn, tn = self.counts(threshold, inclusive)
+        return np.array([[tn, fp], [fn, tp]])
+
+    def f1_macro(self, thresholds, inclusive=False):
+        """
+        Get the F1 score, averaged over both classes, for one or more thresholds. Matches sklearn's
+        f1_score(average='macro'), with 0.0 used for a class where the score is undefined.
+        """
+        return count_metrics.f1_macro(*self.counts(thresholds, inclusive))
+
+    def roc_point(self, thresholds, inclusive=False):
+        """
+        Get the false positive rate and true positive rate for one or more thresholds: the point on the ROC curve
+        corresponding to each threshold.
+        """
+        tp, fp, fn, tn = self.counts(thresholds, inclusive)
+        fpr = fp / self.n_neg if self.n_neg else np.zeros_like(fp, dtype=float)
+        tpr = tp / self.n_pos if self.n_pos else np.zeros_like(tp, dtype=float)
+        return fpr, tpr
+
+    def roc_curve(self):
+        """
+        Get the ROC curve, as returned by sklearn's roc_curve() with its default arguments: arrays of the false positive
+        rates, true positive rates and thresholds, from the highest threshold (np.inf) to the lowest.
+        """
+        if 'roc' not in self._curves:
+            tps, fps, thresholds = self.__distinct_counts()
+            if len(fps) > 2:
+                # Drop points collinear with their neighbours, which do not change the curve or its area
+                keep = np.flatnonzero(np.r_[True, np.logical_or(np.diff(fps, 2), np.diff(tps, 2)), True])
+                tps, fps, thresholds = tps[keep], fps[keep], thresholds[keep]
+            tps = np.r_[0, tps]
+            fps = np.r_[0, fps]
+            thresholds = np.r_[np.inf, thresholds]
+            fpr = fps / self.n_neg if self.n_neg else np.repeat(np.nan, len(fps))
+            tpr = tps / self.n_pos if self.n_pos else np.repeat(np.nan, len(tps))
+            self._curves['roc'] = (fpr, tpr, thresholds)
+        return self._curves['roc']
+
+    def roc_auc(self):
+        """
+        Get the area under the ROC curve. This is nan where only one class is present.
+        """
+        if 'roc_auc' not in self._curves:
+            fpr, tpr, _ = self.roc_curve()
+            self._curves['roc_auc'] = (float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+                                      if (self.n_pos and self.n_neg) else np.nan)
+        return self._curves['roc_auc']
+
+    def pr_curve(self):
+        """
+        Get the precision-recall curve, as returned by sklearn's precision_recall_curve() with its default arguments:
+        arrays of the precisions, recalls and thresholds, with the thresholds in increasing order and a final point of
+        precision 1.0 and recall 0.0.
+        """
+        if 'pr' not in self._curves:
+            tps, fps, thresholds = self.__distinct_counts()
+            predicted = tps + fps
+            precision = np.divide(tps, predicted, out=np.zeros(len(tps)), where=predicted != 0)
+            recall = tps / self.n_pos if self.n_pos else np.ones(len(tps))
+            self._curves['pr'] = (np.r_[precision[::-1], 1.0], np.r_[recall[::-1], 0.0], thresholds[::-1])
+        return self._curves['pr']
+
+    def average_precision(self):
+        """
+        Get the average precision, as with sklearn's average_precision_score().
+        """
+        if 'average_precision' not in self._curves:
+            precision, recall, _ = self.pr_curve()
+            self._curves['average_precision'] = float(-np.sum(np.diff(recall) * precision[:-1]))
+        return self._curves['average_precision']
+
+    def __distinct_counts(self):
+        """
+        Get the number of records of each class at or above each distinct score, from the highest score to the lowest.
+        """
+        sorted_scores = self.sorted_scores
+        first_idx = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])[::-1]
+        return self.n_pos - self.cum_pos[first_idx], self.n_neg - self.cum_neg[first_idx], sorted_scores[first_idx]
+
+
+class CurveCache:
+    """
+    A small least-recently-used cache of ThresholdSweeps, so that repeated calls on the same predictions (for example,
+    calling several display methods in turn on a large validation set) sort the scores and calculate the curves only
+    once.
+
+    Entries are keyed by a hash of the contents of the arrays, not their identity, so a modified array is never
+    matched to a stale entry.
+    """
+
+    def __init__(self, max_size=8):
+        """
+        :param max_size: int
+            The maximum number of sweeps held. 0 disables the cache.
+        """
+        self.max_size = max_size
+        self._sweeps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._sweeps)
+
+    def get(self, y_true, target_classes, y_pred_proba):
+        """
+        Get the ThresholdSweep for a set of binary predictions, creating it if not already held.
+
+        :param y_true: array
+            True labels for each record
+        :param target_classes: array
+            Set of two labels, with the negative class first and the positive class second. For one-vs-rest curves
+            in multi-class classification, only the positive class (the class of interest) need be a true label.
+        :param y_pred_proba: array of floats
+            Predicted probabilities of the positive class. May be a 1d array or a 2d array with one column per class.
+        :return: ThresholdSweep
+        """
+        target_classes = [str(x) for x in target_classes]
+        y_pred_proba = np.asarray(y_pred_proba, dtype=float)
+        if y_pred_proba.ndim == 2:
+            y_pred_proba = y_pred_proba[:, 1]
+        is_positive = pd.Series(y_true).astype(str).to_numpy() == target_classes[1]
+
+        key = self.__key(is_positive, y_pred_proba)
+        if key in self._sweeps:
+            self.hits += 1
+            self._sweeps.move_to_end(key)
+            return self._sweeps[key]
+
+        self.misses += 1
+        # The labels have already been compared to the positive class, so pass the result as the labels
+        sweep = ThresholdSweep(is_positive, [False, True], y_pred_proba)
+        sweep.target_classes = target_classes
+        if self.max_size > 0:
+            self._sweeps[key] = sweep
+            if len(self._sweeps) > self.max_size:
+                self._sweeps.popitem(last=False)
+        return sweep
+
+    def clear(self):
+        self._sweeps.clear()
+
+    @staticmethod
+    def __key(is_positive, y_pred_proba):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.packbits(is_positive).tobytes())
+        digest.update(np.ascontiguousarray(y_pred_proba).tobytes())
+        return len(y_pred_proba), digest.hexdigest()
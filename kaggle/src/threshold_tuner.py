@@ -1,48 +1,107 @@
+import functools
+import sys
+import warnings
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import f1_score, brier_score_loss, auc, roc_auc_score, roc_curve, \
-    RocCurveDisplay, precision_score, recall_score, confusion_matrix, ConfusionMatrixDisplay
-from IPython import get_ipython
-from IPython.display import display, Markdown
-from tqdm import tqdm
-import warnings
-warnings.filterwarnings("ignore", category=UserWarning)
+from headless_tuner import HeadlessThresholdTuner
+
+# matplotlib, seaborn, sklearn's display classes, IPython and tqdm are imported within the methods that render output,
+# so that importing this module (for example, only to call get_predictions()) stays cheap. Nothing here changes global
+# state such as warning filters or pandas display options.
+
+# The pandas display options used when printing tables outside of a notebook. Within a notebook, the notebook
+# controls the display settings.
+DISPLAY_OPTIONS = {
+    'display.width': 32000,
+    'display.max_columns': 3000,
+    'display.max_colwidth': 3000,
+    'display.max_rows': 5000,
+}
 
 
 def is_notebook():
     """
     Determine if we are currently operating in a notebook, such as Jupyter. Returns True if so, False otherwise.
     """
-    try:
-        shell = get_ipython().__class__.__name__
-        if shell == 'ZMQInteractiveShell':
-            return True   # Jupyter notebook or qtconsole
-        elif shell == 'TerminalInteractiveShell':
-            return False  # Terminal running IPython
-        else:
-            return False  # Other type
-    except NameError:
-        return False      # Probably standard Python interpreter
+    # If IPython has not been imported, we cannot be running within it.
+    ipython = sys.modules.get('IPython')
+    if ipython is None:
+        return False
+    shell = ipython.get_ipython().__class__.__name__
+    if shell == 'ZMQInteractiveShell':
+        return True   # Jupyter notebook or qtconsole
+    elif shell == 'TerminalInteractiveShell':
+        return False  # Terminal running IPython
+    else:
+        return False  # Other type, or a standard Python interpreter
+
+
+def show(obj):
+    """
+    Display a DataFrame (or other object) using the notebook's display where available, and otherwise print it
+    with DISPLAY_OPTIONS applied for the duration of the call.
+    """
+    if is_notebook():
+        from IPython.display import display
+        display(obj)
+    else:
+        with pd.option_context(*[x for option in DISPLAY_OPTIONS.items() for x in option]):
+            print(obj)
+
+
+def show_markdown(msg, prefix=''):
+    """
+    Display a message as Markdown within a notebook, with the prefix (for example '## ') prepended. Outside a
+    notebook, the message is printed without the prefix.
+    """
+    if is_notebook():
+        from IPython.display import display, Markdown
+        display(Markdown(f'{prefix}{msg}'))
+    else:
+        print(msg)
 
 
-# This tool will generally be used within a notebook. In that case, the notebook should control the display settings.
-if not is_notebook():
-    pd.set_option('display.width', 32000)
-    pd.set_option('display.max_columns', 3000)
-    pd.set_option('display.max_colwidth', 3000)
-    pd.set_option('display.max_rows', 5000)
+def suppress_user_warnings(func):
+    """
+    Decorator to ignore UserWarnings (mostly from seaborn and undefined metrics) while rendering, without changing
+    the warning filters outside the call.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=UserWarning)
+            return func(*args, **kwargs)
+    return wrapper
 
 
-class ClassificationThresholdTuner:
-    def __init__(self):
+class ClassificationThresholdTuner(HeadlessThresholdTuner):
+    def __init__(self, cache_size=8, distribution_plot='swarm', max_roc_points=1000):
+        """
+        :param cache_size: int
+            See HeadlessThresholdTuner.
+        :param distribution_plot: str
+            How the distribution of the predicted probabilities for each class is drawn. 'swarm' draws a swarm plot of
+            a sample of up to 1000 records per class. 'binned' draws a strip of histogram bars for each class using
+            every record, which takes roughly the same time for 10 thousand or 10 million records, and is
+            recommended for large datasets.
+        :param max_roc_points: int
+            The maximum number of points drawn for an ROC curve. The curve is thinned evenly along its length, which
+            is not visible at this resolution. The AUC and the points marked for thresholds use the full curve. None
+            draws every point.
+        """
+        super().__init__(cache_size)
+        if distribution_plot not in ('swarm', 'binned'):
+            raise ValueError("distribution_plot must be 'swarm' or 'binned'")
+        self.distribution_plot = distribution_plot
+        self.max_roc_points = max_roc_points
         self.colors = ['lightseagreen', 'blue', 'olive', 'brown', 'goldenrod', 'purple', 'pink', 'grey',
                        'indigo', 'orchid', 'cyan', 'lightcoral', 'darksalmon', 'chocalate', 'peachpuff',
                        'teal', 'lime', 'turquoise', 'darkslategrey', 'skyblue', 'slateblue', 'thistle', 'plum',
                        'orange']
 
     @staticmethod
+    @suppress_user_warnings
     def print_stats_labels(y_true, target_classes, y_pred):
         """
         Display basic metrics related to the predictions. This is method is called by print_stats_proba(), but can
@@ -57,38 +116,11 @@ class ClassificationThresholdTuner:
         :return: None
         """
 
-        # Ensure y_true and y_pred are in the same format
-        y_true = pd.Series(y_true).astype(str)
-        y_pred = pd.Series(y_pred).astype(str)
-        target_classes = [str(x) for x in target_classes]
-
-        # Print a summary of the basic binary metrics: precision, recall, F1
-        prec_arr = precision_score(y_true, y_pred, labels=target_classes, average=None)
-        rec_arr  = recall_score(y_true, y_pred, labels=target_classes, average=None)
-        f1_arr   = f1_score(y_true, y_pred, labels=target_classes, average=None)
-
-        display_df = pd.DataFrame(columns=['Metric'] + target_classes)
-        display_df = pd.concat([display_df, pd.DataFrame([['Precision'] + prec_arr.tolist()], columns=display_df.columns)])
-        display_df = pd.concat([display_df, pd.DataFrame([['Recall']    + rec_arr.tolist()],  columns=display_df.columns)])
-        display_df = pd.concat([display_df, pd.DataFrame([['F1']        + f1_arr.tolist()],   columns=display_df.columns)])
-        display_df['Macro'] = [precision_score(y_true, y_pred, average='macro'),
-                               recall_score(y_true, y_pred, average='macro'),
-                               f1_score(y_true, y_pred, average='macro')]
-        if is_notebook():
-            display(display_df)
-        else:
-            print(display_df)
-
-        # Display a confusion matrix
-        n_classes = len(target_classes)
-        fig, ax = plt.subplots(figsize=(max(3, n_classes*1.1), max(3, n_classes*1.1)))
-        cm = confusion_matrix(y_true, y_pred, labels=target_classes)
-        disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_classes)
-        disp.plot(cmap='Blues', values_format=',', xticks_rotation="vertical", ax=ax)
-        plt.title("Confusion Matrix")
-        plt.show()
+        ClassificationThresholdTuner.__show_label_stats(
+            HeadlessThresholdTuner.stats_labels(y_true, target_classes, y_pred))
 
     @staticmethod
+    @suppress_user_warnings
     def print_stats_table(y_true, target_classes, y_pred_proba, num_ranges=10):
         """
         Currently, this is available only for binary classification. It provides a breakdown of the precision and
@@ -118,76 +150,25 @@ class ClassificationThresholdTuner:
 
         :return: None
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
-        if len(target_classes) > 2:
-            print("This method is currently available only for binary classification")
-
-        y_true = pd.Series(y_true).astype(str)
-        y_pred_proba = np.array(y_pred_proba)
-        target_classes = [str(x) for x in target_classes]
-
-        if y_pred_proba.ndim == 2:
-            y_pred_proba = y_pred_proba[:, 1]
+        try:
+            stats = HeadlessThresholdTuner.stats_table(y_true, target_classes, y_pred_proba, num_ranges)
+        except ValueError as e:
+            print(e)
+            return
 
-        d = pd.DataFrame({"Y": y_true, "Proba": y_pred_proba})
-        total_class_1 = y_true.tolist().count(target_classes[1])
-        d['Rank'] = d['Proba'].rank(pct=True)
-        size_range = 1.0 / num_ranges
-        start_range = 0.0
-        end_range = size_range
-        rows = []
-        for i in range(num_ranges):
-            sub_d = d[(d['Rank'] >= start_range) & (d['Rank'] < end_range)]
-            rows.append([start_range,
-                         end_range,
-                         sub_d['Proba'].min(),
-                         sub_d['Proba'].max(),
-                         sub_d['Y'].tolist().count(target_classes[0]),
-                         sub_d['Y'].tolist().count(target_classes[1]),
-                         len(sub_d),
-                         (sub_d['Y'].tolist().count(target_classes[1]) / len(sub_d)) if len(sub_d) else 0,
-                         sub_d['Y'].tolist().count(target_classes[1]) / total_class_1
-                         ])
-            start_range = end_range
-            end_range = end_range + size_range
-            if (end_range + size_range) > 100.0:
-                end_range = 100.0
-
-        display_df = pd.DataFrame(
-            rows,
-            columns=['Start Range %',
-                     'End Range %',
-                     'Min Probability',
-                     'Max Probability',
-                     f'Count {target_classes[0]}',
-                     f'Count {target_classes[1]}',
-                     'Total Count',
-                     'Precision',
-                     'Recall'
-                     ]
-        )
-        display_df = display_df.iloc[::-1]
-        display_df = display_df.reset_index(drop=True)
-        display_df[f'Cumulative Count {target_classes[1]}'] = display_df[f'Count {target_classes[1]}'].cumsum()
-        display_df[f'Cumulative Total Count'] = display_df['Total Count'].cumsum()
-        display_df['Cumulative Precision'] = display_df[f'Cumulative Count {target_classes[1]}'] / \
-                                             display_df[f'Cumulative Total Count']
-        display_df['Cumulative Recall'] = display_df[f'Cumulative Count {target_classes[1]}'] / total_class_1
-
-        if is_notebook():
-            display(display_df)
-        else:
-            print(display_df)
+        show(stats.table)
 
-        display_df = display_df.dropna()
-        display_df['Mid Probability'] = (display_df['Min Probability'] + display_df['Max Probability']) / 2.0
         fig, ax = plt.subplots()
-        sns.lineplot(x=display_df['Mid Probability'], y=display_df['Cumulative Precision'], label='Cumulative Precision')
-        sns.lineplot(x=display_df['Mid Probability'], y=display_df['Cumulative Recall'], label='Cumulative Recall')
+        sns.lineplot(x=stats.mid_probability, y=stats.cumulative_precision, label='Cumulative Precision')
+        sns.lineplot(x=stats.mid_probability, y=stats.cumulative_recall, label='Cumulative Recall')
         ax.set_ylabel("")
-        ax.set_xlabel(f"Predicted Probability of '{target_classes[1]}'")
+        ax.set_xlabel(f"Predicted Probability of '{stats.target_classes[1]}'")
         plt.show()
 
+    @suppress_user_warnings
     def print_stats_proba(self, y_true, target_classes, y_pred_proba, default_class=None, thresholds=None):
         """
         Presents a summary of the quality of the predicted probabilities. This calls print_stats_labels() using the
@@ -215,6 +196,8 @@ class ClassificationThresholdTuner:
             default behaviour will be used to determine the class predictions.
         :return: None
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         def two_classes():
             nonlocal thresholds
@@ -233,29 +216,17 @@ class ClassificationThresholdTuner:
             else:
                 threshold = thresholds
 
-            # Ensure y_true is in {0, 1} format
-            y_true_zero_one = y_true.map({target_classes[0]: 0, target_classes[1]: 1})
-
-            display_df = pd.DataFrame(
-                [['Brier Score', brier_score_loss(y_true_zero_one, y_pred_proba)],
-                 ['AUROC',       roc_auc_score(   y_true_zero_one, y_pred_proba)]],
-                columns=['Metric', 'Score']
-            )
-            if is_notebook():
-                display(display_df)
-            else:
-                print(display_df)
+            display_df = stats.scores[target_classes[1]]
+            show(display_df)
 
             fig, ax = plt.subplots()
-            fpr, tpr, roc_thresholds = roc_curve(y_true_zero_one, y_pred_proba)
-            roc_auc = auc(fpr, tpr)
-            roc_display = RocCurveDisplay(fpr=fpr, tpr=tpr, roc_auc=roc_auc, estimator_name='')
-            roc_display.plot(ax=ax)
+            roc = stats.roc_curves[target_classes[1]]
+            self.__plot_roc(roc, ax)
             plt.legend().remove()
             plt.title(f"Area Under ROC Curve (point shown using threshold of {threshold:.5f})")
 
             # Display an indication of where the current threshold is
-            self.__add_roc_lines(fpr, tpr, roc_thresholds, threshold, ax)
+            self.__add_roc_lines(roc.fpr, roc.tpr, roc.thresholds, threshold, ax)
             plt.show()
 
             fig, ax = plt.subplots(nrows=2, sharex=True, figsize=(6, 7))
@@ -265,15 +236,21 @@ class ClassificationThresholdTuner:
             ax[0].axvline(threshold)
             swarm_ax = ax[1]
 
-            d_sample = self.__get_sample_df(d, target_classes)
+            if self.distribution_plot == 'binned':
+                colour_codes, palette = self.__get_colour_codes_binary(d['Y'], d['Pred_Proba'], target_classes,
+                                                                       threshold)
+                self.__plot_binned(swarm_ax, d['Pred_Proba'], d['Y'], target_classes, colour_codes, palette,
+                                   x_label="Pred_Proba")
+            else:
+                d_sample = self.__get_sample_df(d, target_classes)
 
-            swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
-            d, colors = self.__get_colour_code_binary(d_sample, target_classes, threshold)
-            sns.swarmplot(data=d, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, palette=colors,
-                          hue='colour_code', order=target_classes, ax=swarm_ax)
+                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+                d, colors = self.__get_colour_code_binary(d_sample, target_classes, threshold)
+                sns.swarmplot(data=d, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, palette=colors,
+                              hue='colour_code', order=target_classes, ax=swarm_ax)
+                swarm_ax.get_legend().remove()
 
             swarm_ax.axvline(threshold)
-            swarm_ax.get_legend().remove()
             plt.suptitle("Distribution of Prediction Probabilities by True Class")
             plt.tight_layout()
             plt.show()
@@ -293,22 +270,11 @@ class ClassificationThresholdTuner:
 
             nonlocal thresholds
 
-            # Ensure y_true is in {0, 1} format, necessary to calculate brier score and AUROC
-            y_true_zero_one = y_true.map({target_classes[0]: 0, target_classes[1]: 1})
-
-            display_df = pd.DataFrame(
-                [['Brier Score', brier_score_loss(y_true_zero_one, y_pred_proba)],
-                 ['AUROC',       roc_auc_score(   y_true_zero_one, y_pred_proba)]],
-                columns=['Metric', 'Score']
-            )
+            display_df = stats.scores[target_classes[1]]
             msg = (f"Brier score and AUROC calculated based on predicting '{target_classes[1]}', "
                    f"vs not '{target_classes[1]}', so calculated as a two-class problem.")
-            if is_notebook():
-                display(display_df)
-                display(Markdown(f'{msg}'))
-            else:
-                print(display_df)
-                print(msg)
+            show(display_df)
+            show_markdown(msg)
 
             cm_row_df = pd.DataFrame([cm[target_class_idx]], columns=target_classes_orig)
             msg = (f"Displaying the row of the confusion matrix for the current target ({target_classes[1]}). This "
@@ -317,6 +283,7 @@ class ClassificationThresholdTuner:
                    f"this row. Red dots in other rows in the swarm plot may predict any class other than the correct "
                    f"class.")
             if is_notebook():
+                from IPython.display import display, Markdown
                 display(Markdown(f'<br><br>{msg}'))
                 display(cm_row_df.style.apply(
                     styling_flagged_rows,
@@ -333,10 +300,8 @@ class ClassificationThresholdTuner:
 
             fig, ax = plt.subplots(ncols=4, figsize=(13, 3.5), gridspec_kw={'width_ratios': [1, 1, 1, 1]})
 
-            fpr, tpr, roc_thresholds = roc_curve(y_true_zero_one, y_pred_proba)
-            roc_auc = auc(fpr, tpr)
-            roc_display = RocCurveDisplay(fpr=fpr, tpr=tpr, roc_auc=roc_auc, estimator_name='')
-            roc_display.plot(ax=ax[0])
+            roc = stats.roc_curves[target_classes[1]]
+            self.__plot_roc(roc, ax[0])
             ax[0].get_legend().remove()
 
             if target_classes_orig[target_class_idx] != default_class:
@@ -346,7 +311,7 @@ class ClassificationThresholdTuner:
 
             # Display an indication of where the current threshold is. Thresholds do not apply to the default class.
             if target_classes_orig[target_class_idx] != default_class:
-                self.__add_roc_lines(fpr, tpr, roc_thresholds, thresholds[target_class_idx], ax[0])
+                self.__add_roc_lines(roc.fpr, roc.tpr, roc.thresholds, thresholds[target_class_idx], ax[0])
 
             # Ensure there are enough colours defined, repeating as necessary
             if len(target_classes_orig) > len(self.colors):
@@ -379,32 +344,36 @@ class ClassificationThresholdTuner:
             ax[2].set_xlabel(f"Predicted probability of {target_classes[1]}")
             ax[2].set_title("Distribution of Probabilities \n(On the same scale)")
 
-            d['Pred'] = self.get_predictions(target_classes_orig, y_pred_proba_orig, default_class, thresholds)
-            d_sample = self.__get_sample_df(d, target_classes_orig)
-            swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+            d['Pred'] = stats.predictions
+            if self.distribution_plot == 'binned':
+                colour_codes, palette = self.__get_colour_codes_multi(d['Y'], d['Pred'], target_classes_orig)
+                self.__plot_binned(ax[3], d['Pred_Proba'], d['Y'], target_classes_orig, colour_codes, palette)
+            else:
+                d_sample = self.__get_sample_df(d, target_classes_orig)
+                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
 
-            # Set the colours for the correct and incorrect predictions for each class
-            d_sample['colour_code'] = 'xxx'
-            colors = []
-            for tc_idx, tc in enumerate(target_classes_orig):
-                d_right = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] == tc)]
-                if not d_right.empty:
-                    d_sample.loc[d_right.index, 'colour_code'] = str(tc_idx*2)
-                    colors.append(self.colors[tc_idx])
-                d_wrong = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] != tc)]
-                if not d_wrong.empty:
-                    d_sample.loc[d_wrong.index, 'colour_code'] = str(tc_idx*2 + 1)
-                    colors.append('red')
-            d_sample['colour_code'] = d_sample['colour_code'].astype(int)
-            d_sample = d_sample.sort_values('colour_code')
-
-            # Draw the swarm plot
-            sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, palette=colors,
-                          hue='colour_code', order=target_classes_orig, ax=ax[3])
+                # Set the colours for the correct and incorrect predictions for each class
+                d_sample['colour_code'] = 'xxx'
+                colors = []
+                for tc_idx, tc in enumerate(target_classes_orig):
+                    d_right = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] == tc)]
+                    if not d_right.empty:
+                        d_sample.loc[d_right.index, 'colour_code'] = str(tc_idx*2)
+                        colors.append(self.colors[tc_idx])
+                    d_wrong = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] != tc)]
+                    if not d_wrong.empty:
+                        d_sample.loc[d_wrong.index, 'colour_code'] = str(tc_idx*2 + 1)
+                        colors.append('red')
+                d_sample['colour_code'] = d_sample['colour_code'].astype(int)
+                d_sample = d_sample.sort_values('colour_code')
+
+                # Draw the swarm plot
+                sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, palette=colors,
+                              hue='colour_code', order=target_classes_orig, ax=ax[3])
+                ax[3].get_legend().remove()
             if target_classes_orig[target_class_idx] != default_class:
                 ax[3].axvline(thresholds[target_class_idx])
             ax[3].set_xlabel(f"Predicted probability of {target_classes[1]}")
-            ax[3].get_legend().remove()
             plt.tight_layout()
             plt.show()
 
@@ -420,10 +389,14 @@ class ClassificationThresholdTuner:
             for target_class_idx, target_class in enumerate(target_classes):
                 d_class = pd.DataFrame({'Y': y_true})
                 d_class['Pred_Proba'] = y_pred_proba[:, target_class_idx]
-                d_sample = self.__get_sample_df(d_class, target_classes)
-                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
-                sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, order=target_classes,
-                    palette=self.colors[:n_true_classes], ax=ax[target_class_idx])
+                if self.distribution_plot == 'binned':
+                    self.__plot_binned(ax[target_class_idx], d_class['Pred_Proba'], d_class['Y'], target_classes,
+                                       palette=self.colors[:len(target_classes)])
+                else:
+                    d_sample = self.__get_sample_df(d_class, target_classes)
+                    swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+                    sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size,
+                                  order=target_classes, palette=self.colors[:n_true_classes], ax=ax[target_class_idx])
                 if thresholds:
                     ax[target_class_idx].axvline(thresholds[target_class_idx])
                 ax[target_class_idx].set_title(f"Each true class by the \npredicted probability of \n'{target_class}'")
@@ -438,10 +411,14 @@ class ClassificationThresholdTuner:
                 d_class = d[d["Y"] == target_class]
                 d.loc[d_class.index, "Probability of True Class"] = y_pred_proba[d_class.index, target_class_idx]
             fig, ax = plt.subplots(figsize=(5, 3.5))
-            d_sample = self.__get_sample_df(d, target_classes)
-            swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
-            sns.swarmplot(data=d_sample, orient='h', x="Probability of True Class", y="Y", s=swarm_dot_size,
-                          order=target_classes, palette=self.colors[:n_true_classes])
+            if self.distribution_plot == 'binned':
+                self.__plot_binned(ax, d['Probability of True Class'], d['Y'], target_classes,
+                                   palette=self.colors[:len(target_classes)], x_label="Probability of True Class")
+            else:
+                d_sample = self.__get_sample_df(d, target_classes)
+                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+                sns.swarmplot(data=d_sample, orient='h', x="Probability of True Class", y="Y", s=swarm_dot_size,
+                              order=target_classes, palette=self.colors[:n_true_classes])
             plt.title("Each class by predicted probability of that class")
             plt.tight_layout()
             plt.show()
@@ -458,10 +435,7 @@ class ClassificationThresholdTuner:
                 if target_class == default_class:
                     default_str = ' (the default class)'
                 msg = f"Examining the results in terms of class '{target_class}'{default_str} vs all"
-                if is_notebook():
-                    display(Markdown(f'## {msg}'))
-                else:
-                    print(msg)
+                show_markdown(msg, prefix='## ')
                 y_true = y_true_orig.map({target_class: target_class})
                 negative_class = f"NOT {target_class}"
                 y_true = y_true.fillna(negative_class)
@@ -469,39 +443,24 @@ class ClassificationThresholdTuner:
                 target_classes = [negative_class, target_class]
                 two_classes_horizontal(target_class_idx, y_true_orig, target_classes_orig, y_pred_proba_orig, cm)
 
-        y_true = pd.Series(y_true).astype(str)
-        y_pred_proba = np.array(y_pred_proba)
-        target_classes = [str(x) for x in target_classes]
-
-        if len(target_classes) == 1:
-            print("target_classes must have at least two distinct values")
+        try:
+            stats = self.stats_proba(y_true, target_classes, y_pred_proba, default_class, thresholds)
+        except ValueError as e:
+            print(e)
             return
-        elif len(target_classes) == 2:
-            if (not ((y_pred_proba.ndim == 1) or (len(y_pred_proba[0]) == 1))) and (not (len(y_pred_proba[0]) == 2)):
-                print("Where there are two target classes, each element of y_pred_proba must have either 1 or 2 values")
-                return
-        else:
-            if len(y_pred_proba[0]) != len(target_classes):
-                print("The shape of y_pred_proba does not match the number of target classes")
-                return
 
-        if len(target_classes) == 2:
-            if default_class:
-                print("Default class not used with binary classification.")
-        else:
-            if (default_class and not thresholds) or (not default_class and thresholds):
-                print("Either specify both of default_class and threshold, or neither. Exiting.")
-                return
+        y_true = pd.Series(y_true).astype(str)
+        y_pred_proba = np.array(y_pred_proba)
+        target_classes = stats.target_classes
 
-        if default_class and (default_class not in target_classes):
-            print("default_class is not in target_classes. Exiting.")
-            return
+        if len(target_classes) == 2 and default_class:
+            print("Default class not used with binary classification.")
 
         d = pd.DataFrame({"Y": y_true})
         true_labels = d['Y'].unique()
-        d['Pred'] = self.get_predictions(target_classes, y_pred_proba, default_class, thresholds)
-        self.print_stats_labels(y_true, target_classes, d['Pred'])
-        cm = confusion_matrix(y_true, d['Pred'], labels=target_classes)
+        d['Pred'] = stats.predictions
+        self.__show_label_stats(stats.label_stats)
+        cm = stats.label_stats.confusion_matrix
 
         if len(target_classes) == 2:
             if default_class is not None:
@@ -513,6 +472,7 @@ class ClassificationThresholdTuner:
             else:
                 multi_class_with_default(cm)
 
+    @suppress_user_warnings
     def plot_by_threshold(self, y_true, target_classes, y_pred_proba, default_class=None, start=0.1, end=0.9, num_steps=9):
         """
         Plot the effects of each of a range of threshold values. For multi-class classification, this uses the
@@ -537,6 +497,10 @@ class ClassificationThresholdTuner:
             The number of thresholds
         :return: None
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from sklearn.metrics import ConfusionMatrixDisplay
+        from tqdm import tqdm
 
         def two_class():
             """
@@ -552,38 +516,41 @@ class ClassificationThresholdTuner:
 
             d = pd.DataFrame({"Y": y_true, "Pred_Proba": y_pred_proba})
 
+            # The same sample is used for the swarm plot of every threshold.
+            if self.distribution_plot == 'swarm':
+                sample = self.__get_sample_df(d, target_classes)
+                swarm_dot_size = self.__get_swarmplot_dot_size(len(sample), y_true)
+
             fig, ax = plt.subplots(ncols=3, nrows=num_plots, sharex=False, figsize=(13, num_plots*3),
                                    gridspec_kw={'width_ratios': [4, 7, 3]})
-            # Ensure y_true is in {0, 1} format
-            y_true_zero_one = y_true.map({target_classes[0]: 0, target_classes[1]: 1})
-            fpr, tpr, roc_thresholds = roc_curve(y_true_zero_one, y_pred_proba)
-            roc_auc = auc(fpr, tpr)
+            roc = stats.roc_curve
 
             plot_idx = 0
             for threshold in tqdm(thresholds):
                 # Draw an ROC curve, with the current threshold indicated.
-                roc_display = RocCurveDisplay(fpr=fpr, tpr=tpr, roc_auc=roc_auc, estimator_name='')
-                roc_display.plot(ax=ax[plot_idx][0])
-                self.__add_roc_lines(fpr, tpr, roc_thresholds, threshold, ax[plot_idx][0])
+                self.__plot_roc(roc, ax[plot_idx][0])
+                self.__add_roc_point(stats.fpr[plot_idx], stats.tpr[plot_idx], ax[plot_idx][0])
                 ax[plot_idx][0].get_legend().remove()
 
                 # Draw a swarm plot indicating the distribution of probabilities for both classes
-                d_sample = self.__get_sample_df(d, target_classes)
-                d_sample, colors = self.__get_colour_code_binary(d_sample, target_classes, threshold)
-                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
-                sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", size=swarm_dot_size, palette=colors,
-                              hue='colour_code', order=target_classes, ax=ax[plot_idx][1])
+                if self.distribution_plot == 'binned':
+                    colour_codes, palette = self.__get_colour_codes_binary(d['Y'], d['Pred_Proba'], target_classes,
+                                                                           threshold)
+                    self.__plot_binned(ax[plot_idx][1], d['Pred_Proba'], d['Y'], target_classes, colour_codes,
+                                       palette, x_label="Pred_Proba")
+                else:
+                    d_sample, colors = self.__get_colour_code_binary(sample.copy(), target_classes, threshold)
+                    sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", size=swarm_dot_size,
+                                  palette=colors, hue='colour_code', order=target_classes, ax=ax[plot_idx][1])
+                    ax[plot_idx][1].get_legend().remove()
                 ax[plot_idx][1].axvline(threshold)
                 ax[plot_idx][1].set_title(f"Threshold: {threshold:.3f}")
-                ax[plot_idx][1].get_legend().remove()
 
-                # Draw a confusion matrix. This is actually the slowest of the three plots. The np.where statement
-                # is very fast (usually about 0.01s), but the remaining code can take 5 or 6s with 1M records.
-                d['Pred'] = np.where(d["Pred_Proba"] > threshold, target_classes[1], target_classes[0])
-                cm = confusion_matrix(y_true, d['Pred'], labels=target_classes)
-                disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_classes)
+                # Draw a confusion matrix.
+                disp = ConfusionMatrixDisplay(confusion_matrix=stats.confusion_matrices[plot_idx],
+                                              display_labels=target_classes)
                 disp.plot(cmap='Blues', values_format=',', ax=ax[plot_idx][2])
-                ax[plot_idx][2].set_title(f"F1 (macro) Score: {f1_score(y_true, d['Pred'], average='macro'):.3f}")
+                ax[plot_idx][2].set_title(f"F1 (macro) Score: {stats.f1_macro[plot_idx]:.3f}")
 
                 plot_idx += 1
 
@@ -598,10 +565,7 @@ class ClassificationThresholdTuner:
             """
             msg = ("Displaying thresholds where a common threshold is applied to all classes (other than the default "
                    "class). Red indicates misclassified records.")
-            if is_notebook():
-                display(Markdown(f'{msg}'))
-            else:
-                print(msg)
+            show_markdown(msg)
 
             d = pd.DataFrame(y_pred_proba, columns=target_classes)
             d['Y'] = y_true
@@ -612,58 +576,65 @@ class ClassificationThresholdTuner:
 
             plot_idx = 0
             for threshold in tqdm(thresholds):
-                d['Pred'] = self.get_predictions(target_classes, y_pred_proba, default_class, [threshold]*len(target_classes))
+                d['Pred'] = np.array(target_classes)[stats.predictions[plot_idx]]
 
                 # Draw a swarm plot for each target class (each shows all classes, but has the probability of
                 # the current class on the x-axis
+                if self.distribution_plot == 'binned':
+                    colour_codes, palette = self.__get_colour_codes_multi(d['Y'], d['Pred'], target_classes)
                 for target_class_idx, target_class in enumerate(target_classes):
-                    d_sample = self.__get_sample_df(d, target_classes)
-
-                    d_sample['colour_code'] = 'xxx'
-                    colors = []
-                    for tc_idx, tc in enumerate(target_classes):
-                        d_right = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] == tc)]
-                        if not d_right.empty:
-                            d_sample.loc[d_right.index, 'colour_code'] = str(tc_idx*2)
-                            colors.append(self.colors[tc_idx])
-                        d_wrong = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] != tc)]
-                        if not d_wrong.empty:
-                            d_sample.loc[d_wrong.index, 'colour_code'] = str(tc_idx*2 + 1)
-                            colors.append('red')
-                    d_sample['colour_code'] = d_sample['colour_code'].astype(int)
-                    d_sample = d_sample.sort_values('colour_code')
-
-                    swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true, len(thresholds))
-                    sns.swarmplot(data=d_sample, orient='h', x=target_class, y="Y", size=swarm_dot_size,
-                                  palette=colors, hue='colour_code', order=target_classes,
-                                  ax=ax[plot_idx][target_class_idx])
+                    if self.distribution_plot == 'binned':
+                        self.__plot_binned(ax[plot_idx][target_class_idx], d[target_class], d['Y'], target_classes,
+                                           colour_codes, palette)
+                    else:
+                        d_sample = self.__get_sample_df(d, target_classes)
+
+                        d_sample['colour_code'] = 'xxx'
+                        colors = []
+                        for tc_idx, tc in enumerate(target_classes):
+                            d_right = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] == tc)]
+                            if not d_right.empty:
+                                d_sample.loc[d_right.index, 'colour_code'] = str(tc_idx*2)
+                                colors.append(self.colors[tc_idx])
+                            d_wrong = d_sample[(d_sample['Y'] == tc) & (d_sample['Pred'] != tc)]
+                            if not d_wrong.empty:
+                                d_sample.loc[d_wrong.index, 'colour_code'] = str(tc_idx*2 + 1)
+                                colors.append('red')
+                        d_sample['colour_code'] = d_sample['colour_code'].astype(int)
+                        d_sample = d_sample.sort_values('colour_code')
+
+                        swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true, len(thresholds))
+                        sns.swarmplot(data=d_sample, orient='h', x=target_class, y="Y", size=swarm_dot_size,
+                                      palette=colors, hue='colour_code', order=target_classes,
+                                      ax=ax[plot_idx][target_class_idx])
+                        ax[plot_idx][target_class_idx].get_legend().remove()
                     if target_class != default_class:
                         ax[plot_idx][target_class_idx].axvline(threshold)
                         ax[plot_idx][target_class_idx].set_title(f"Threshold: {threshold:.3f}")
                     ax[plot_idx][target_class_idx].set_xlabel(f"Probabality of {target_class}")
-                    ax[plot_idx][target_class_idx].get_legend().remove()
 
                 # Draw a confusion matrix for the current threshold
-                cm = confusion_matrix(y_true, d['Pred'], labels=target_classes)
-                disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_classes)
+                disp = ConfusionMatrixDisplay(confusion_matrix=stats.confusion_matrices[plot_idx],
+                                              display_labels=target_classes)
                 disp.plot(cmap='Blues', values_format=',', ax=ax[plot_idx][len(target_classes)])
                 ax[plot_idx][len(target_classes)].set_xticks([])
-                ax[plot_idx][len(target_classes)].set_title(
-                    f"F1 (macro) Score: {f1_score(y_true, d['Pred'], average='macro'):.3f}")
+                ax[plot_idx][len(target_classes)].set_title(f"F1 (macro) Score: {stats.f1_macro[plot_idx]:.3f}")
 
                 plot_idx += 1
 
             plt.tight_layout()
             plt.show()
 
+        try:
+            stats = self.by_threshold(y_true, target_classes, y_pred_proba, default_class, start, end, num_steps)
+        except ValueError as e:
+            print(e)
+            return
+
         y_true = pd.Series(y_true).astype(str)
         y_pred_proba = np.array(y_pred_proba)
-        target_classes = [str(x) for x in target_classes]
-
-        step = (end - start) / (num_steps - 1)
-        thresholds = list(np.arange(start, end, step)) + [end]
-        thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
-        thresholds = sorted(list(set(thresholds)))
+        target_classes = stats.target_classes
+        thresholds = stats.thresholds.tolist()
         num_plots = len(thresholds)
 
         if len(target_classes) == 2:
@@ -671,6 +642,7 @@ class ClassificationThresholdTuner:
         else:
             multi_class()
 
+    @suppress_user_warnings
     def describe_slices(self, y_true, target_classes, y_pred_proba, start=0.1, end=0.9, num_slices=10):
         """
         Give the count & fraction of each class within each slice. Currently, this feature is available only for
@@ -686,22 +658,17 @@ class ClassificationThresholdTuner:
         :param num_slices: int
         :return: None
         """
-
-        def get_counts(sub_d, true_labels):
-            row = []
-            for label in true_labels:
-                row.append(sub_d['Y'].tolist().count(label))
-            return row
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         y_true = pd.Series(y_true).astype(str)
         y_pred_proba = np.array(y_pred_proba)
         target_classes = [str(x) for x in target_classes]
 
-        if len(target_classes) == 1:
-            print("The target_classes must have at least two unique values")
-            return
-        if len(target_classes) > 2:
-            print("describe_slices() is currently supported only for binary classification")
+        try:
+            slices = self.slices(y_true, target_classes, y_pred_proba, start, end, num_slices)
+        except ValueError as e:
+            print(e)
             return
 
         if y_pred_proba.ndim == 2:
@@ -714,8 +681,6 @@ class ClassificationThresholdTuner:
         step = (end - start) / num_slices
 
         # Draw swarm plot of the classes vs probabilities
-        d_sample = self.__get_sample_df(d, target_classes)
-        swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
         double_plot = False
         if step >= 0.1:
             fig, ax = plt.subplots(figsize=(6, 3.5))
@@ -725,11 +690,15 @@ class ClassificationThresholdTuner:
             ax0 = ax[0]
             double_plot = True
 
-        sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, order=target_classes,
-                      palette=self.colors[:len(true_labels)], ax=ax0)
-        thresholds = [0] + list(np.arange(start, end, step)) + [end, 1.0]
-        thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
-        thresholds = sorted(list(set(thresholds)))
+        if self.distribution_plot == 'binned':
+            self.__plot_binned(ax0, d['Pred_Proba'], d['Y'], target_classes, palette=self.colors[:len(target_classes)],
+                               x_label="Pred_Proba")
+        else:
+            d_sample = self.__get_sample_df(d, target_classes)
+            swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+            sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, order=target_classes,
+                          palette=self.colors[:len(true_labels)], ax=ax0)
+        thresholds = slices.edges
 
         for slice_idx, i in enumerate(thresholds):
             ax0.axvline(i)
@@ -740,14 +709,16 @@ class ClassificationThresholdTuner:
 
         if double_plot:
             d_range = d[(d['Pred_Proba'] > (start-step)) & (d['Pred_Proba'] < (end+step))]
-            d_sample = self.__get_sample_df(d_range, target_classes)
-            swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
-            sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size, order=target_classes,
-                          palette=self.colors[:len(true_labels)], ax=ax[1])
+            if self.distribution_plot == 'binned':
+                self.__plot_binned(ax[1], d_range['Pred_Proba'], d_range['Y'], target_classes,
+                                   palette=self.colors[:len(target_classes)], x_label="Pred_Proba",
+                                   x_range=(start - step, end + step))
+            else:
+                d_sample = self.__get_sample_df(d_range, target_classes)
+                swarm_dot_size = self.__get_swarmplot_dot_size(len(d_sample), y_true)
+                sns.swarmplot(data=d_sample, orient='h', x="Pred_Proba", y="Y", s=swarm_dot_size,
+                              order=target_classes, palette=self.colors[:len(true_labels)], ax=ax[1])
             ax[1].set_xlim((start - step, end + step))
-            thresholds = [0] + list(np.arange(start, end, step)) + [end, 1.0]
-            thresholds = [round(x, 10) for x in thresholds]  # Handle where two or more values are essentially the same
-            thresholds = sorted(list(set(thresholds)))
 
             for slice_idx, i in enumerate(thresholds):
                 ax[1].axvline(i)
@@ -760,25 +731,9 @@ class ClassificationThresholdTuner:
         plt.show()
 
         # Display a table summarizing each slice
-        display_rows = []
-        for slice_idx in range(len(thresholds)-1):
-            lower_range = thresholds[slice_idx]
-            upper_range = thresholds[slice_idx + 1]
-            sub_d = d[(d['Pred_Proba'] > lower_range) & (d['Pred_Proba'] <= upper_range)]
-            row = get_counts(sub_d, true_labels)
-            display_rows.append([slice_idx + 1, lower_range, upper_range] + row)
-        display_df = pd.DataFrame(display_rows, columns=['Slice', 'Min Prob', 'Max Prob'] + true_labels.tolist())
-
-        # Add columns to represent the labels as fractions of each slice
-        display_df['Total'] = display_df[true_labels].sum(axis=1)
-        for label in true_labels:
-            display_df[f"Fraction {label}"] = display_df[label] / display_df['Total']
-
-        if is_notebook():
-            display(display_df)
-        else:
-            print(display_df)
+        show(slices.table)
 
+    @suppress_user_warnings
     def tune_threshold(self, y_true, target_classes, y_pred_proba, metric, higher_is_better=True, default_class=None,
                        plot_thresholds=True, max_iterations=5, **kwargs):
         """
@@ -806,205 +761,33 @@ class ClassificationThresholdTuner:
         :return: For binary classification, returns a single threshold. For multi-class classification, returns a
             threshold for each class, with 0.0 set for the default class.
         """
-        def find_best_thresholds(iteration_num, min_range, max_range, plot_thresholds):
-            """
-            # Called in binary classification case. Finds the best threshold between min_range and max_range
-            (inclusive).
-            :param iteration_num: int
-            :param min_range: float
-            :param max_range: float
-            :param plot_thresholds: bool
-                If set True, a line plot is presented with each iteration.
-            :return:
-                1. bool indicating if all thresholds within the specified range lead to the same score.
-                2. [] if the bool is set True. Otherwise an array of threshold values sorted from the best to the worst.
-                Generally the first two of these may be used as the range for the next iteration, and the first of
-                these as the best threshold discovered so far.
-            """
-            test_vals = [min_range]
-            step = (max_range - min_range) / 10.0
-            for i in np.arange(min_range, max_range, step):
-                test_vals.append(i)
-            test_vals.append(max_range)
-            test_vals = list(set(test_vals))
-
-            scores_arr = []
-            one_d_y_pred_proba = y_pred_proba
-            if y_pred_proba.ndim > 1:
-                one_d_y_pred_proba = y_pred_proba[:, 1]
-
-            for threshold in test_vals:
-                pred = np.where(one_d_y_pred_proba >= threshold, target_classes[1], target_classes[0])
-                score = metric(y_true, pred, **kwargs)
-                scores_arr.append(score)
-            if len(set(scores_arr)) == 1:
-                return True, []
-
-            if plot_thresholds:
+        from tqdm import tqdm
+
+        is_binary = len(target_classes) == 2
+        try:
+            result = self.search_threshold(y_true, target_classes, y_pred_proba, metric, higher_is_better,
+                                           default_class, max_iterations,
+                                           progress=None if (is_binary and plot_thresholds) else tqdm, **kwargs)
+        except ValueError as e:
+            print(e)
+            return
+
+        if is_binary and plot_thresholds:
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+
+            for iteration_idx, iteration in enumerate(result.iterations):
+                if iteration.all_equal:
+                    continue
                 fig, ax = plt.subplots(figsize=(7, 1.5))
-                sns.lineplot(x=test_vals, y=scores_arr)
-                plt.title(f"Iteration: {iteration_num + 1} -- Score vs Threshold")
+                sns.lineplot(x=iteration.thresholds, y=iteration.scores)
+                plt.title(f"Iteration: {iteration_idx + 1} -- Score vs Threshold")
                 ax.set_xlabel("Threshold")
                 ax.set_ylabel("Score")
                 plt.ticklabel_format(style='plain', axis='y')
                 plt.show()
 
-            if higher_is_better:
-                sorted_thresholds = pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index[::-1].tolist()].values.tolist()
-            else:
-                sorted_thresholds = pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index.tolist()].values.tolist()
-            return False, sorted_thresholds
-
-        def find_best_threshold_multi(class_idx, min_range, max_range, thresholds):
-            """
-            Similar to find_best_thresholds(), but handles the multi-class case. Each execution of this tunes the
-            threshold for only one of the classes, holding the other thresholds constant.
-
-            :param class_idx:
-            :param min_range:
-            :param max_range:
-            :param thresholds:
-            :return:
-            """
-            # We include the current value for the threshold in the set tried this iteration to ensure we cannot
-            # move to another value that is worse that this.
-            curr_val = thresholds[class_idx]
-            test_vals = [min_range]
-            step = (max_range - min_range) / 10.0
-            for i in np.arange(min_range, max_range, step):
-                test_vals.append(i)
-            test_vals.append(max_range)
-            test_vals.append(curr_val)
-            test_vals = list(set(test_vals))
-
-            scores_arr = []
-            thresholds = thresholds.copy()
-            for threshold in test_vals:
-                thresholds[class_idx] = threshold
-                pred = self.get_predictions(target_classes, y_pred_proba, default_class, thresholds)
-                score = metric(y_true, pred, **kwargs)
-                scores_arr.append(score)
-            if len(set(scores_arr)) == 1:
-                return True, []
-
-            if higher_is_better:
-                sorted_thresholds = pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index[::-1].tolist()].values.tolist()
-            else:
-                sorted_thresholds = pd.Series(test_vals)[pd.Series(scores_arr).sort_values().index.tolist()].values.tolist()
-            return False, sorted_thresholds
-
-        y_true = pd.Series(y_true).astype(str)
-        y_pred_proba = np.array(y_pred_proba)
-        target_classes = [str(x) for x in target_classes]
-
-        if len(target_classes) == 1:
-            print("target_classes must have at least two values")
-            return
-
-        if len(target_classes) == 2:
-            # Ensure the predictions are in a 1d array, though a 2d array may be passed
-            if y_pred_proba.ndim == 2:
-                y_pred_proba = y_pred_proba[:, 1]
-
-            min_range = 0.0
-            max_range = 1.0
-            if plot_thresholds:
-                for iteration_idx in range(max_iterations):
-                    are_equal, sorted_array = find_best_thresholds(iteration_idx, min_range, max_range, plot_thresholds)
-                    if are_equal:  # are_equal is True if all thresholds result in the same scores
-                        return min_range + ((max_range - min_range) / 2)
-                    min_range = min(sorted_array[:2])
-                    max_range = max(sorted_array[:2])
-                    if min_range == max_range:
-                        return min_range
-            else:
-                for _ in tqdm(range(max_iterations)):
-                    are_equal, sorted_array = find_best_thresholds(None, min_range, max_range, plot_thresholds)
-                    if are_equal:  # are_equal is True if all thresholds result in the same scores
-                        return min_range + ((max_range - min_range) / 2)
-                    min_range = min(sorted_array[:2])
-                    max_range = max(sorted_array[:2])
-                    if min_range == max_range:
-                        return min_range
-
-            return sorted_array[0]
-        else:
-            if default_class is None:
-                print("Default class must be specified to tune thresholds with multi-class classification")
-                return
-            default_class_idx = target_classes.index(default_class)
-            thresholds = [0.5]*(len(target_classes))
-            thresholds[default_class_idx] = 0.0  # The threshold for the default class is always 0.0
-            prev_thresholds = thresholds.copy()
-            for _ in tqdm(range(max_iterations)):  # Loop max_iterations times, each time adjusting each threshold.
-                for class_idx, class_label in enumerate(target_classes):
-                    if class_label == default_class:
-                        continue
-                    min_range = 0.0
-                    max_range = 1.0
-                    # Loop again for max_iterations times, to set the current threshold given the other thresholds.
-                    for iter_idx in range(max_iterations):
-                        are_equal, sorted_array = find_best_threshold_multi(class_idx, min_range, max_range, thresholds)
-                        if are_equal:
-                            break
-                        min_range = min(sorted_array[:2])
-                        max_range = max(sorted_array[:2])
-                        if min_range == max_range:
-                            break
-                        thresholds[class_idx] = sorted_array[0]
-                if thresholds == prev_thresholds:
-                    break
-                prev_thresholds = thresholds.copy()
-            return thresholds
-
-    @staticmethod
-    def get_predictions(target_classes, y_pred_proba, default_class, thresholds):
-        """
-        Get the class predictions given a set of probabilities.
-
-        :param target_classes: array of str
-            Names of the target classes in the order of the probabilities in y_pred_proba
-        :param y_pred_proba: array of float
-            Predicted probabilities. For binary classification, may be a 1d or 2d array. For multiclass classification,
-            must be a 2d array.
-        :param default_class: str
-            One element of target_classes
-        :param thresholds: float or array of float
-            For binary classification, should be a float. For multiclass classification, must be an array of floats.
-        :return: array of class labels
-        """
-        def clean_probas(x, threshold):
-            if x > threshold:
-                return x
-            return -np.inf
-
-        y_pred_proba = np.array(y_pred_proba)
-        target_classes = [str(x) for x in target_classes]
-
-        if (len(target_classes) == 2) and (y_pred_proba.ndim == 2):
-            y_pred_proba = y_pred_proba[:, 1]
-
-        d = pd.DataFrame(y_pred_proba.tolist())
-        if len(target_classes) == 2:
-            if y_pred_proba.ndim == 2:
-                y_pred_proba = y_pred_proba[:, 1]
-            threshold = thresholds  # With binary classification, we use a single threshold
-            if threshold is None:
-                threshold = 0.5
-            d['Pred'] = np.where(y_pred_proba > threshold, target_classes[1], target_classes[0])
-        else:
-            proba_cols = d.columns
-            if default_class is not None:
-                for class_idx, class_name in enumerate(target_classes):
-                    if class_name == default_class:
-                        continue
-                    d[proba_cols[class_idx]] = d[proba_cols[class_idx]].apply(clean_probas, threshold=thresholds[class_idx])
-
-            d['Max Proba'] = d.max(axis=1)
-            d['Pred'] = d[proba_cols].idxmax(axis=1)
-            d['Pred'] = pd.Series([target_classes[x] for x in d['Pred']])
-
-        return d['Pred'].tolist()
+        return result.threshold
 
     @staticmethod
     def __get_swarmplot_dot_size(nrows, y_true, n_plots=None):
@@ -1016,18 +799,50 @@ class ClassificationThresholdTuner:
         min_class_dot_size = 3.0 / np.log10(min_count)
         return max(dot_size, min_class_dot_size, 0.4)
 
+    @staticmethod
+    def __show_label_stats(stats):
+        import matplotlib.pyplot as plt
+        from sklearn.metrics import ConfusionMatrixDisplay
+
+        show(stats.metrics)
+
+        # Display a confusion matrix
+        n_classes = len(stats.target_classes)
+        fig, ax = plt.subplots(figsize=(max(3, n_classes*1.1), max(3, n_classes*1.1)))
+        disp = ConfusionMatrixDisplay(confusion_matrix=stats.confusion_matrix, display_labels=stats.target_classes)
+        disp.plot(cmap='Blues', values_format=',', xticks_rotation="vertical", ax=ax)
+        plt.title("Confusion Matrix")
+        plt.show()
+
     @staticmethod
     def __add_roc_lines(fpr, tpr, thresholds, threshold, ax):
-        idx = -1
-        closest_diff = np.inf
-        for t_idx, t in enumerate(thresholds):
-            diff = abs(t-threshold)
-            if diff < closest_diff:
-                closest_diff = diff
-                idx = t_idx
-        ax.plot([fpr[idx], fpr[idx]], [0, tpr[idx]], color='green')
-        ax.plot([0, fpr[idx]], [tpr[idx], tpr[idx]], color='green')
-        sns.scatterplot(x=[fpr[idx]], y=[tpr[idx]], color='red', s=100, ax=ax)
+        # Mark the point on the curve with the threshold closest to the one given. The ROC thresholds are in
+        # decreasing order, so search in the reversed array. Where two are equally close, the higher is used.
+        ascending = thresholds[::-1]
+        pos = np.searchsorted(ascending, threshold)
+        candidates = [x for x in (pos, pos - 1) if 0 <= x < len(ascending)]
+        asc_idx = min(candidates, key=lambda x: abs(ascending[x] - threshold))
+        idx = len(thresholds) - 1 - asc_idx
+        ClassificationThresholdTuner.__add_roc_point(fpr[idx], tpr[idx], ax)
+
+    def __plot_roc(self, roc, ax):
+        from sklearn.metrics import RocCurveDisplay
+
+        fpr, tpr = roc.fpr, roc.tpr
+        if self.max_roc_points and len(fpr) > self.max_roc_points:
+            # fpr + tpr increases along the curve, so select points spaced evenly by it, keeping both ends
+            idx = np.searchsorted(fpr + tpr, np.linspace(0.0, 2.0, self.max_roc_points))
+            idx = np.unique(np.r_[0, np.minimum(idx, len(fpr) - 1), len(fpr) - 1])
+            fpr, tpr = fpr[idx], tpr[idx]
+        roc_display = RocCurveDisplay(fpr=fpr, tpr=tpr, roc_auc=roc.auc, estimator_name='')
+        roc_display.plot(ax=ax)
+
+    @staticmethod
+    def __add_roc_point(fpr, tpr, ax):
+        import seaborn as sns
+        ax.plot([fpr, fpr], [0, tpr], color='green')
+        ax.plot([0, fpr], [tpr, tpr], color='green')
+        sns.scatterplot(x=[fpr], y=[tpr], color='red', s=100, ax=ax)
 
     def __get_colour_code_binary(self, d, target_classes, threshold):
         d['colour_code'] = 'xxx'
@@ -1049,6 +864,90 @@ class ClassificationThresholdTuner:
         d = d.sort_values('colour_code')
         return d, colors
 
+    def __get_colour_codes_binary(self, y, proba, target_classes, threshold):
+        """
+        Get the same colour codes as __get_colour_code_binary() for every record, as an array, along with a dict of the
+        colour for each code, for use with __plot_binned().
+        """
+        y = np.asarray(y)
+        proba = np.asarray(proba)
+        colour_codes = (y == target_classes[1]) * 2 + (proba >= threshold)
+        return colour_codes, {0: self.colors[0], 1: 'red', 2: 'red', 3: self.colors[1]}
+
+    def __get_colour_codes_multi(self, y, pred, target_classes):
+        """
+        Get a colour code for every record identifying its true class and whether it was predicted correctly, along
+        with a dict of the colour for each code, for use with __plot_binned().
+        """
+        y_idx = pd.Categorical(y, categories=target_classes).codes.astype(np.int64)
+        colour_codes = y_idx * 2 + (np.asarray(y) != np.asarray(pred))
+        palette = {}
+        for tc_idx in range(len(target_classes)):
+            palette[tc_idx * 2] = self.colors[tc_idx % len(self.colors)]
+            palette[tc_idx * 2 + 1] = 'red'
+        return colour_codes, palette
+
+    @staticmethod
+    def __plot_binned(ax, x, y, order, hue=None, palette=None, x_label=None, x_range=None, n_bins=100):
+        """
+        Draw the distribution of x for each class in order as a strip of histogram bars, in place of a swarm plot. As
+        with the swarm plots, each class has a row, with the first class at the top. Every record is binned, so no
+        sampling is needed, and the time taken to draw depends on the number of bins rather than the number of
+        records. Each row is scaled to its own highest bin, so small classes remain visible.
+
+        :param hue: array of int
+            Optional colour code for each record. Within each bin, the bars for each code are stacked.
+        :param palette: dict or list
+            Where hue is given, a dict of the colour for each code. Otherwise, a list with a colour for each row.
+        :param x_range: tuple of floats
+            The range binned. Defaults to the range of x. Records outside this are not shown.
+        """
+        x = np.asarray(x, dtype=float)
+        row_idx = pd.Index(order).get_indexer(pd.Series(y).astype(str))
+        if hue is None:
+            hue = row_idx
+            palette = dict(enumerate(palette))
+        hue = np.asarray(hue)
+
+        if x_range is None:
+            x_range = (np.nanmin(x), np.nanmax(x)) if len(x) else (0.0, 1.0)
+            if x_range[0] == x_range[1]:
+                x_range = (x_range[0] - 0.5, x_range[1] + 0.5)
+        edges = np.linspace(x_range[0], x_range[1], n_bins + 1)
+        keep = (row_idx >= 0) & (x >= x_range[0]) & (x <= x_range[1])
+        bin_idx = ((x[keep] - x_range[0]) * (n_bins / (x_range[1] - x_range[0]))).astype(np.int64)
+        bin_idx = np.minimum(bin_idx, n_bins - 1)
+
+        # Count the records by (row, colour code, bin) in a single pass
+        hue_values = np.unique(hue[keep])
+        hue_idx = np.searchsorted(hue_values, hue[keep])
+        counts = np.bincount((row_idx[keep] * len(hue_values) + hue_idx) * n_bins + bin_idx,
+                             minlength=len(order) * len(hue_values) * n_bins)
+        counts = counts.reshape(len(order), len(hue_values), n_bins)
+
+        # Each colour code within a row is drawn as a single filled step outline, rather than a bar per bin
+        for row in range(len(order)):
+            totals = counts[row].sum(axis=0)
+            if totals.max() == 0:
+                continue
+            scale = 0.8 / totals.max()
+            bottom = row - (totals * scale) / 2.0
+            for hue_pos, hue_value in enumerate(hue_values):
+                heights = counts[row, hue_pos] * scale
+                if heights.any():
+                    top = bottom + heights
+                    ax.fill_between(edges, np.r_[bottom, bottom[-1]], np.r_[top, top[-1]], step='post',
+                                    color=palette[hue_value], linewidth=0)
+                    bottom = top
+
+        ax.set_yticks(range(len(order)))
+        ax.set_yticklabels(order)
+        ax.set_ylim(len(order) - 0.5, -0.5)
+        ax.set_xlim(x_range)
+        ax.set_ylabel("Y")
+        if x_label:
+            ax.set_xlabel(x_label)
+
     @staticmethod
     def __get_sample_df(d, target_classes):
         pd_arr = []
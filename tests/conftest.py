@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# the Kaggle modules are a flat directory of scripts rather than a package
+sys.path.append(str(Path(__file__).resolve().parent.parent / "kaggle" / "src"))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+from sklearn.metrics import roc_auc_score, roc_curve as sklearn_roc_curve
+
+from auc import delong_test, roc_auc, roc_curve, sketch_auc
+from streaming_tuner import ScoreSketch
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y = (rng.random(300) < 0.4).astype(int)
+    # rounded, so there are ties within and across the classes
+    score_a = np.round(rng.normal(y, 1.0) / 4 + 0.5, 2)
+    score_b = np.round(0.6 * score_a + rng.normal(0.2 * y, 0.2), 2)
+    return y, score_a, score_b
+
+
+def _pairwise(y, score):
+    """Compare every positive with every negative: 1 where the positive scores higher, and 0.5 for ties."""
+    positives, negatives = score[y == 1], score[y == 0]
+    return (positives[:, np.newaxis] > negatives).astype(float) + 0.5 * (positives[:, np.newaxis] == negatives)
+
+
+def test_roc_auc_matches_sklearn(scores):
+    """Test the rank-based AUC, with and without weights, and the ROC curve against sklearn."""
+    y, score, _ = scores
+    assert roc_auc(y, score) == pytest.approx(roc_auc_score(y, score), abs=1e-15)
+    assert roc_auc(y, score) == pytest.approx(_pairwise(y, score).mean(), abs=1e-15)
+    weights = np.random.default_rng(1).random(len(y))
+    assert roc_auc(y, score, sample_weight=weights) == pytest.approx(
+        roc_auc_score(y, score, sample_weight=weights), abs=1e-12)
+
+    for ours, expected in zip(roc_curve(y, score), sklearn_roc_curve(y, score, drop_intermediate=False)):
+        np.testing.assert_allclose(ours, expected, rtol=0, atol=1e-15)
+
+
+def test_delong_matches_brute_force(scores):
+    """Test DeLong's AUCs, covariance and p-value against the structural components from every pair of records."""
+    y, score_a, score_b = scores
+    result = delong_test(y, score_a, score_b)
+
+    psi = [_pairwise(y, score) for score in (score_a, score_b)]
+    v10 = np.vstack([p.mean(axis=1) for p in psi])
+    v01 = np.vstack([p.mean(axis=0) for p in psi])
+    covariance = np.cov(v10) / v10.shape[1] + np.cov(v01) / v01.shape[1]
+    z = (psi[0].mean() - psi[1].mean()) / math.sqrt(covariance[0, 0] + covariance[1, 1] - 2 * covariance[0, 1])
+
+    assert (result.auc_a, result.auc_b) == pytest.approx((psi[0].mean(), psi[1].mean()), abs=1e-15)
+    np.testing.assert_allclose(result.covariance, covariance, rtol=1e-12)
+    assert result.z == pytest.approx(z, rel=1e-10)
+    assert result.p_value == pytest.approx(math.erfc(abs(z) / math.sqrt(2)), rel=1e-10)
+
+
+def test_sketch_auc_bounds_exact(scores):
+    """Test that the sketch's bounds contain the exact AUC, and are exact where every score is on its own bin."""
+    y, score, _ = scores
+    exact = roc_auc_score(y, score)
+    for n_bins in (10, 100):
+        estimate = sketch_auc(ScoreSketch(["0", "1"], n_bins=n_bins, low=-0.5, high=1.5).update(y, score))
+        assert estimate.lower <= exact <= estimate.upper
+        assert estimate.lower <= estimate.auc <= estimate.upper
+
+    # scores on a grid of 0.01 fall in distinct bins of width 0.01, with ties only where the scores are equal
+    estimate = sketch_auc(ScoreSketch(["0", "1"], n_bins=200, low=-0.505, high=1.495).update(y, score))
+    assert estimate.auc == pytest.approx(exact, abs=1e-12)
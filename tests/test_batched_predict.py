@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from batched_predict import BatchedPredictor
+
+
+class _Chunkwise:
+    """A stand-in model whose output dtype depends on the chunk, as a model returning NaN for some records might."""
+
+    def predict(self, X):
+        values = np.asarray(X)[:, 0]
+        if np.all(values < 4):
+            return values.astype(np.int64)
+        return np.where(values == 5, np.nan, values + 0.5)
+
+    def transform(self, X):
+        return pd.DataFrame({"code": X["a"].astype(np.int64), "ratio": X["a"] / 2, "name": X["a"].astype(str)},
+                            index=X.index)
+
+
+def test_output_dtype_is_promoted():
+    """Test that a later chunk of floats is not truncated into the integer buffer of the first chunk."""
+    X = np.arange(8.0).reshape(-1, 1)
+    for n_jobs in (None, 2):
+        predictions = BatchedPredictor(_Chunkwise(), chunk_size=4, n_jobs=n_jobs).predict(X)
+        assert predictions.dtype == np.float64
+        np.testing.assert_array_equal(predictions, [0, 1, 2, 3, 4.5, np.nan, 6.5, 7.5])
+
+
+def test_dataframe_keeps_column_dtypes():
+    """Test that transformed DataFrames keep the dtype of each column and the index of X."""
+    X = pd.DataFrame({"a": np.arange(7.0)}, index=np.arange(7) * 10)
+    frame = BatchedPredictor(preprocessor=_Chunkwise(), chunk_size=3).transform(X)
+    pd.testing.assert_frame_equal(frame, _Chunkwise().transform(X))
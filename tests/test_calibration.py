@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.datasets import make_classification
+from sklearn.frozen import FrozenEstimator
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+
+from calibration import (CalibratedModel, Calibrator, HistogramCalibrator, IsotonicCalibrator, PlattCalibrator,
+                         load_calibrator)
+
+pytestmark = pytest.mark.filterwarnings("ignore:scipy.optimize:DeprecationWarning")
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=1500, n_features=8, n_informative=4, flip_y=0.05, random_state=0)
+    return (X[:500], y[:500]), (X[500:1000], y[500:1000]), X[1000:]
+
+
+@pytest.mark.parametrize("model", [LogisticRegression(), GaussianNB()], ids=["decision_function", "predict_proba"])
+# sklearn's L-BFGS stops short of the optimum that Newton's method reaches, by a few 1e-9 in probability
+@pytest.mark.parametrize("method, calibrator, atol", [("sigmoid", PlattCalibrator, 1e-8),
+                                                      ("isotonic", IsotonicCalibrator, 1e-14)])
+def test_matches_calibrated_classifier_cv(data, model, method, calibrator, atol):
+    """Test that a calibrator fitted on the model's scores gives the probabilities of CalibratedClassifierCV."""
+    (X_train, y_train), (X_cal, y_cal), X_test = data
+    model = model.fit(X_train, y_train)
+    reference = CalibratedClassifierCV(FrozenEstimator(model), method=method).fit(X_cal, y_cal)
+
+    fitted = calibrator()
+    calibrated = CalibratedModel(model, fitted)
+    fitted.fit(calibrated.scores(X_cal), y_cal)
+    np.testing.assert_allclose(calibrated.predict_proba(X_test), reference.predict_proba(X_test), rtol=0, atol=atol)
+
+
+def test_platt_reaches_the_optimum(data):
+    """Test that the Platt coefficients zero the gradient of the cross-entropy against Platt's smoothed targets."""
+    (X_train, y_train), (X_cal, y_cal), _ = data
+    scores = LogisticRegression().fit(X_train, y_train).decision_function(X_cal)
+    platt = PlattCalibrator().fit(scores, y_cal)
+    n_pos, n_neg = y_cal.sum(), len(y_cal) - y_cal.sum()
+    residual = platt.transform(scores) - np.where(y_cal == 1, (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2))
+    assert np.abs([np.sum(residual * scores), np.sum(residual)]).max() < 1e-10
+
+
+def test_isotonic_is_monotone_and_histogram_is_bin_rates(data):
+    """Test the isotonic fit is non-decreasing, and each histogram bin gives the rate of positives in it."""
+    (X_train, y_train), (X_cal, y_cal), _ = data
+    scores = LogisticRegression().fit(X_train, y_train).predict_proba(X_cal)[:, 1]
+    isotonic = IsotonicCalibrator().fit(scores, y_cal)
+    assert np.all(np.diff(isotonic.transform(np.sort(scores))) >= 0)
+
+    histogram = HistogramCalibrator(n_bins=5).fit(scores, y_cal)
+    edges = np.quantile(scores, np.linspace(0, 1, 6))
+    bins = np.clip(np.searchsorted(edges, scores, side="right") - 1, 0, 4)
+    for i in range(5):
+        middle = (edges[i] + edges[i + 1]) / 2
+        assert histogram.transform(np.array([middle]))[0] == pytest.approx(y_cal[bins == i].mean(), abs=1e-12)
+
+
+@pytest.mark.parametrize("calibrator", [PlattCalibrator(), IsotonicCalibrator(), HistogramCalibrator()],
+                         ids=["platt", "isotonic", "histogram"])
+def test_save_and_load(data, calibrator, tmp_path):
+    """Test that a calibrator read back from its .npz file calibrates as before."""
+    (X_train, y_train), (X_cal, y_cal), X_test = data
+    model = LogisticRegression().fit(X_train, y_train)
+    calibrator.fit(model.decision_function(X_cal), y_cal)
+    calibrator.save(tmp_path / "calibrator.npz")
+    loaded = load_calibrator(tmp_path / "calibrator.npz")
+    assert type(loaded) is type(calibrator)
+    scores = model.decision_function(X_test)
+    np.testing.assert_array_equal(loaded.transform(scores), calibrator.transform(scores))
+
+
+def test_incomplete_calibrator_cannot_be_built():
+    """Test that a subclass without transform and _arrays fails when it is constructed."""
+    class FitOnly(Calibrator):
+        def fit(self, scores, y, sample_weight=None, pos_label=None):
+            return self
+
+    with pytest.raises(TypeError, match="abstract"):
+        FitOnly()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+
+from cascade import CascadeClassifier, cascade_report, tune_band
+
+pytestmark = pytest.mark.filterwarnings("ignore:scipy.optimize:DeprecationWarning")
+
+
+@pytest.fixture(scope="module")
+def models():
+    X, y = make_classification(n_samples=1500, n_features=10, n_informative=5, weights=[0.8], random_state=0)
+    cheap = LogisticRegression().fit(X[:600], y[:600])
+    expensive = HistGradientBoostingClassifier(max_iter=50, random_state=0).fit(X[:600], y[:600])
+    return cheap, expensive, (X[600:1050], y[600:1050]), (X[1050:], y[1050:])
+
+
+def _labels(cheap_proba, expensive_proba, lower, upper, threshold):
+    return np.where(cheap_proba < lower, 0, np.where(cheap_proba > upper, 1, (expensive_proba >= threshold) * 1))
+
+
+def test_band_is_widest_exit_within_tolerance(models):
+    """Test that the band found lets the most records exit of every pair of edges within the tolerance."""
+    cheap, expensive, (X_val, y_val), _ = models
+    cheap_proba, expensive_proba = cheap.predict_proba(X_val)[:, 1], expensive.predict_proba(X_val)[:, 1]
+    result = tune_band(y_val, [0, 1], cheap_proba, expensive_proba, f1_score, tolerance=0.01, threshold=0.4,
+                       n_edges=10, pos_label="1")
+
+    reference = f1_score(y_val, (expensive_proba >= 0.4) * 1)
+    assert result.reference_score == pytest.approx(reference, abs=1e-15)
+    assert result.score == pytest.approx(f1_score(y_val, _labels(cheap_proba, expensive_proba, result.lower,
+                                                                 result.upper, 0.4)), abs=1e-15)
+    assert result.loss <= 0.01
+
+    edges = np.unique(np.quantile(cheap_proba, np.linspace(0, 1, 11)))
+    best_exit = max(np.mean((cheap_proba < lower) | (cheap_proba > upper))
+                    for i, lower in enumerate(edges) for upper in edges[i:]
+                    if reference - f1_score(y_val, _labels(cheap_proba, expensive_proba, lower, upper, 0.4)) <= 0.01)
+    assert result.exit_fraction == pytest.approx(best_exit, abs=1e-15)
+    assert result.exit_fraction > 0
+
+
+def test_cascade_predictions_match_the_band(models):
+    """Test that the cascade predicts from the models' probabilities as the band search assumes, and only runs the
+    expensive model on the records in the band."""
+    cheap, expensive, (X_val, y_val), (X_test, y_test) = models
+    result = tune_band(y_val, [0, 1], cheap.predict_proba(X_val)[:, 1], expensive.predict_proba(X_val)[:, 1],
+                       f1_score, pos_label="1")
+    cascade = CascadeClassifier.from_search(cheap, expensive, result)
+
+    cheap_proba, expensive_proba = cheap.predict_proba(X_test)[:, 1], expensive.predict_proba(X_test)[:, 1]
+    expected = _labels(cheap_proba, expensive_proba, result.lower, result.upper, result.threshold)
+    np.testing.assert_array_equal(cascade.predict(X_test), expected)
+    in_band = (cheap_proba >= result.lower) & (cheap_proba <= result.upper)
+    assert cascade.last_exit_fraction == pytest.approx(1 - in_band.mean())
+    np.testing.assert_array_equal(cascade.predict_proba(X_test)[:, 1], np.where(in_band, expensive_proba,
+                                                                                 cheap_proba))
+
+    report = cascade_report(cascade, X_test, y_test, f1_score)
+    assert report.score == f1_score(y_test, expected)
+    assert report.expensive_score == f1_score(y_test, (expensive_proba >= result.threshold) * 1)
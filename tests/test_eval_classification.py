@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier, StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (accuracy_score, classification_report, f1_score, precision_score, recall_score,
+                             roc_auc_score)
+from sklearn.svm import SVC
+
+from eval_classification import eval_classification, evaluate_classification
+
+# sklearn's lbfgs solver passes options that newer SciPy releases deprecate
+pytestmark = pytest.mark.filterwarnings("ignore:scipy.optimize:DeprecationWarning")
+
+
+def _baseline_results(model, X_train, y_train, X_test, y_test, model_name="model"):
+    """Build the results DataFrame as eval_classification did before it scored each split once."""
+    train_pred = model.predict(X_train)
+    test_pred = model.predict(X_test)
+    results = pd.DataFrame(index=[model_name])
+    results["train_acc"] = accuracy_score(y_train, train_pred)
+    results["test_acc"] = accuracy_score(y_test, test_pred)
+    results["train_prec"] = precision_score(y_train, train_pred)
+    results["test_prec"] = precision_score(y_test, test_pred)
+    results["train_recall"] = recall_score(y_train, train_pred)
+    results["test_recall"] = recall_score(y_test, test_pred)
+    results["train_f1"] = f1_score(y_train, train_pred)
+    results["test_f1"] = f1_score(y_test, test_pred)
+    results["train_auc"] = roc_auc_score(y_train, model.predict_proba(X_train)[:, 1])
+    results["test_auc"] = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+    return results
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=600, n_features=8, n_informative=4, weights=[0.7], flip_y=0.1,
+                               random_state=0)
+    return X[:400], y[:400], X[400:], y[400:]
+
+
+def _stack():
+    return StackingClassifier([("forest", RandomForestClassifier(n_estimators=10, random_state=0)),
+                               ("hgb", HistGradientBoostingClassifier(max_iter=20, random_state=0))],
+                              final_estimator=LogisticRegression(), cv=3)
+
+
+@pytest.mark.parametrize("model", [SVC(probability=True, random_state=0), LogisticRegression(),
+                                   RandomForestClassifier(n_estimators=20, random_state=0),
+                                   HistGradientBoostingClassifier(max_iter=20, random_state=0), _stack()],
+                         ids=["svc", "logistic_regression", "random_forest", "hgb", "stacking"])
+def test_results_match_baseline(data, model):
+    """Test that the results DataFrame and the reports are those of the labels from ``model.predict``.
+
+    The probabilities of ``SVC(probability=True)`` disagree with its ``predict``, so thresholding them at 0.5 changes
+    the scores.
+    """
+    X_train, y_train, X_test, y_test = data
+    model.fit(X_train, y_train)
+    for chunk_size in (None, 64):
+        results = eval_classification(model, X_train, y_train, X_test, y_test, model_name="m", render=False,
+                                      chunk_size=chunk_size)
+        pd.testing.assert_frame_equal(results, _baseline_results(model, X_train, y_train, X_test, y_test, "m"),
+                                      rtol=1e-12)
+
+    evaluation = evaluate_classification(model, X_train, y_train, X_test, y_test)
+    assert evaluation.train.report == classification_report(y_train, model.predict(X_train))
+    assert evaluation.test.report == classification_report(y_test, model.predict(X_test))
+
+
+@pytest.mark.parametrize("model, use_predict, n_predict", [(_stack(), False, 0), (_stack(), True, 2),
+                                                           (SVC(probability=True, random_state=0), False, 2)],
+                         ids=["stacking", "stacking_use_predict", "svc"])
+def test_inference_passes(data, model, use_predict, n_predict):
+    """Test that each split is scored with one predict_proba pass, and predict is only run where it is needed."""
+    X_train, y_train, X_test, y_test = data
+    model.fit(X_train, y_train)
+    calls = {"predict": 0, "predict_proba": 0}
+
+    def counted(name):
+        method = getattr(model, name)
+
+        def call(X):
+            calls[name] += 1
+            return method(X)
+        return call
+
+    for name in calls:
+        setattr(model, name, counted(name))
+    eval_classification(model, X_train, y_train, X_test, y_test, render=False, use_predict=use_predict)
+    assert calls == {"predict": n_predict, "predict_proba": 2}
+
+
+def test_threshold_uses_scores(data):
+    """Test that an explicit threshold labels the records from the probabilities rather than ``model.predict``."""
+    X_train, y_train, X_test, y_test = data
+    model = SVC(probability=True, random_state=0).fit(X_train, y_train)
+    evaluation = evaluate_classification(model, X_train, y_train, X_test, y_test, threshold=0.3)
+    expected = (model.predict_proba(X_test)[:, 1] > 0.3).astype(int)
+    assert evaluation.test.recall == recall_score(y_test, expected)
+    assert evaluation.test.f1 == pytest.approx(f1_score(y_test, expected), abs=1e-15)
+
+    # precomputed probabilities are thresholded at 0.5
+    proba = model.predict_proba(X_test)
+    evaluation = evaluate_classification(None, X_train, y_train, X_test, y_test,
+                                         train_proba=model.predict_proba(X_train), test_proba=proba)
+    assert evaluation.test.accuracy == accuracy_score(y_test, (proba[:, 1] > 0.5).astype(int))
+    assert np.isfinite(evaluation.test.auc)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.tree import DecisionTreeClassifier
+
+from leaderboard import Leaderboard, load_arrays, save_arrays
+
+
+def test_cached_and_fresh_rows_share_a_schema(tmp_path):
+    """Test that rows read back from the log have the same columns as rows evaluated in this run."""
+    X, y = make_classification(n_samples=200, random_state=0)
+    models = {f"tree_{depth}": DecisionTreeClassifier(max_depth=depth, random_state=0).fit(X[:150], y[:150])
+              for depth in (2, 3)}
+    leaderboard = Leaderboard(tmp_path)
+    fresh = leaderboard.evaluate({"tree_2": models["tree_2"]}, X[:150], y[:150], X[150:], y[150:])
+    results = leaderboard.evaluate(models, X[:150], y[:150], X[150:], y[150:])
+
+    assert results["cached"].tolist() == [True, False]
+    assert list(results.columns) == list(fresh.columns)
+    assert results["model_key"].notna().all()
+    scores = ["train_acc", "test_acc", "train_auc", "test_auc", "model_key"]
+    pd.testing.assert_series_equal(results.loc["tree_2", scores], fresh.loc["tree_2", scores])
+
+
+def test_saved_arrays_keep_column_dtypes(tmp_path):
+    """Test that a mixed-dtype DataFrame is memory-mapped back with the values and dtype of each column."""
+    X = pd.DataFrame({"amount": [1.5, 2.5, np.nan], "count": [1, 2, 3], "flag": [True, False, True],
+                      "name": ["a", "bb", "c"]})
+    y = np.array([0, 1, 0])
+    loaded = load_arrays(save_arrays({"X_train": X, "y_train": y}, tmp_path))
+    pd.testing.assert_frame_equal(loaded["X_train"], X)
+    np.testing.assert_array_equal(loaded["y_train"], y)
+
+    with pytest.raises(ValueError, match="'kind' of X_test"):
+        save_arrays({"X_test": X.assign(kind=pd.Categorical(["x", "y", "x"]))}, tmp_path)
+    with pytest.raises(ValueError, match="Python objects other than strings"):
+        save_arrays({"X_test": X.assign(name=["a", None, "c"])}, tmp_path)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from scipy.special import expit, softmax
+from sklearn.datasets import make_classification
+from sklearn.neural_network import MLPClassifier
+
+from mlp_numpy import NumpyMLP, QuantizedMLP, quantization_report
+
+# the MLPClassifier is only a source of trained weights, so whether it has fully converged does not matter
+pytestmark = pytest.mark.filterwarnings("ignore::sklearn.exceptions.ConvergenceWarning")
+
+
+ACTIVATIONS = {"relu": lambda z: np.maximum(z, 0), "sigmoid": expit, "softmax": lambda z: softmax(z, axis=1),
+               "tanh": np.tanh, "linear": lambda z: z}
+
+
+def _reference(network, X):
+    """Run the float network's weights through the layers in float64, with SciPy's activations."""
+    h = np.asarray(X, dtype=np.float64)
+    for kernel, bias, activation in zip(network.kernels, network.biases, network.activations):
+        h = ACTIVATIONS[activation](h @ kernel.astype(np.float64) + bias)
+    return h
+
+
+def _integer_reference(quantized, X):
+    """Run a network with accumulate="int32" with the products summed exactly in int64."""
+    h = np.asarray(X, dtype=np.float32)
+    layers = zip(quantized.kernels, quantized.kernel_scales, quantized.biases, quantized.activations)
+    for i, (kernel, scale, bias, activation) in enumerate(layers):
+        h_q = np.clip(np.rint(h / quantized.input_scales[i]), -127, 127).astype(np.int64)
+        h = (h_q @ kernel.astype(np.int64)).astype(np.float32) * (scale * quantized.input_scales[i]) + bias
+        h = ACTIVATIONS[activation](h).astype(np.float32)
+    return h
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=1200, n_features=20, n_informative=8, random_state=0)
+    return X[:800], y[:800], X[800:], y[800:]
+
+
+@pytest.fixture(scope="module")
+def network(data):
+    """A trained binary network: the weights of sklearn's MLPClassifier, which has the same layout as Keras'."""
+    X_train, y_train, _, _ = data
+    mlp = MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=100, random_state=0).fit(X_train, y_train)
+    return NumpyMLP(mlp.coefs_, mlp.intercepts_, ["relu", "relu", "sigmoid"]), mlp
+
+
+def test_forward_matches_float64_reference(data, network, tmp_path):
+    """Test the float32 forward pass against float64 and sklearn, in batches and after save and load."""
+    _, _, X_test, _ = data
+    network, mlp = network
+    expected = _reference(network, X_test)
+    np.testing.assert_allclose(network.predict(X_test), expected, rtol=0, atol=1e-5)
+    np.testing.assert_allclose(network.predict_proba(X_test), mlp.predict_proba(X_test), rtol=0, atol=1e-5)
+    np.testing.assert_array_equal(network.predict(X_test, batch_size=64), network.predict(X_test))
+    np.testing.assert_array_equal(network.predict_classes(X_test), (expected[:, 0] >= 0.5).astype(int))
+
+    network.save(tmp_path / "network.npz")
+    np.testing.assert_array_equal(NumpyMLP.load(tmp_path / "network.npz").predict(X_test), network.predict(X_test))
+    with pytest.raises(ValueError, match="features"):
+        network.predict(X_test[:, :5])
+
+
+def test_softmax_output(data):
+    """Test a multi-class softmax network against the float64 reference."""
+    _, _, X_test, _ = data
+    rng = np.random.default_rng(0)
+    network = NumpyMLP([rng.normal(size=(20, 8)), rng.normal(size=(8, 3))], [rng.normal(size=8), np.zeros(3)],
+                       ["tanh", "softmax"])
+    np.testing.assert_allclose(network.predict_proba(X_test), _reference(network, X_test), rtol=0, atol=1e-5)
+    np.testing.assert_array_equal(network.predict_classes(X_test), network.predict(X_test).argmax(axis=1))
+
+
+def test_quantized_paths(data, network, tmp_path):
+    """Test each accumulate mode against its reference, and that quantize, save and load keep the predictions."""
+    X_train, _, X_test, _ = data
+    network, _ = network
+    weights_only = QuantizedMLP.quantize(network)
+    np.testing.assert_allclose(weights_only.predict(X_test), weights_only.dequantize().predict(X_test), rtol=0,
+                               atol=1e-6)
+
+    integer = QuantizedMLP.quantize(network, X_train[:500], accumulate="int32")
+    np.testing.assert_allclose(integer.predict(X_test), _integer_reference(integer, X_test), rtol=0, atol=1e-6)
+
+    for quantized in (weights_only, integer):
+        quantized.save(tmp_path / "quantized.npz")
+        loaded = QuantizedMLP.load(tmp_path / "quantized.npz", accumulate=quantized.accumulate)
+        np.testing.assert_array_equal(loaded.predict(X_test), quantized.predict(X_test))
+    with pytest.raises(ValueError, match="calibration"):
+        QuantizedMLP.quantize(network, accumulate="int32")
+
+
+def test_wide_layer_uses_the_integer_product():
+    """Test that a layer with too many inputs for exact float32 sums gives the int32 result as well."""
+    rng = np.random.default_rng(0)
+    network = NumpyMLP([rng.normal(size=(1100, 4)), rng.normal(size=(4, 1))], [np.zeros(4), np.zeros(1)],
+                       ["relu", "sigmoid"])
+    X = rng.normal(size=(50, 1100))
+    quantized = QuantizedMLP.quantize(network, X, accumulate="int32")
+    np.testing.assert_allclose(quantized.predict(X), _integer_reference(quantized, X), rtol=0, atol=1e-6)
+
+
+def test_quantization_report(data, network):
+    """Test that quantizing the weights changes the AUC by little and shrinks them to about a quarter."""
+    X_train, _, X_test, y_test = data
+    network, _ = network
+    for quantized in (QuantizedMLP.quantize(network),
+                      QuantizedMLP.quantize(network, X_train[:500], accumulate="int32")):
+        report = quantization_report(network, quantized, X_test, y_test)
+        assert abs(report.auc_delta) < 0.005
+        assert report.max_abs_difference < 0.1
+        assert report.quantized_nbytes < 0.35 * report.nbytes
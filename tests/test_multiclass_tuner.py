@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix, f1_score
+
+import count_metrics
+from headless_tuner import HeadlessThresholdTuner
+from multiclass_tuner import candidate_confusion_matrices, tune_multiclass_thresholds
+
+CLASSES = ["a", "b", "c"]
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y_idx = rng.integers(0, 3, 400)
+    logits = rng.normal(size=(400, 3)) + 1.5 * np.eye(3)[y_idx]
+    proba = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    # round so that some probabilities tie with each other and with the candidates
+    return y_idx, np.round(proba, 2)
+
+
+def _brute_force_cm(y_idx, proba, thresholds):
+    """Get the confusion matrix of the labels from ``get_predictions``, the prediction rule the engine reproduces."""
+    predictions = HeadlessThresholdTuner.get_predictions(CLASSES, proba, "a", thresholds)
+    return confusion_matrix(np.asarray(CLASSES)[y_idx], predictions, labels=CLASSES)
+
+
+def test_candidate_matrices_match_predictions(scores):
+    """Test that the confusion matrix for every candidate threshold of a class is that of its predicted labels."""
+    y_idx, proba = scores
+    candidates = np.linspace(0.0, 1.0, 21)
+    for thresholds in ([0.0, 0.5, 0.5], [0.0, 0.3, 0.65]):
+        for class_idx in (1, 2):
+            cms = candidate_confusion_matrices(y_idx, proba, 0, np.array(thresholds), class_idx, candidates)
+            for candidate, cm in zip(candidates, cms):
+                trial = list(thresholds)
+                trial[class_idx] = candidate
+                np.testing.assert_array_equal(cm, _brute_force_cm(y_idx, proba, trial))
+
+
+def test_confusion_metrics_match_sklearn(scores):
+    """Test that the macro F1 from a confusion matrix is sklearn's from the labels."""
+    y_idx, proba = scores
+    y_true = np.asarray(CLASSES)[y_idx]
+    for thresholds in ([0.0, 0.5, 0.5], [0.0, 0.2, 0.9]):
+        predictions = HeadlessThresholdTuner.get_predictions(CLASSES, proba, "a", thresholds)
+        cm = _brute_force_cm(y_idx, proba, thresholds)
+        assert count_metrics.cm_f1_macro(cm) == pytest.approx(f1_score(y_true, predictions, average="macro"),
+                                                              abs=1e-12)
+
+
+def test_tuned_score_matches_search_threshold(scores):
+    """Test that the tuned score is the macro F1 of its thresholds, and no worse than the label-based search."""
+    y_idx, proba = scores
+    y_true = np.asarray(CLASSES)[y_idx]
+    candidates = np.linspace(0.0, 1.0, 101)
+    result = tune_multiclass_thresholds(y_true, CLASSES, proba, "a", candidates=candidates)
+    predictions = HeadlessThresholdTuner.get_predictions(CLASSES, proba, "a", result.threshold)
+    assert result.score == pytest.approx(f1_score(y_true, predictions, average="macro"), abs=1e-12)
+    assert result.n_evaluations > len(candidates)
+
+    def macro_f1(y, y_pred):
+        return f1_score(y, y_pred, average="macro")
+
+    loop = HeadlessThresholdTuner(cache_size=0).search_threshold(y_true, CLASSES, proba, macro_f1, default_class="a")
+    loop_predictions = HeadlessThresholdTuner.get_predictions(CLASSES, proba, "a", loop.threshold)
+    assert result.score >= macro_f1(y_true, loop_predictions) - 1e-12
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.metrics import f1_score, roc_auc_score
+
+from headless_tuner import HeadlessThresholdTuner
+from streaming_tuner import ScoreSketch, StreamingThresholdTuner
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y = (rng.random(3000) < 0.3).astype(int)
+    proba = np.clip(rng.normal(0.35 + 0.3 * y, 0.15), 0.0, 1.0)
+    return y, proba
+
+
+def test_counts_match_exact(scores):
+    """Test that the sketch's confusion counts at each bin edge are those of thresholding the scores exactly."""
+    y, proba = scores
+    sketch = ScoreSketch(["0", "1"], n_bins=200).update(y, proba)
+    # scores of exactly 1.0 are counted in the last bin, below the top edge
+    edges = sketch.edges[:-1]
+    tp, fp, fn, tn = StreamingThresholdTuner(sketch).counts(edges)
+    predicted = proba[np.newaxis] >= edges[:, np.newaxis]
+    np.testing.assert_array_equal(tp, (predicted & (y == 1)).sum(axis=1))
+    np.testing.assert_array_equal(fp, (predicted & (y == 0)).sum(axis=1))
+    np.testing.assert_array_equal(fn, (~predicted & (y == 1)).sum(axis=1))
+    np.testing.assert_array_equal(tn, (~predicted & (y == 0)).sum(axis=1))
+
+
+def test_threshold_matches_exhaustive_search(scores):
+    """Test that the tuned threshold is the best bin edge by sklearn's F1, and within a bin of the exact search."""
+    y, proba = scores
+    n_bins = 200
+    sketch = ScoreSketch(["0", "1"], n_bins=n_bins).update(y, proba)
+    result = StreamingThresholdTuner(sketch).tune_threshold("f1", max_threshold=0.99)
+
+    edges = sketch.edges[:-2]
+    exact = [f1_score(y, (proba >= edge).astype(int)) for edge in edges]
+    assert result.threshold == edges[int(np.argmax(exact))]
+    np.testing.assert_allclose(result.iterations[0].scores, exact, rtol=0, atol=1e-12)
+
+    # against the exact search over every distinct score, the threshold is off by less than a bin
+    thresholds = np.unique(proba)
+    positives, negatives = np.sort(proba[y == 1]), np.sort(proba[y == 0])
+    tp = len(positives) - np.searchsorted(positives, thresholds)
+    fp = len(negatives) - np.searchsorted(negatives, thresholds)
+    exact_f1 = 2 * tp / (len(positives) + tp + fp)
+    assert max(exact) <= exact_f1.max() < max(exact) + 0.005
+    assert abs(result.threshold - thresholds[np.argmax(exact_f1)]) < 1 / n_bins
+
+
+def test_merged_shards_match_one_sketch(scores, tmp_path):
+    """Test that sketches of shards, merged and round-tripped through .npz, equal the sketch of all the records."""
+    y, proba = scores
+    whole = ScoreSketch(["0", "1"], n_bins=500).update(y, proba)
+    shards = [ScoreSketch(["0", "1"], n_bins=500).update(y[i::3], proba[i::3]) for i in range(3)]
+    shards[0].save(tmp_path / "shard.npz")
+    merged = ScoreSketch.load(tmp_path / "shard.npz") + shards[1] + shards[2]
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert (merged.min_score, merged.max_score) == (proba.min(), proba.max())
+
+    roc = StreamingThresholdTuner(merged).roc_curve()
+    assert roc.auc == pytest.approx(roc_auc_score(y, proba), abs=1e-3)
+
+
+def test_slices_match_headless_off_the_boundaries(scores):
+    """Test that the slice counts are those of HeadlessThresholdTuner.slices() where no score is on a boundary."""
+    y, proba = scores
+    proba = np.clip(proba, 0.001, 0.999)
+    sketch = ScoreSketch(["0", "1"], n_bins=1000).update(y, proba)
+    streaming = StreamingThresholdTuner(sketch).slices()
+    headless = HeadlessThresholdTuner(cache_size=0).slices(y, ["0", "1"], proba)
+    for column in ("0", "1", "Total"):
+        np.testing.assert_array_equal(streaming.table[column], headless.table[column])
+
+
+def test_invalid_inputs(scores):
+    """Test that NaN scores and a window without bin edges raise a clear ValueError."""
+    y, proba = scores
+    with pytest.raises(ValueError, match="NaN"):
+        ScoreSketch(["0", "1"]).update(y[:2], [0.5, np.nan])
+    sketch = ScoreSketch(["0", "1"], n_bins=10).update(y, proba)
+    with pytest.raises(ValueError, match="min_threshold=0.51"):
+        StreamingThresholdTuner(sketch).tune_threshold("f1", min_threshold=0.51, max_threshold=0.59)
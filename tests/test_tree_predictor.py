@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification, make_regression
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor, RandomForestClassifier
+
+from tree_predictor import TreeEnsemble, flatten
+
+
+def _with_missing(X, seed=0):
+    X = X.copy()
+    X[np.random.default_rng(seed).random(X.shape) < 0.1] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_classifier_matches_hist_gradient_boosting(n_classes, tmp_path):
+    """Test that the flattened classifier's scores are bit-identical to sklearn's, including after save and load."""
+    X, y = make_classification(n_samples=500, n_features=6, n_informative=4, n_classes=n_classes, random_state=0)
+    X = _with_missing(X)
+    model = HistGradientBoostingClassifier(max_iter=30, max_leaf_nodes=15, early_stopping=False,
+                                           random_state=0).fit(X[:400], y[:400])
+    ensemble = flatten(model)
+    ensemble.save(tmp_path / "ensemble.npz")
+
+    for predictor in (ensemble, TreeEnsemble.load(tmp_path / "ensemble.npz")):
+        np.testing.assert_array_equal(predictor.decision_function(X[400:]), model.decision_function(X[400:]))
+        np.testing.assert_array_equal(predictor.predict_proba(X[400:]), model.predict_proba(X[400:]))
+        np.testing.assert_array_equal(predictor.predict(X[400:]), model.predict(X[400:]))
+    # blocks of a few records give the same result as one block
+    np.testing.assert_array_equal(ensemble.predict_proba(X[400:], block_size=7), model.predict_proba(X[400:]))
+
+
+def test_regressor_matches_hist_gradient_boosting():
+    """Test that the flattened regressor's predictions are bit-identical to sklearn's, for squared and Poisson loss."""
+    X, y = make_regression(n_samples=400, n_features=5, random_state=0)
+    X = _with_missing(X)
+    for loss, target in (("squared_error", y), ("poisson", np.exp(y / y.std()))):
+        model = HistGradientBoostingRegressor(loss=loss, max_iter=25, early_stopping=False,
+                                              random_state=0).fit(X[:300], target[:300])
+        np.testing.assert_array_equal(flatten(model).predict(X[300:]), model.predict(X[300:]))
+
+
+def test_unsupported_model():
+    """Test that models other than boosted ensembles are rejected."""
+    X, y = make_classification(n_samples=50, random_state=0)
+    with pytest.raises(NotImplementedError):
+        flatten(RandomForestClassifier(n_estimators=2).fit(X, y))